@@ -0,0 +1,222 @@
+/**
+ * Cluster Benchmark
+ * Measures exact-search throughput and memory against worker count on a
+ * CPU-only box. Each worker serves GET /search from a VectorStore that loads
+ * one shared synthetic index (paged from disk unless --no-map); the primary
+ * drives keep-alive HTTP load and sums worker memory.
+ *
+ * Usage: node scripts/benchmarkCluster.js [--workers 1,2,4] [--vectors 20000]
+ *        [--precision float32] [--connections 32] [--duration 10] [--no-map]
+ */
+
+const cluster = require('cluster');
+const fs = require('fs');
+const http = require('http');
+const os = require('os');
+const path = require('path');
+const { VectorStore } = require('../src/services/vectorStore.service');
+
+const DIMENSION = 768;
+const TOP_K = 5;
+
+const args = process.argv.slice(2);
+const option = (name, fallback) => {
+  const index = args.indexOf(`--${name}`);
+  return index !== -1 ? args[index + 1] : fallback;
+};
+
+/**
+ * Deterministic pseudo-random numbers (mulberry32)
+ */
+const makeRandom = (seed) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+const makeGaussian = (random) => () =>
+  Math.sqrt(-2 * Math.log(random() || 1e-12)) * Math.cos(2 * Math.PI * random());
+
+/**
+ * Resident memory split into private (anonymous) and file-backed pages
+ * A paged index is read through the page cache, which RSS does not count:
+ * compare privateMB with and without --no-map.
+ * @returns {Object} - Bytes: { rss, rssAnon, rssFile, heapUsed }
+ */
+const memorySnapshot = () => {
+  const snapshot = { rss: process.memoryUsage().rss, rssAnon: 0, rssFile: 0, heapUsed: process.memoryUsage().heapUsed };
+  try {
+    const status = fs.readFileSync('/proc/self/status', 'utf-8');
+    const field = (name) => {
+      const match = status.match(new RegExp(`^${name}:\\s+(\\d+) kB`, 'm'));
+      return match ? Number(match[1]) * 1024 : 0;
+    };
+    snapshot.rssAnon = field('RssAnon');
+    snapshot.rssFile = field('RssFile') + field('RssShmem');
+  } catch (error) {
+    // Not Linux: only total RSS is available
+  }
+  return snapshot;
+};
+
+// =============================================================================
+// WORKER: serve searches against the shared index
+// =============================================================================
+const runWorker = () => {
+  const store = new VectorStore({
+    indexPath: process.env.BENCH_INDEX,
+    precision: process.env.BENCH_PRECISION,
+    mapIndex: process.env.BENCH_MAP === 'true',
+    rescoreFactor: 1
+  });
+  store.load();
+
+  const gaussian = makeGaussian(makeRandom(cluster.worker.id));
+  const queries = Array.from({ length: 64 }, () => Array.from({ length: DIMENSION }, gaussian));
+  let next = 0;
+
+  const server = http.createServer((req, res) => {
+    const results = store.search(queries[next++ % queries.length], TOP_K, -1);
+    res.setHeader('Content-Type', 'application/json');
+    res.end(JSON.stringify(results.map(r => r.id)));
+  });
+  server.keepAliveTimeout = 60000;
+  server.listen(Number(process.env.BENCH_PORT));
+
+  process.on('message', (message) => {
+    if (message === 'memory') {
+      process.send({ type: 'memory', memory: memorySnapshot(), paged: store.paged });
+    }
+  });
+};
+
+// =============================================================================
+// PRIMARY: build index, fork workers, drive load
+// =============================================================================
+const buildIndex = (dir, count, precision) => {
+  const random = makeRandom(42);
+  const gaussian = makeGaussian(random);
+  const centers = Array.from({ length: 64 }, () => Array.from({ length: DIMENSION }, gaussian));
+
+  const store = new VectorStore({ precision, indexPath: path.join(dir, 'vector_index.json'), mapIndex: false });
+  store.initialize(DIMENSION);
+  store.addVectors(Array.from({ length: count }, (_, i) => {
+    const center = centers[Math.floor(random() * centers.length)];
+    return { id: `v${i}`, embedding: center.map(x => x + 0.6 * gaussian()), metadata: { chunkId: `v${i}` } };
+  }));
+  store.quantize();
+  store.save();
+  return store.indexPath;
+};
+
+const waitForListening = (workerCount) => new Promise((resolve) => {
+  let listening = 0;
+  const onListening = () => {
+    if (++listening === workerCount) {
+      cluster.off('listening', onListening);
+      resolve();
+    }
+  };
+  cluster.on('listening', onListening);
+});
+
+const drive = (port, connections, durationMs) => new Promise((resolve) => {
+  const agent = new http.Agent({ keepAlive: true, maxSockets: connections });
+  const latencies = [];
+  const deadline = Date.now() + durationMs;
+  let active = connections;
+
+  const loop = () => {
+    if (Date.now() >= deadline) {
+      if (--active === 0) {
+        agent.destroy();
+        resolve(latencies);
+      }
+      return;
+    }
+    const start = process.hrtime.bigint();
+    http.get({ port, path: '/search', agent }, (res) => {
+      res.resume();
+      res.on('end', () => {
+        latencies.push(Number(process.hrtime.bigint() - start) / 1e6);
+        loop();
+      });
+    }).on('error', loop);
+  };
+
+  for (let i = 0; i < connections; i++) {
+    loop();
+  }
+});
+
+const collectMemory = () => Promise.all(Object.values(cluster.workers).map(worker => new Promise((resolve) => {
+  worker.once('message', (message) => resolve(message));
+  worker.send('memory');
+})));
+
+const stopWorkers = () => Promise.all(Object.values(cluster.workers).map(worker => new Promise((resolve) => {
+  worker.once('exit', resolve);
+  worker.kill();
+})));
+
+const percentile = (sorted, p) => sorted[Math.min(sorted.length - 1, Math.ceil(p * sorted.length) - 1)];
+const mb = (bytes) => (bytes / (1024 * 1024)).toFixed(1);
+
+const runPrimary = async () => {
+  const cpus = os.availableParallelism?.() || os.cpus().length;
+  const workerCounts = option('workers', [...new Set([1, 2, 4, cpus])].filter(n => n <= cpus).join(','))
+    .split(',').map(Number).filter(Boolean);
+  const vectors = Number(option('vectors', 20000));
+  const precision = option('precision', 'float32');
+  const connections = Number(option('connections', 32));
+  const durationMs = Number(option('duration', 10)) * 1000;
+  const map = !args.includes('--no-map');
+  const port = 3900;
+
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'cluster-bench-'));
+  console.log(`🧪 Building ${vectors} x ${DIMENSION} ${precision} index in ${dir}`);
+  const indexPath = buildIndex(dir, vectors, precision);
+
+  const rows = [];
+  for (const workerCount of workerCounts) {
+    for (let i = 0; i < workerCount; i++) {
+      cluster.fork({ BENCH_INDEX: indexPath, BENCH_PRECISION: precision, BENCH_MAP: String(map), BENCH_PORT: String(port) });
+    }
+    await waitForListening(workerCount);
+    await drive(port, connections, 1000);   // Warm-up
+
+    const latencies = (await drive(port, connections, durationMs)).sort((a, b) => a - b);
+    const memory = await collectMemory();
+    await stopWorkers();
+
+    const sum = (field) => memory.reduce((total, m) => total + m.memory[field], 0);
+    rows.push({
+      workers: workerCount,
+      paged: memory.every(m => m.paged),
+      reqPerSec: (latencies.length / (durationMs / 1000)).toFixed(0),
+      p50Ms: percentile(latencies, 0.5).toFixed(2),
+      p95Ms: percentile(latencies, 0.95).toFixed(2),
+      rssMB: mb(sum('rss')),
+      privateMB: mb(sum('rssAnon')),
+      fileBackedMB: mb(sum('rssFile')),
+      heapMB: mb(sum('heapUsed'))
+    });
+    console.log(`✅ ${workerCount} workers: ${rows[rows.length - 1].reqPerSec} req/s`);
+  }
+
+  fs.rmSync(dir, { recursive: true, force: true });
+
+  console.log(`\n${cpus} CPUs, ${connections} connections, ${durationMs / 1000}s per run (load generator shares the CPUs)`);
+  console.log('privateMB = anonymous RSS summed over workers; a paged index lives in the page cache, outside RSS\n');
+  console.table(rows);
+};
+
+if (cluster.isPrimary) {
+  runPrimary().catch((error) => {
+    console.error('❌ Benchmark failed:', error);
+    process.exit(1);
+  });
+} else {
+  runWorker();
+}
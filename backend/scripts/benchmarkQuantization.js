@@ -0,0 +1,134 @@
+/**
+ * Quantization Benchmark
+ * Compares float16 / int8 vector storage against the float32 baseline:
+ * embedding memory, search latency and recall@k with and without
+ * full-precision rescoring
+ *
+ * Usage: node scripts/benchmarkQuantization.js [--synthetic 20000] [--queries 200] [--top-k 5]
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { VectorStore } = require('../src/services/vectorStore.service');
+
+const args = process.argv.slice(2);
+const option = (name, fallback) => {
+  const index = args.indexOf(`--${name}`);
+  return index !== -1 ? Number(args[index + 1]) : fallback;
+};
+
+const SYNTHETIC = option('synthetic', 0);
+const QUERY_COUNT = option('queries', 200);
+const TOP_K = option('top-k', 5);
+const DIMENSION = 768;
+
+/**
+ * Deterministic pseudo-random numbers (mulberry32)
+ */
+const random = (() => {
+  let seed = 42;
+  return () => {
+    seed = (seed + 0x6d2b79f5) | 0;
+    let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+})();
+const gaussian = () => Math.sqrt(-2 * Math.log(random() || 1e-12)) * Math.cos(2 * Math.PI * random());
+
+/**
+ * Load full-precision embeddings from the float64 index, or generate clustered synthetic ones
+ * @returns {number[][]}
+ */
+const loadEmbeddings = () => {
+  const indexPath = path.join(__dirname, '../data/vector_index.json');
+  if (!SYNTHETIC && fs.existsSync(indexPath)) {
+    const data = JSON.parse(fs.readFileSync(indexPath, 'utf-8'));
+    if ((data.precision || 'float64') === 'float64') {
+      console.log(`📂 Using ${data.vectors.length} embeddings from ${indexPath}`);
+      return data.vectors.map(v => v.embedding);
+    }
+    console.log('⚠️ Stored index is quantized; falling back to synthetic embeddings');
+  }
+
+  const count = SYNTHETIC || 20000;
+  const centers = Array.from({ length: 64 }, () => Array.from({ length: DIMENSION }, gaussian));
+  console.log(`🧪 Generating ${count} synthetic ${DIMENSION}-dim embeddings`);
+  return Array.from({ length: count }, () => {
+    const center = centers[Math.floor(random() * centers.length)];
+    return center.map(x => x + 0.6 * gaussian());
+  });
+};
+
+const buildStore = (embeddings, precision, int8Scale, rescoreFactor, dir) => {
+  const store = new VectorStore({
+    precision,
+    int8Scale,
+    rescoreFactor,
+    indexPath: path.join(dir, `index-${precision}-${int8Scale}-${rescoreFactor}.json`)
+  });
+  store.initialize(embeddings[0].length);
+  store.addVectors(embeddings.map((embedding, i) => ({ id: `v${i}`, embedding, metadata: {} })));
+  store.quantize();
+  store.save();
+  return store;
+};
+
+const run = () => {
+  const embeddings = loadEmbeddings();
+  const queries = Array.from({ length: QUERY_COUNT }, () => {
+    const base = embeddings[Math.floor(random() * embeddings.length)];
+    return base.map(x => x + 0.3 * gaussian());
+  });
+
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'quant-bench-'));
+  const log = console.log;
+  console.log = () => {};   // Silence per-store build logs
+
+  const baseline = buildStore(embeddings, 'float32', 'vector', 1, dir);
+  const truth = queries.map(q => new Set(baseline.search(q, TOP_K, -1).map(r => r.id)));
+
+  const configs = [
+    ['float32', 'vector', 1],
+    ['float16', 'vector', 1],
+    ['float16', 'vector', 4],
+    ['int8', 'vector', 1],
+    ['int8', 'vector', 4],
+    ['int8', 'dimension', 1],
+    ['int8', 'dimension', 4]
+  ];
+
+  const rows = configs.map(([precision, int8Scale, rescoreFactor]) => {
+    const store = precision === 'float32' ? baseline : buildStore(embeddings, precision, int8Scale, rescoreFactor, dir);
+
+    const start = process.hrtime.bigint();
+    let hits = 0;
+    queries.forEach((q, i) => {
+      for (const r of store.search(q, TOP_K, -1)) {
+        if (truth[i].has(r.id)) {
+          hits++;
+        }
+      }
+    });
+    const elapsedMs = Number(process.hrtime.bigint() - start) / 1e6;
+
+    return {
+      precision: precision === 'int8' ? `int8/${int8Scale}` : precision,
+      rescore: rescoreFactor > 1 ? `x${rescoreFactor}` : 'off',
+      embeddingMB: (store.embeddingBytes() / 1048576).toFixed(2),
+      vsFloat32: `${((store.embeddingBytes() / baseline.embeddingBytes()) * 100).toFixed(0)}%`,
+      [`recall@${TOP_K}`]: (hits / (queries.length * TOP_K)).toFixed(4),
+      searchMs: (elapsedMs / queries.length).toFixed(3)
+    };
+  });
+
+  console.log = log;
+  fs.rmSync(dir, { recursive: true, force: true });
+
+  console.log(`\n📊 ${embeddings.length} vectors x ${embeddings[0].length} dims, ${queries.length} queries`);
+  console.log(`   float64 JS arrays (current default): ~${((embeddings.length * embeddings[0].length * 8) / 1048576).toFixed(2)} MB of embedding data\n`);
+  console.table(rows);
+};
+
+run();
@@ -0,0 +1,150 @@
+/**
+ * Sharded Search Benchmark
+ * Measures exact-search latency, throughput and event-loop responsiveness
+ * against the number of worker-thread shards. Shard count 1 is the
+ * single-threaded baseline (searches run on the event loop). Every sharded
+ * run is checked against the baseline's results.
+ *
+ * Usage: node scripts/benchmarkShardedSearch.js [--shards 1,2,4] [--vectors 20000]
+ *        [--precision float32] [--concurrency 8] [--duration 5]
+ */
+
+const os = require('os');
+const { monitorEventLoopDelay } = require('perf_hooks');
+const { VectorStore } = require('../src/services/vectorStore.service');
+
+const DIMENSION = 768;
+const TOP_K = 5;
+const QUERY_COUNT = 64;
+
+const args = process.argv.slice(2);
+const option = (name, fallback) => {
+  const index = args.indexOf(`--${name}`);
+  return index !== -1 ? args[index + 1] : fallback;
+};
+
+/**
+ * Deterministic pseudo-random numbers (mulberry32)
+ */
+const makeRandom = (seed) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+const makeGaussian = (random) => () =>
+  Math.sqrt(-2 * Math.log(random() || 1e-12)) * Math.cos(2 * Math.PI * random());
+
+/**
+ * Clustered synthetic embeddings, so top-k neighbours are meaningful
+ */
+const makeData = (count) => {
+  const random = makeRandom(42);
+  const gaussian = makeGaussian(random);
+  const centers = Array.from({ length: 64 }, () => Float32Array.from({ length: DIMENSION }, gaussian));
+  const noisy = (center) => center.map(x => x + 0.6 * gaussian());
+
+  const items = Array.from({ length: count }, (_, i) => ({
+    id: `v${i}`,
+    embedding: noisy(centers[Math.floor(random() * centers.length)]),
+    metadata: { chunkId: `v${i}` }
+  }));
+  const queries = Array.from({ length: QUERY_COUNT }, () =>
+    Array.from(noisy(centers[Math.floor(random() * centers.length)])));
+  return { items, queries };
+};
+
+const buildStore = (items, precision, searchShards) => {
+  const store = new VectorStore({ precision, searchShards, rescoreFactor: 1, mapIndex: false });
+  store.initialize(DIMENSION);
+  store.addVectors(items);
+  store.quantize();
+  return store;
+};
+
+const percentile = (sorted, p) => sorted[Math.min(sorted.length - 1, Math.ceil(p * sorted.length) - 1)];
+
+/**
+ * Keep `concurrency` searches in flight for durationMs
+ * @returns {Promise<number[]>} - Per-search latencies in ms
+ */
+const drive = async (store, queries, concurrency, durationMs) => {
+  const latencies = [];
+  const deadline = Date.now() + durationMs;
+  let next = 0;
+
+  const loop = async () => {
+    while (Date.now() < deadline) {
+      const start = process.hrtime.bigint();
+      await store.searchAsync(queries[next++ % queries.length], TOP_K, -1);
+      latencies.push(Number(process.hrtime.bigint() - start) / 1e6);
+      // Let timers run between searches, as a server would between requests
+      await new Promise(resolve => setImmediate(resolve));
+    }
+  };
+  await Promise.all(Array.from({ length: concurrency }, loop));
+  return latencies;
+};
+
+const run = async () => {
+  const cpus = os.availableParallelism?.() || os.cpus().length;
+  const shardCounts = option('shards', [...new Set([1, 2, 4, cpus])].filter(n => n <= cpus).join(','))
+    .split(',').map(Number).filter(Boolean);
+  const vectors = Number(option('vectors', 20000));
+  const precision = option('precision', 'float32');
+  const concurrency = Number(option('concurrency', 8));
+  const durationMs = Number(option('duration', 5)) * 1000;
+
+  console.log(`🧪 Building ${vectors} x ${DIMENSION} ${precision} vectors`);
+  const { items, queries } = makeData(vectors);
+  const baseline = buildStore(items, precision, 0);
+  const expected = queries.map(q => baseline.search(q, TOP_K, -1).map(r => r.id).join(','));
+  baseline.clear();
+
+  const rows = [];
+  for (const shards of shardCounts) {
+    const store = buildStore(items, precision, shards);
+
+    // Correctness and warm-up (spawns the shard threads)
+    const results = await store.searchBatchAsync(queries, TOP_K, -1);
+    const matches = results.filter((hits, q) => hits.map(r => r.id).join(',') === expected[q]).length;
+
+    // Sequential latency of one search
+    const single = [];
+    for (const q of queries) {
+      const start = process.hrtime.bigint();
+      await store.searchAsync(q, TOP_K, -1);
+      single.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+    single.sort((a, b) => a - b);
+
+    // Throughput under concurrent searches, watching event-loop delay
+    const histogram = monitorEventLoopDelay({ resolution: 10 });
+    histogram.enable();
+    const latencies = (await drive(store, queries, concurrency, durationMs)).sort((a, b) => a - b);
+    histogram.disable();
+
+    rows.push({
+      shards,
+      matchesBaseline: `${matches}/${queries.length}`,
+      singleP50Ms: percentile(single, 0.5).toFixed(2),
+      searchesPerSec: (latencies.length / (durationMs / 1000)).toFixed(0),
+      p50Ms: percentile(latencies, 0.5).toFixed(2),
+      p95Ms: percentile(latencies, 0.95).toFixed(2),
+      loopDelayP99Ms: (histogram.percentile(99) / 1e6).toFixed(1),
+      loopDelayMaxMs: (histogram.max / 1e6).toFixed(1)
+    });
+    console.log(`✅ ${shards} shard(s): ${rows[rows.length - 1].searchesPerSec} searches/s`);
+    store.clear();
+  }
+
+  console.log(`\n${cpus} CPUs, ${concurrency} concurrent searches, ${durationMs / 1000}s per run`);
+  console.log('shards = 1 searches on the main thread; loopDelay is how long timers waited behind searches\n');
+  console.table(rows);
+};
+
+run().catch((error) => {
+  console.error('❌ Benchmark failed:', error);
+  process.exit(1);
+});
@@ -8,7 +8,7 @@
 const path = require('path');
 require('dotenv').config({ path: path.join(__dirname, '../.env') });
 
-const { initializeRAG, getRAGStatus, loadKnowledgeBase } = require('../src/services/rag.service');
+const { initializeRAG, getRAGStatus, loadKnowledgeBase, reloadIndex } = require('../src/services/rag.service');
 
 const main = async () => {
   console.log('╔════════════════════════════════════════════════════════════╗');
@@ -41,7 +41,15 @@ const main = async () => {
 
     // Initialize RAG pipeline
     console.log('🚀 Initializing RAG Pipeline...\n');
-    const stats = await initializeRAG();
+    let stats = await initializeRAG({ rebuildStale: false });
+    if (stats.stale) {
+      console.log('🔄 Index is out of date with the knowledge base, rebuilding...');
+      const result = await reloadIndex('init-rag');
+      if (result.status !== 'succeeded') {
+        throw new Error(result.error);
+      }
+      stats = getRAGStatus();
+    }
     
     console.log('\n╔════════════════════════════════════════════════════════════╗');
     console.log('║                  ✅ Initialization Complete                 ║');
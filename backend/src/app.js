@@ -1,10 +1,23 @@
+const cluster = require('cluster');
+const crypto = require('crypto');
 const express = require('express');
 const cors = require('cors');
 const path = require('path');
 require('dotenv').config({ path: path.join(__dirname, '..', '.env') });
 
 const connectDB = require('./config/db.config');
-const { initializeRAG, getRAGStatus } = require('./services/rag.service');
+const config = require('./config');
+const {
+  initializeRAG,
+  getRAGStatus,
+  getChunkDetail,
+  getActiveStore,
+  reloadIndex,
+  loadSavedIndex,
+  watchKnowledgeBase
+} = require('./services/rag.service');
+const { metrics } = require('./services/metrics.service');
+const { ensureCounters } = require('./services/stats.service');
 
 // Import routes
 const askRoutes = require('./routes/ask.routes');
@@ -13,8 +26,8 @@ const feedbackRoutes = require('./routes/feedback.routes');
 const app = express();
 const PORT = process.env.PORT || 3000;
 
-// Connect to MongoDB
-connectDB();
+// Connect to MongoDB, then seed the stats counters on first run
+connectDB().then(ensureCounters);
 
 // Initialize RAG pipeline on startup
 const initRAG = async () => {
@@ -27,11 +40,54 @@ const initRAG = async () => {
     console.log('   Run "npm run init-rag" to build the vector index');
   }
 };
-initRAG();
+initRAG().then(() => {
+  // In cluster mode the primary watches and rebuilds; workers only swap in the result
+  if (config.RAG.WATCH_KNOWLEDGE_BASE && !cluster.isWorker) {
+    watchKnowledgeBase();
+  }
+});
+
+if (cluster.isWorker) {
+  process.on('message', (message) => {
+    if (message && message.type === 'rag:reload') {
+      loadSavedIndex(message.reason);
+    }
+  });
+}
+
+let rebuildRequests = 0;
+
+/**
+ * Ask the cluster primary to rebuild the index
+ * @param {string} reason - Why the rebuild was requested
+ * @returns {Promise<boolean>} - False when a rebuild was already running
+ */
+const requestClusterRebuild = (reason) => new Promise((resolve) => {
+  const id = `${process.pid}-${++rebuildRequests}`;
+  const onMessage = (message) => {
+    if (message && message.type === 'rag:rebuild:ack' && message.id === id) {
+      process.off('message', onMessage);
+      resolve(message.started);
+    }
+  };
+  process.on('message', onMessage);
+  process.send({ type: 'rag:rebuild', reason, id });
+});
+
+/**
+ * Compare an admin token in constant time
+ * Both sides are hashed first, so their lengths always match.
+ * @param {string} provided - Token sent by the client
+ * @returns {boolean}
+ */
+const isAdminToken = (provided) => {
+  const digest = (value) => crypto.createHash('sha256').update(String(value)).digest();
+  return crypto.timingSafeEqual(digest(provided || ''), digest(config.RAG.ADMIN_TOKEN));
+};
 
 // Middleware
 app.use(cors());
-app.use(express.json());
+app.use(express.json({ limit: '1mb' }));  // Batch requests carry up to 100 queries
 app.use(express.urlencoded({ extended: true }));
 
 // API Routes
@@ -46,10 +102,14 @@ app.get('/', (req, res) => {
     version: '1.0.0',
     endpoints: {
       ask: 'POST /api/ask',
+      askBatch: 'POST /api/ask/batch',
       askHistory: 'GET /api/ask/history',
       feedback: 'POST /api/feedback',
       feedbackStats: 'GET /api/feedback/stats',
       ragStatus: 'GET /api/rag/status',
+      ragChunk: 'GET /api/rag/chunks/:chunkId',
+      ragReload: 'POST /api/rag/reload',
+      metrics: 'GET /metrics',
       health: 'GET /health'
     }
   });
@@ -64,6 +124,80 @@ app.get('/api/rag/status', (req, res) => {
   });
 });
 
+// Chunk detail for the compact source references in /api/ask responses
+// The ETag hashes the detail itself, so it survives index rebuilds that leave the chunk unchanged
+app.get('/api/rag/chunks/:chunkId', (req, res) => {
+  const detail = getChunkDetail(req.params.chunkId);
+  if (!detail) {
+    return res.status(404).json({
+      success: false,
+      error: 'Chunk not found in the current index'
+    });
+  }
+
+  const body = { success: true, data: detail };
+  const etag = `"${crypto.createHash('sha1').update(JSON.stringify(body)).digest('base64url').slice(0, 22)}"`;
+  res.set({
+    ETag: etag,
+    'Cache-Control': `public, max-age=${config.RAG.CHUNK_CACHE_MAX_AGE}`
+  });
+  // Express answers 304 Not Modified when If-None-Match matches the ETag
+  res.json(body);
+});
+
+// Rebuild the knowledge base index in the background and hot-swap it
+// Disabled unless RAG_ADMIN_TOKEN is set: a rebuild re-embeds the whole knowledge base
+app.post('/api/rag/reload', async (req, res) => {
+  if (!config.RAG.ADMIN_TOKEN) {
+    return res.status(403).json({
+      success: false,
+      error: 'Index reload is disabled; set RAG_ADMIN_TOKEN to enable it'
+    });
+  }
+  if (!isAdminToken(req.get('X-Admin-Token'))) {
+    return res.status(403).json({
+      success: false,
+      error: 'Invalid admin token'
+    });
+  }
+
+  let started;
+  if (cluster.isWorker) {
+    // The primary rebuilds once and tells every worker to swap
+    started = await requestClusterRebuild('admin request');
+  } else {
+    started = !getRAGStatus().index.reloading;
+    if (started) {
+      reloadIndex('admin request');
+    }
+  }
+
+  if (!started) {
+    return res.status(409).json({
+      success: false,
+      error: 'An index reload is already running; poll /api/rag/status for its result',
+      data: getRAGStatus().index
+    });
+  }
+
+  res.status(202).json({
+    success: true,
+    message: 'Index reload started; poll /api/rag/status for the new version',
+    data: getRAGStatus().index
+  });
+});
+
+// Process and index gauges
+metrics.gauge('rag_vector_count', 'Vectors loaded in the in-memory vector store', () => getActiveStore().vectors.length);
+metrics.gauge('process_resident_memory_bytes', 'Resident set size in bytes', () => process.memoryUsage().rss);
+metrics.gauge('nodejs_heap_used_bytes', 'V8 heap used in bytes', () => process.memoryUsage().heapUsed);
+
+// Prometheus metrics endpoint
+app.get('/metrics', (req, res) => {
+  res.set('Content-Type', 'text/plain; version=0.0.4; charset=utf-8');
+  res.send(metrics.render());
+});
+
 // Health check endpoint
 app.get('/health', (req, res) => {
   const ragStatus = getRAGStatus();
@@ -0,0 +1,152 @@
+/**
+ * Cluster entry point
+ * The primary builds (or loads) the vector index once, then forks N workers
+ * that all listen on the same port. Workers page the quantized vector block
+ * and chunk metadata from disk (RAG_MAP_INDEX), so they exist once in the
+ * page cache instead of once per worker heap.
+ *
+ * OLLAMA_MAX_CONCURRENT and OLLAMA_MAX_QUEUE are cluster-wide budgets: each
+ * worker's generation scheduler gets an equal share. /metrics is served by
+ * whichever worker takes the request and reports that worker only.
+ *
+ * Usage: CLUSTER_WORKERS=4 npm run start:cluster
+ */
+
+const cluster = require('cluster');
+const os = require('os');
+const path = require('path');
+require('dotenv').config({ path: path.join(__dirname, '..', '.env') });
+
+// Only quantized indexes have a block workers can share; float64 keeps
+// embeddings inside the JSON, so every worker would hold its own copy
+if (process.env.RAG_VECTOR_PRECISION === 'float64') {
+  console.error('❌ Cluster mode cannot share a float64 index between workers; ' +
+    'set RAG_VECTOR_PRECISION to float32, float16 or int8 (or run npm start)');
+  process.exit(1);
+}
+const defaultPrecision = !process.env.RAG_VECTOR_PRECISION;
+if (defaultPrecision) {
+  process.env.RAG_VECTOR_PRECISION = 'float32';
+}
+process.env.RAG_MAP_INDEX = process.env.RAG_MAP_INDEX || 'true';
+
+const config = require('./config');
+
+const RESTART_DELAY_MS = 1000;
+
+/**
+ * Split a cluster-wide limit evenly across workers, at least 1 each
+ * @param {number} total - Cluster-wide limit
+ * @param {number} workerCount - Number of workers
+ * @returns {number}
+ */
+const perWorker = (total, workerCount) => Math.max(1, Math.floor(total / workerCount));
+
+const startPrimary = async () => {
+  const workerCount = config.CLUSTER.WORKERS || os.availableParallelism?.() || os.cpus().length;
+  console.log(`🧭 Cluster primary ${process.pid} starting ${workerCount} workers (${config.RAG.VECTOR_PRECISION} vectors)`);
+  if (defaultPrecision) {
+    console.log('🗜️ RAG_VECTOR_PRECISION is not set; cluster mode uses float32 (a float64 index on disk is converted once)');
+  }
+  if (!config.RAG.MAP_INDEX) {
+    console.warn('⚠️ RAG_MAP_INDEX=false: every worker reads its own copy of the vector block and chunk metadata');
+  }
+
+  // Each worker runs its own generation scheduler; give each a share of the
+  // configured limits so the cluster as a whole stays within them
+  const generation = {
+    OLLAMA_MAX_CONCURRENT: perWorker(config.GENERATION.MAX_CONCURRENT, workerCount),
+    OLLAMA_MAX_QUEUE: perWorker(config.GENERATION.MAX_QUEUE, workerCount)
+  };
+  if (generation.OLLAMA_MAX_CONCURRENT * workerCount > config.GENERATION.MAX_CONCURRENT) {
+    console.warn(`⚠️ ${workerCount} workers exceed OLLAMA_MAX_CONCURRENT=${config.GENERATION.MAX_CONCURRENT}; ` +
+      `up to ${workerCount} generations can reach Ollama at once`);
+  }
+  console.log(`🚦 Per worker: ${generation.OLLAMA_MAX_CONCURRENT} concurrent generations, ${generation.OLLAMA_MAX_QUEUE} queued`);
+
+  // Build or convert the index before forking so workers only ever load it
+  const { initializeRAG, getActiveStore, reloadIndex, watchKnowledgeBase } = require('./services/rag.service');
+  let stale = false;
+  try {
+    ({ stale } = await initializeRAG({ rebuildStale: false }));
+  } catch (error) {
+    console.warn('⚠️ RAG initialization warning:', error.message);
+  }
+  getActiveStore().clear();   // The primary does not serve requests
+
+  let shuttingDown = false;
+
+  // Rebuild once here, then have every worker swap in the saved index.
+  // Triggers that arrive while a rebuild runs are dropped (returns false)
+  let rebuilding = null;
+  const rebuild = (reason) => {
+    if (rebuilding) {
+      return false;
+    }
+    rebuilding = (async () => {
+      const result = await reloadIndex(reason);
+      if (result.status === 'succeeded') {
+        getActiveStore().clear();
+        for (const worker of Object.values(cluster.workers)) {
+          worker.send({ type: 'rag:reload', reason });
+        }
+      }
+    })().finally(() => {
+      rebuilding = null;
+    });
+    return true;
+  };
+
+  cluster.on('message', (worker, message) => {
+    if (message && message.type === 'rag:rebuild') {
+      const started = rebuild(message.reason);
+      worker.send({ type: 'rag:rebuild:ack', id: message.id, started });
+    }
+  });
+
+  if (config.RAG.WATCH_KNOWLEDGE_BASE) {
+    watchKnowledgeBase(() => rebuild('knowledge base changed'));
+  }
+
+  const fork = () => {
+    const worker = cluster.fork({
+      OLLAMA_MAX_CONCURRENT: String(generation.OLLAMA_MAX_CONCURRENT),
+      OLLAMA_MAX_QUEUE: String(generation.OLLAMA_MAX_QUEUE)
+    });
+    worker.on('online', () => console.log(`👷 Worker ${worker.process.pid} online`));
+  };
+
+  cluster.on('exit', (worker, code, signal) => {
+    if (shuttingDown) {
+      return;
+    }
+    console.warn(`⚠️ Worker ${worker.process.pid} exited (${signal || code}); restarting`);
+    setTimeout(fork, RESTART_DELAY_MS);
+  });
+
+  const shutdown = (signal) => {
+    shuttingDown = true;
+    console.log(`🛑 ${signal} received, stopping workers`);
+    for (const worker of Object.values(cluster.workers)) {
+      worker.process.kill(signal);
+    }
+    process.exit(0);
+  };
+  process.on('SIGINT', () => shutdown('SIGINT'));
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+
+  for (let i = 0; i < workerCount; i++) {
+    fork();
+  }
+
+  // Workers serve the stale index until the rebuilt one is ready
+  if (stale) {
+    rebuild('knowledge base changed while stopped');
+  }
+};
+
+if (cluster.isPrimary) {
+  startPrimary();
+} else {
+  require('./app');
+}
@@ -15,7 +15,61 @@ module.exports = {
   // RAG configuration
   RAG: {
     TOP_K_CHUNKS: 5,
-    SIMILARITY_THRESHOLD: 0.3  // Lowered for better recall
+    SIMILARITY_THRESHOLD: 0.3,  // Lowered for better recall
+    // Embedding storage: float64 (plain arrays), float32, float16 or int8
+    VECTOR_PRECISION: process.env.RAG_VECTOR_PRECISION || 'float64',
+    // int8 scales: one per vector ('vector') or one per dimension ('dimension')
+    INT8_SCALE: process.env.RAG_INT8_SCALE || 'vector',
+    // Quantized searches rescore topK * RESCORE_FACTOR candidates at full precision (1 = off)
+    RESCORE_FACTOR: parseInt(process.env.RAG_RESCORE_FACTOR) || 4,
+    // Directory of chunk shards written by rag/tools/ingest.py (optional)
+    CHUNK_SHARDS_DIR: process.env.RAG_CHUNK_SHARDS_DIR || '',
+    // Memory-map the binary vector block read-only instead of reading it into the heap
+    MAP_INDEX: process.env.RAG_MAP_INDEX === 'true',
+    // Cache-Control max-age (seconds) of GET /api/rag/chunks/:chunkId
+    CHUNK_CACHE_MAX_AGE: parseInt(process.env.RAG_CHUNK_CACHE_MAX_AGE) || 300,
+    // Collapse near-duplicate chunks (MinHash/LSH) at index time (opt-in: changes the index)
+    DEDUP: process.env.RAG_DEDUP === 'true',
+    DEDUP_THRESHOLD: parseFloat(process.env.RAG_DEDUP_THRESHOLD) || 0.85,   // Jaccard similarity of word shingles
+    // Split exact search across this many worker-thread shards (0 or 1 = search on the main thread)
+    SEARCH_SHARDS: parseInt(process.env.RAG_SEARCH_SHARDS) || 0,
+    // Rebuild and hot-swap the index when the knowledge base file changes
+    WATCH_KNOWLEDGE_BASE: process.env.RAG_WATCH_KNOWLEDGE_BASE === 'true',
+    // Required in the X-Admin-Token header of POST /api/rag/reload when set
+    ADMIN_TOKEN: process.env.RAG_ADMIN_TOKEN || ''
+  },
+  
+  // Cluster mode (src/cluster.js): worker processes sharing one port
+  CLUSTER: {
+    WORKERS: parseInt(process.env.CLUSTER_WORKERS) || 0   // 0 = one per CPU
+  },
+  
+  // Admission control for Ollama generation
+  GENERATION: {
+    MAX_CONCURRENT: parseInt(process.env.OLLAMA_MAX_CONCURRENT) || 2,
+    MAX_QUEUE: parseInt(process.env.OLLAMA_MAX_QUEUE) || 32,
+    MAX_WAIT_MS: (parseInt(process.env.OLLAMA_MAX_QUEUE_WAIT_SECONDS) || 60) * 1000   // Queued longer than this -> 429
+  },
+  
+  // Coalesce identical concurrent /api/ask requests onto one computation
+  COALESCING: {
+    ENABLED: process.env.RAG_COALESCING !== 'false'
+  },
+  
+  // Multi-turn conversations (Ollama context reuse)
+  CONVERSATION: {
+    MAX_TURNS: parseInt(process.env.CONVERSATION_MAX_TURNS) || 6,      // Turns per cached context before summarizing
+    RECENT_TURNS: 2,                                                   // Turns kept verbatim after summarizing
+    IDLE_TTL_MINUTES: parseInt(process.env.CONVERSATION_IDLE_TTL_MINUTES) || 30,
+    MAX_CONVERSATIONS: parseInt(process.env.CONVERSATION_MAX_ACTIVE) || 1000,
+    KEEP_ALIVE: process.env.OLLAMA_KEEP_ALIVE || '30m'                 // Keep the model (and its cache) loaded
+  },
+  
+  // Batch question API configuration
+  BATCH: {
+    MAX_QUERIES: 100,
+    GENERATION_CONCURRENCY: 2,
+    MAX_CONCURRENCY: 8
   },
   
   // Safety configuration
@@ -1,4 +1,5 @@
 const askService = require('../services/ask.service');
+const config = require('../config');
 
 /**
  * Handle yoga question
@@ -6,7 +7,7 @@ const askService = require('../services/ask.service');
  */
 const askQuestion = async (req, res, next) => {
   try {
-    const { query, sessionId } = req.body;
+    const { query, sessionId, conversationId } = req.body;
 
     if (!query || typeof query !== 'string' || query.trim().length === 0) {
       return res.status(400).json({
@@ -22,28 +23,163 @@ const askQuestion = async (req, res, next) => {
       });
     }
 
-    const result = await askService.processQuery(query.trim(), sessionId);
+    // sessionId ends up in QueryLog filters when a conversation is restored
+    if (sessionId !== undefined && sessionId !== null && typeof sessionId !== 'string') {
+      return res.status(400).json({
+        success: false,
+        error: 'sessionId must be a string'
+      });
+    }
+
+    if (conversationId !== undefined && conversationId !== null &&
+        (typeof conversationId !== 'string' || conversationId.length === 0 || conversationId.length > 100)) {
+      return res.status(400).json({
+        success: false,
+        error: 'conversationId must be a non-empty string of at most 100 characters'
+      });
+    }
+
+    // Leave the generation queue if the client goes away while waiting
+    const abort = new AbortController();
+    res.on('close', () => {
+      if (!res.writableEnded) {
+        abort.abort();
+      }
+    });
+
+    const result = await askService.processQuery(query.trim(), sessionId, { conversationId, signal: abort.signal });
     
     res.json(result);
   } catch (error) {
+    if (error.name === 'AbortError') {
+      return;
+    }
+    if (error.statusCode === 429) {
+      res.set('Retry-After', String(error.retryAfter));
+      return res.status(429).json({
+        success: false,
+        error: error.message,
+        retryAfter: error.retryAfter,
+        queueDepth: error.queueDepth
+      });
+    }
     next(error);
   }
 };
 
 /**
- * Get query history
- * GET /api/ask/history
+ * Handle a batch of yoga questions
+ * POST /api/ask/batch
+ * Streams one NDJSON line per item as it completes, then a summary line
+ */
+const askBatch = async (req, res) => {
+  const { queries, sessionId, mode = 'full', concurrency } = req.body;
+
+  if (!Array.isArray(queries) || queries.length === 0) {
+    return res.status(400).json({
+      success: false,
+      error: 'queries is required and must be a non-empty array of strings'
+    });
+  }
+
+  if (queries.length > config.BATCH.MAX_QUERIES) {
+    return res.status(400).json({
+      success: false,
+      error: `A batch may contain at most ${config.BATCH.MAX_QUERIES} queries`
+    });
+  }
+
+  const invalidIndex = queries.findIndex(q =>
+    typeof q !== 'string' || q.trim().length === 0 || q.length > 1000
+  );
+  if (invalidIndex !== -1) {
+    return res.status(400).json({
+      success: false,
+      error: `Query at index ${invalidIndex} must be a non-empty string of less than 1000 characters`
+    });
+  }
+
+  if (!['full', 'retrieval'].includes(mode)) {
+    return res.status(400).json({
+      success: false,
+      error: "mode must be 'full' or 'retrieval'"
+    });
+  }
+
+  const parallelism = Math.min(
+    Math.max(parseInt(concurrency) || config.BATCH.GENERATION_CONCURRENCY, 1),
+    config.BATCH.MAX_CONCURRENCY
+  );
+
+  // Stop starting new generations if the client goes away
+  const abort = new AbortController();
+  res.on('close', () => {
+    if (!res.writableEnded) {
+      abort.abort();
+    }
+  });
+
+  res.status(200);
+  res.set({
+    'Content-Type': 'application/x-ndjson; charset=utf-8',
+    'Cache-Control': 'no-cache'
+  });
+  res.flushHeaders();
+
+  const writeLine = (payload) => {
+    if (!res.writableEnded && !abort.signal.aborted) {
+      res.write(`${JSON.stringify(payload)}\n`);
+    }
+  };
+
+  try {
+    const summary = await askService.processBatch(
+      queries.map(q => q.trim()),
+      { sessionId, mode, concurrency: parallelism, signal: abort.signal },
+      (result) => writeLine({ type: 'result', ...result })
+    );
+    writeLine({ type: 'summary', ...summary });
+  } catch (error) {
+    console.error('Error processing batch:', error);
+    writeLine({ type: 'error', success: false, error: error.message });
+  }
+
+  res.end();
+};
+
+/**
+ * End a conversation and free its server-side state
+ * DELETE /api/ask/conversations/:conversationId?sessionId=
+ */
+const endConversation = (req, res) => {
+  const removed = askService.endConversation(req.query.sessionId, req.params.conversationId);
+  res.json({
+    success: true,
+    data: { removed }
+  });
+};
+
+/**
+ * Get query history (newest first, cursor paginated)
+ * GET /api/ask/history?sessionId=&limit=&cursor=
  */
 const getHistory = async (req, res, next) => {
   try {
-    const limit = parseInt(req.query.limit) || 50;
-    const history = await askService.getQueryHistory(limit);
+    const { sessionId, limit, cursor } = req.query;
+    const page = await askService.getQueryHistory({ sessionId, limit, cursor });
     
     res.json({
       success: true,
-      data: history
+      data: page.items,
+      nextCursor: page.nextCursor
     });
   } catch (error) {
+    if (error.statusCode === 400) {
+      return res.status(400).json({
+        success: false,
+        error: error.message
+      });
+    }
     next(error);
   }
 };
@@ -67,6 +203,8 @@ const getSafetyStats = async (req, res, next) => {
 
 module.exports = {
   askQuestion,
+  askBatch,
+  endConversation,
   getHistory,
   getSafetyStats
 };
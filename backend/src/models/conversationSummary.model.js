@@ -0,0 +1,39 @@
+const mongoose = require('mongoose');
+
+// Latest summary of a multi-turn conversation, so a worker that restores the
+// conversation from QueryLog also gets the context of turns older than its window
+const conversationSummarySchema = new mongoose.Schema({
+  // Session identifier ('' for anonymous conversations)
+  sessionId: {
+    type: String,
+    default: ''
+  },
+  
+  // Conversation identifier
+  conversationId: {
+    type: String,
+    required: true
+  },
+  
+  // Summary text
+  summary: {
+    type: String,
+    default: ''
+  },
+  
+  // Number of answered turns the summary covers (the first N of the conversation)
+  summarizedTurns: {
+    type: Number,
+    default: 0
+  },
+  
+  // Last update
+  updatedAt: {
+    type: Date,
+    default: Date.now
+  }
+}, { versionKey: false });
+
+conversationSummarySchema.index({ sessionId: 1, conversationId: 1 }, { unique: true });
+
+module.exports = mongoose.model('ConversationSummary', conversationSummarySchema);
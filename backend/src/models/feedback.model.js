@@ -39,5 +39,6 @@ const feedbackSchema = new mongoose.Schema({
 feedbackSchema.index({ queryLogId: 1 });
 feedbackSchema.index({ isHelpful: 1 });
 feedbackSchema.index({ createdAt: -1 });
+feedbackSchema.index({ sessionId: 1, createdAt: -1 });
 
 module.exports = mongoose.model('Feedback', feedbackSchema);
@@ -1,9 +1,13 @@
 const QueryLog = require('./queryLog.model');
 const Feedback = require('./feedback.model');
 const KnowledgeBase = require('./knowledgeBase.model');
+const StatsCounter = require('./statsCounter.model');
+const ConversationSummary = require('./conversationSummary.model');
 
 module.exports = {
   QueryLog,
   Feedback,
-  KnowledgeBase
+  KnowledgeBase,
+  StatsCounter,
+  ConversationSummary
 };
@@ -77,6 +77,12 @@ const queryLogSchema = new mongoose.Schema({
     default: ''
   },
   
+  // Conversation identifier within the session (multi-turn conversations)
+  conversationId: {
+    type: String,
+    default: null
+  },
+  
   // Timestamps
   createdAt: {
     type: Date,
@@ -85,7 +91,9 @@ const queryLogSchema = new mongoose.Schema({
 });
 
 // Indexes for faster queries
-queryLogSchema.index({ createdAt: -1 });
+queryLogSchema.index({ createdAt: -1, _id: -1 });               // Global history, cursor pagination
+queryLogSchema.index({ sessionId: 1, createdAt: -1, _id: -1 }); // Per-session history, cursor pagination
+queryLogSchema.index({ sessionId: 1, conversationId: 1, createdAt: -1 }); // Conversation rehydration
 queryLogSchema.index({ isUnsafe: 1 });
 queryLogSchema.index({ userQuery: 'text' });
 
@@ -0,0 +1,55 @@
+const mongoose = require('mongoose');
+
+// Incrementally maintained aggregate counters (one document per stats family)
+// so stats endpoints read a single document instead of scanning the logs
+const statsCounterSchema = new mongoose.Schema({
+  // Counter family: 'safety' or 'feedback'
+  _id: {
+    type: String,
+    required: true
+  },
+  
+  // Named counters, e.g. total / unsafe / helpful / notHelpful
+  counts: {
+    type: Map,
+    of: Number,
+    default: {}
+  },
+  
+  // Per safety category counts (safety family only)
+  categories: {
+    type: Map,
+    of: Number,
+    default: {}
+  },
+  
+  // Per safety keyword counts (safety family only)
+  keywords: {
+    type: Map,
+    of: Number,
+    default: {}
+  },
+  
+  // Documents created before this are counted by the backfill, later ones live
+  backfillCutoff: {
+    type: Date
+  },
+  
+  // Lease of the process running the backfill (unset when done or failed)
+  backfillClaimedAt: {
+    type: Date
+  },
+  
+  // Set once the counters were seeded from existing documents
+  backfilledAt: {
+    type: Date
+  },
+  
+  // Last update
+  updatedAt: {
+    type: Date,
+    default: Date.now
+  }
+}, { versionKey: false });
+
+module.exports = mongoose.model('StatsCounter', statsCounterSchema);
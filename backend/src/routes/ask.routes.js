@@ -5,6 +5,12 @@ const askController = require('../controllers/ask.controller');
 // POST /api/ask - Submit a yoga question
 router.post('/', askController.askQuestion);
 
+// POST /api/ask/batch - Submit several questions (NDJSON stream of results)
+router.post('/batch', askController.askBatch);
+
+// DELETE /api/ask/conversations/:conversationId - End a multi-turn conversation
+router.delete('/conversations/:conversationId', askController.endConversation);
+
 // GET /api/ask/history - Get query history
 router.get('/history', askController.getHistory);
 
@@ -4,16 +4,68 @@
  */
 
 const ollama = require('ollama');
+const mongoose = require('mongoose');
 const config = require('../config');
 const QueryLog = require('../models/queryLog.model');
+const ConversationSummary = require('../models/conversationSummary.model');
 const ragService = require('./rag.service');
 const safetyService = require('./safety.service');
+const statsService = require('./stats.service');
+const { metrics, StageTimer } = require('./metrics.service');
+const { SingleFlight } = require('./singleFlight.service');
+const { generationScheduler, AdmissionError, QueueAbortError } = require('./generationScheduler.service');
+const { conversationStore } = require('./conversation.service');
+
+const requestDuration = metrics.histogram(
+  'rag_request_duration_seconds',
+  'End-to-end /api/ask processing time in seconds'
+);
+const conversationSummaries = metrics.counter(
+  'rag_conversation_summaries_total',
+  'Conversation windows compacted into a summary, by outcome'
+);
+const requestsTotal = metrics.counter(
+  'rag_requests_total',
+  'Processed /api/ask requests by outcome'
+);
+
+// Identical concurrent questions share one retrieval + generation
+const queryCoalescer = new SingleFlight('ask');
 
 // Ollama client configuration
 const ollamaClient = new ollama.Ollama({
   host: config.OLLAMA.HOST
 });
 
+// aiAnswer stored for queries that failed to process
+const FAILED_ANSWER = 'Error processing query';
+
+/**
+ * sessionId as stored in QueryLog (anonymous queries are logged with '')
+ * @param {string} sessionId - Optional session identifier
+ * @returns {string}
+ */
+const storedSessionId = (sessionId) => sessionId || '';
+
+/**
+ * QueryLog filter for a session; anonymous rows logged before sessionIds
+ * were normalized hold null
+ * @param {string} sessionId - Optional session identifier
+ * @returns {string|Object}
+ */
+const sessionFilter = (sessionId) => (sessionId ? sessionId : { $in: ['', null] });
+
+const BASE_SYSTEM_PROMPT = `You are a knowledgeable and caring yoga instructor assistant. 
+You provide helpful, accurate information about yoga poses, breathing techniques, meditation, and wellness practices.
+Always be supportive and encouraging while prioritizing safety.`;
+
+const UNSAFE_INSTRUCTIONS = `IMPORTANT: This query has been flagged as potentially risky. 
+- DO NOT provide specific medical advice or diagnosis
+- DO NOT recommend poses without mentioning the need for professional guidance
+- Always emphasize consulting healthcare providers
+- Suggest gentle, safe alternatives when possible
+- Be extra cautious and caring in your response`;
+
 /**
  * Generate response using Ollama yoga model
  * @param {string} query - User's question
@@ -22,19 +74,12 @@ const ollamaClient = new ollama.Ollama({
  * @returns {Promise<string>} - AI generated response
  */
 const generateOllamaResponse = async (query, context = '', isUnsafe = false) => {
-  let systemPrompt = `You are a knowledgeable and caring yoga instructor assistant. 
-You provide helpful, accurate information about yoga poses, breathing techniques, meditation, and wellness practices.
-Always be supportive and encouraging while prioritizing safety.`;
+  let systemPrompt = BASE_SYSTEM_PROMPT;
 
   if (isUnsafe) {
     systemPrompt += `
 
-IMPORTANT: This query has been flagged as potentially risky. 
-- DO NOT provide specific medical advice or diagnosis
-- DO NOT recommend poses without mentioning the need for professional guidance
-- Always emphasize consulting healthcare providers
-- Suggest gentle, safe alternatives when possible
-- Be extra cautious and caring in your response`;
+${UNSAFE_INSTRUCTIONS}`;
   }
 
   if (context) {
@@ -65,48 +110,270 @@ Base your response on this context when relevant, but you can also use your gene
 };
 
 /**
- * Process user query with RAG and safety checks
+ * Build the system prompt that starts (or restarts) a conversation context
+ * Carries the summary and recent turns forward after a compaction.
+ * @param {Conversation} conversation - Conversation state
+ * @returns {string}
+ */
+const buildConversationSystemPrompt = (conversation) => {
+  let systemPrompt = `${BASE_SYSTEM_PROMPT}
+This is a multi-turn conversation: answer follow-up questions in light of what was already discussed.`;
+
+  if (conversation.summary) {
+    systemPrompt += `
+
+Summary of the conversation so far:
+${conversation.summary}`;
+  }
+
+  if (conversation.turns.length > 0) {
+    const recent = conversation.turns
+      .map(turn => `User: ${turn.query}\nAssistant: ${turn.answer}`)
+      .join('\n\n');
+    systemPrompt += `
+
+Most recent exchanges:
+${recent}`;
+  }
+  return systemPrompt;
+};
+
+/**
+ * Build the prompt for one conversation turn: only the new question and its context
  * @param {string} query - User's question
- * @param {string} sessionId - Optional session identifier
- * @returns {Promise<Object>} - Processed response with answer and metadata
+ * @param {string} context - RAG context for this question
+ * @param {boolean} isUnsafe - Whether the query is flagged as unsafe
+ * @returns {string}
  */
-const processQuery = async (query, sessionId = null) => {
-  const startTime = Date.now();
+const buildTurnPrompt = (query, context, isUnsafe) => {
+  let prompt = '';
+  if (context) {
+    prompt += `Context from our yoga knowledge base for this question (use it when relevant):
+
+${context}
+
+---
+
+`;
+  }
+  if (isUnsafe) {
+    prompt += `${UNSAFE_INSTRUCTIONS}
+
+`;
+  }
+  return `${prompt}User Question: ${query}`;
+};
+
+/**
+ * Generate the next conversation turn, continuing from the cached Ollama context
+ * Only the new turn is sent; the model's KV state for earlier turns is reused.
+ * @param {Conversation} conversation - Conversation state
+ * @param {string} query - User's question
+ * @param {string} context - RAG context for this question
+ * @param {boolean} isUnsafe - Whether the query is flagged as unsafe
+ * @returns {Promise<Object>} - { text, context }
+ */
+const generateConversationResponse = async (conversation, query, context = '', isUnsafe = false) => {
+  const request = {
+    model: config.OLLAMA.MODEL,
+    prompt: buildTurnPrompt(query, context, isUnsafe),
+    keep_alive: config.CONVERSATION.KEEP_ALIVE,
+    stream: false
+  };
+  if (conversation.context) {
+    request.context = conversation.context;
+  } else {
+    request.system = buildConversationSystemPrompt(conversation);
+  }
 
   try {
-    // Step 1: Safety Check
-    const safetyCheck = safetyService.checkQuery(query);
-    
-    // Step 2: RAG Retrieval
-    let retrievedChunks = [];
-    let ragContext = '';
-    let sources = [];
-
-    try {
-      const ragResult = await ragService.retrieveContext(query);
-      retrievedChunks = ragResult.chunks || [];
-      ragContext = ragResult.context || '';
-      sources = ragResult.sources || [];
-    } catch (ragError) {
-      console.error('RAG retrieval error:', ragError);
-      // Continue without RAG context if it fails
+    const response = await ollamaClient.generate(request);
+    return { text: response.response, context: response.context };
+  } catch (error) {
+    console.error('Ollama generation error:', error);
+    throw new Error('Failed to generate response from AI model');
+  }
+};
+
+/**
+ * Summarize the turns leaving the conversation window
+ * @param {string} previousSummary - Summary of the turns before them
+ * @param {Object[]} turns - Turns to fold into the summary
+ * @returns {Promise<string>} - Updated summary
+ */
+const summarizeTurns = async (previousSummary, turns) => {
+  const transcript = turns
+    .map(turn => `User: ${turn.query}\nAssistant: ${turn.answer}`)
+    .join('\n\n');
+
+  const response = await ollamaClient.generate({
+    model: config.OLLAMA.MODEL,
+    system: 'You summarize yoga coaching conversations for the assistant\'s own memory.',
+    prompt: `${previousSummary ? `Existing summary:\n${previousSummary}\n\n` : ''}New exchanges:
+${transcript}
+
+Write an updated summary in at most 120 words. Keep the user's goals, health conditions or safety concerns, and poses or practices already recommended.`,
+    keep_alive: config.CONVERSATION.KEEP_ALIVE,
+    stream: false
+  });
+  return response.response.trim();
+};
+
+/**
+ * Store a conversation's summary so it survives eviction and is shared by
+ * cluster workers. An older summary never replaces a newer one.
+ * @param {Conversation} conversation - Conversation state
+ */
+const saveConversationSummary = async (conversation) => {
+  const { summary, summarizedTurns } = conversation;
+  try {
+    await ConversationSummary.updateOne(
+      {
+        sessionId: storedSessionId(conversation.sessionId),
+        conversationId: conversation.conversationId,
+        summarizedTurns: { $lt: summarizedTurns }
+      },
+      { $set: { summary, summarizedTurns, updatedAt: new Date() } },
+      { upsert: true }
+    );
+  } catch (error) {
+    // Duplicate key: another worker already stored a newer summary
+    if (error.code !== 11000) {
+      console.error('Error saving conversation summary:', error.message);
+    }
+  }
+};
+
+/**
+ * Fold older turns into the summary once the cached context is full
+ * The summary is generated outside the conversation lock, so the user's next
+ * turn does not wait for it (it continues the full context meanwhile). Only
+ * applying the result takes the lock, between turns.
+ * @param {Conversation} conversation - Conversation state
+ */
+const compactConversation = async (conversation) => {
+  const { MAX_TURNS, RECENT_TURNS } = config.CONVERSATION;
+  if (conversation.compacting || !conversation.isWindowFull(MAX_TURNS)) {
+    return;
+  }
+
+  conversation.compacting = true;
+  const { epoch, summary: previousSummary } = conversation;
+  const turns = conversation.turnsToSummarize(RECENT_TURNS);
+  let summary = previousSummary;
+  try {
+    if (turns.length > 0) {
+      summary = await generationScheduler.run(() => summarizeTurns(previousSummary, turns), 'batch');
     }
+    conversationSummaries.inc({ outcome: 'success' });
+  } catch (error) {
+    // Keep the previous summary; the dropped turns are lost from memory but not from QueryLog
+    console.error('Conversation summary failed:', error.message);
+    conversationSummaries.inc({ outcome: 'error' });
+  }
+
+  const applied = await conversation.exclusive(() => {
+    conversation.compacting = false;
+    // Restored from QueryLog meanwhile: the snapshot no longer matches the turns
+    if (conversation.epoch !== epoch) {
+      return false;
+    }
+    conversation.compact(summary, turns.length);
+    return true;
+  });
+
+  if (applied && summary) {
+    await saveConversationSummary(conversation);
+  }
+};
+
+/**
+ * Bring a conversation up to date with QueryLog before a turn
+ * The in-memory state can be behind the log when it was evicted, or when
+ * another cluster worker answered earlier turns. When the log holds more
+ * answered turns than this process has seen, the stored summary and the
+ * turns after it are reloaded (dropping the now stale Ollama context).
+ * @param {Conversation} conversation - Conversation state
+ * @param {string} sessionId - Session identifier
+ * @param {string} conversationId - Conversation identifier
+ */
+const syncConversation = async (conversation, sessionId, conversationId) => {
+  try {
+    const filter = {
+      sessionId: sessionFilter(sessionId),
+      conversationId,
+      aiAnswer: { $ne: FAILED_ANSWER }
+    };
+    const logged = await QueryLog.countDocuments(filter);
+    if (logged <= conversation.loggedTurns) {
+      return;
+    }
+
+    // Prefer whichever summary covers more turns: the stored one or our own
+    const stored = await ConversationSummary.findOne({ sessionId: storedSessionId(sessionId), conversationId })
+      .select('summary summarizedTurns')
+      .lean();
+    const summary = stored && stored.summarizedTurns > conversation.summarizedTurns
+      ? { summary: stored.summary, summarizedTurns: stored.summarizedTurns }
+      : { summary: conversation.summary, summarizedTurns: conversation.summarizedTurns };
+
+    const unsummarized = Math.min(logged - summary.summarizedTurns, config.CONVERSATION.MAX_TURNS);
+    const logs = unsummarized > 0
+      ? await QueryLog.find(filter)
+        .sort({ createdAt: -1 })
+        .limit(unsummarized)
+        .select('userQuery aiAnswer')
+        .lean()
+      : [];
+
+    conversation.restore(
+      logs.reverse().map(log => ({ query: log.userQuery, answer: log.aiAnswer })),
+      logged,
+      summary
+    );
+  } catch (error) {
+    console.error('Error restoring conversation history:', error.message);
+  }
+};
+
+/**
+ * Generate the answer for a query, wrapping it with safety guidance when flagged
+ * Generation waits for a slot from the generation scheduler first.
+ * @param {string} query - User's question
+ * @param {Object} safetyCheck - Result of safetyService.checkQuery
+ * @param {string} ragContext - RAG context from retrieved chunks
+ * @param {StageTimer} timer - Per-request stage timer
+ * @param {string} priority - Scheduler priority: 'interactive' or 'batch'
+ * @param {Conversation} conversation - Optional multi-turn conversation state
+ * @param {AbortSignal} signal - Optional; aborting gives up the wait for a slot
+ * @returns {Promise<Object>} - { aiAnswer, safetyWarning, safeRecommendation }
+ */
+const generateAnswer = async (query, safetyCheck, ragContext, timer, priority = 'interactive', conversation = null, signal = null) => {
+  const release = await timer.time('queueWait', () => generationScheduler.acquire(priority, signal));
+  let baseResponse;
+  try {
+    if (conversation) {
+      const turn = await timer.time('llm', () =>
+        generateConversationResponse(conversation, query, ragContext, safetyCheck.isUnsafe));
+      baseResponse = turn.text;
+      conversation.recordTurn(query, baseResponse, turn.context);
+    } else {
+      baseResponse = await timer.time('llm', () => generateOllamaResponse(query, ragContext, safetyCheck.isUnsafe));
+    }
+  } finally {
+    release();
+  }
+
+  if (conversation && conversation.isWindowFull(config.CONVERSATION.MAX_TURNS)) {
+    compactConversation(conversation);
+  }
 
-    // Step 3: Generate Response
-    let aiAnswer = '';
-    let safetyWarning = null;
-    let safeRecommendation = null;
-
-    if (safetyCheck.isUnsafe) {
-      // Generate safety-aware response
-      safetyWarning = safetyCheck.safetyResponse.warning;
-      safeRecommendation = safetyCheck.safetyResponse.recommendation;
-      
-      // Generate AI response with safety context
-      const baseResponse = await generateOllamaResponse(query, ragContext, true);
-      
-      // Combine AI response with safety information
-      aiAnswer = `${safetyCheck.safetyResponse.warning}
+  if (!safetyCheck.isUnsafe) {
+    return { aiAnswer: baseResponse, safetyWarning: null, safeRecommendation: null };
+  }
+
+  // Combine AI response with safety information
+  const aiAnswer = `${safetyCheck.safetyResponse.warning}
 
 ${baseResponse}
 
@@ -117,112 +384,434 @@ ${safetyCheck.safetyResponse.recommendation}
 
 **⚕️ Professional Guidance:**
 ${safetyCheck.safetyResponse.disclaimer}`;
-    } else {
-      // Generate normal response
-      aiAnswer = await generateOllamaResponse(query, ragContext, false);
-    }
 
-    const responseTime = Date.now() - startTime;
+  return {
+    aiAnswer,
+    safetyWarning: safetyCheck.safetyResponse.warning,
+    safeRecommendation: safetyCheck.safetyResponse.recommendation
+  };
+};
+
+/**
+ * Format safety information for API responses
+ * @param {Object} safetyCheck - Result of safetyService.checkQuery
+ * @returns {Object|null}
+ */
+const buildSafetyInfo = (safetyCheck) => (safetyCheck.isUnsafe ? {
+  warning: safetyCheck.safetyResponse.warning,
+  recommendation: safetyCheck.safetyResponse.recommendation,
+  disclaimer: safetyCheck.safetyResponse.disclaimer,
+  detectedKeywords: safetyCheck.keywords,
+  detectedCategories: safetyCheck.categories
+} : null);
+
+/**
+ * Log a completed query to MongoDB and build the API response data
+ * @param {Object} params - Query, session, conversation, safety check, retrieval result, answer and timing
+ * @returns {Promise<Object>} - Response data payload
+ */
+const logQueryResult = async ({ query, sessionId, conversation, conversationId, safetyCheck, retrieval, answer, startTime, timer }) => {
+  const responseTime = Date.now() - startTime;
+
+  const queryLog = new QueryLog({
+    userQuery: query,
+    retrievedChunks: retrieval.chunks.map(chunk => ({
+      chunkId: chunk.chunkId,
+      title: chunk.title,
+      content: chunk.content.substring(0, 500),
+      source: chunk.category,
+      similarityScore: chunk.similarityScore
+    })),
+    aiAnswer: answer.aiAnswer,
+    isUnsafe: safetyCheck.isUnsafe,
+    safetyKeywordsDetected: safetyCheck.keywords,
+    safetyWarning: answer.safetyWarning,
+    safeRecommendation: answer.safeRecommendation,
+    responseTime,
+    sessionId: storedSessionId(sessionId),
+    conversationId: conversationId || null
+  });
+
+  // Count the query only once its log is stored
+  await timer.time('logWrite', async () => {
+    await queryLog.save();
+    await statsService.recordQuery(safetyCheck, queryLog.createdAt);
+  });
+
+  return {
+    answer: answer.aiAnswer,
+    sources: retrieval.sources,
+    isUnsafe: safetyCheck.isUnsafe,
+    safetyInfo: buildSafetyInfo(safetyCheck),
+    queryId: queryLog._id,
+    responseTime,
+    timings: timer.toJSON(),
+    ...(conversation ? { conversationId, turn: conversation.turnCount } : {})
+  };
+};
 
-    // Step 4: Log to MongoDB
+/**
+ * Log a query that failed to process
+ * @param {string} query - User's question
+ * @param {string} sessionId - Optional session identifier
+ * @param {number} startTime - Date.now() when processing started
+ * @param {string} conversationId - Optional conversation identifier
+ */
+const logFailedQuery = async (query, sessionId, startTime, conversationId = null) => {
+  try {
     const queryLog = new QueryLog({
       userQuery: query,
-      retrievedChunks: retrievedChunks.map(chunk => ({
-        chunkId: chunk.chunkId,
-        title: chunk.title,
-        content: chunk.content.substring(0, 500),
-        source: chunk.category,
-        similarityScore: chunk.similarityScore
-      })),
-      aiAnswer,
-      isUnsafe: safetyCheck.isUnsafe,
-      safetyKeywordsDetected: safetyCheck.keywords,
-      safetyWarning,
-      safeRecommendation,
-      responseTime,
-      sessionId
+      aiAnswer: FAILED_ANSWER,
+      isUnsafe: false,
+      responseTime: Date.now() - startTime,
+      sessionId: storedSessionId(sessionId),
+      conversationId
     });
-
     await queryLog.save();
+    await statsService.recordQuery(null, queryLog.createdAt);
+  } catch (logError) {
+    console.error('Error logging failed query:', logError);
+  }
+};
+
+const EMPTY_RETRIEVAL = { chunks: [], context: '', sources: [] };
+
+/**
+ * Build the coalescing key for a query
+ * Queries that differ only in case, whitespace or trailing punctuation and
+ * trigger the same safety keywords produce the same answer.
+ * @param {string} query - User's question
+ * @param {Object} safetyCheck - Result of safetyService.checkQuery
+ * @returns {string}
+ */
+const coalescingKey = (query, safetyCheck) => {
+  const normalized = query
+    .toLowerCase()
+    .replace(/\s+/g, ' ')
+    .replace(/[\s?!.]+$/, '')
+    .trim();
+  const safety = safetyCheck.isUnsafe ? [...safetyCheck.keywords].sort().join(',') : 'safe';
+  return `${safety}|${normalized}`;
+};
+
+/**
+ * Retrieve context and generate the answer for a query
+ * Follow-up questions retrieve with the previous question too, since they
+ * often refer back to it ("what about for beginners?"). A request the
+ * generation queue would turn away is rejected before retrieval runs.
+ * @param {string} query - User's question
+ * @param {Object} safetyCheck - Result of safetyService.checkQuery
+ * @param {StageTimer} timer - Per-request stage timer
+ * @param {Conversation} conversation - Optional multi-turn conversation state
+ * @param {AbortSignal} signal - Optional signal that fires when the client goes away
+ * @returns {Promise<Object>} - { retrieval, answer }
+ */
+const retrieveAndGenerate = async (query, safetyCheck, timer, conversation = null, signal = null) => {
+  generationScheduler.checkAdmission('interactive');
+
+  const previousTurn = conversation && conversation.turns[conversation.turns.length - 1];
+  const retrievalQuery = previousTurn ? `${previousTurn.query}\n${query}` : query;
+
+  let retrieval = EMPTY_RETRIEVAL;
+  try {
+    retrieval = await ragService.retrieveContext(retrievalQuery, config.RAG.TOP_K_CHUNKS, timer);
+  } catch (ragError) {
+    console.error('RAG retrieval error:', ragError);
+    // Continue without RAG context if it fails
+  }
+
+  const answer = await generateAnswer(query, safetyCheck, retrieval.context, timer, 'interactive', conversation, signal);
+  return { retrieval, answer };
+};
+
+/**
+ * Run one conversation turn after earlier turns of the same conversation
+ * @param {string} query - User's question
+ * @param {Object} safetyCheck - Result of safetyService.checkQuery
+ * @param {StageTimer} timer - Per-request stage timer
+ * @param {string} sessionId - Session identifier
+ * @param {string} conversationId - Conversation identifier
+ * @param {AbortSignal} signal - Optional signal that fires when the client goes away
+ * @returns {Promise<Object>} - { retrieval, answer, conversation }
+ */
+const runConversationTurn = (query, safetyCheck, timer, sessionId, conversationId, signal = null) => {
+  const { conversation } = conversationStore.getOrCreate(sessionId, conversationId);
+  return conversation.exclusive(async () => {
+    await syncConversation(conversation, sessionId, conversationId);
+    const result = await retrieveAndGenerate(query, safetyCheck, timer, conversation, signal);
+    return { ...result, conversation };
+  });
+};
+
+/**
+ * Process user query with RAG and safety checks
+ * @param {string} query - User's question
+ * @param {string} sessionId - Optional session identifier
+ * @param {Object} options - { conversationId } to continue a multi-turn conversation,
+ *   { signal } to stop waiting for generation when the client disconnects
+ * @returns {Promise<Object>} - Processed response with answer and metadata
+ */
+const processQuery = async (query, sessionId = null, { conversationId = null, signal = null } = {}) => {
+  const startTime = Date.now();
+  const timer = new StageTimer();
+
+  try {
+    // Step 1: Safety Check
+    const safetyCheck = await timer.time('safety', () => safetyService.checkQuery(query));
+    
+    // Steps 2-3: RAG Retrieval and Response Generation. Conversation turns depend
+    // on their history; standalone queries are shared with identical in-flight ones
+    // (a shared computation is only abandoned once all of its requesters disconnect)
+    let shared = false;
+    let computation = conversationId
+      ? (abortSignal) => runConversationTurn(query, safetyCheck, timer, sessionId, conversationId, abortSignal)
+      : (abortSignal) => retrieveAndGenerate(query, safetyCheck, timer, null, abortSignal);
+    if (config.COALESCING.ENABLED && !conversationId) {
+      const flight = queryCoalescer.run(coalescingKey(query, safetyCheck), computation, signal);
+      shared = flight.shared;
+      computation = () => flight.promise;
+    }
+    const { retrieval, answer, conversation } = shared
+      ? await timer.time('coalescedWait', computation)
+      : await computation(signal);
+
+    // Step 4: Log to MongoDB (every request gets its own QueryLog and queryId)
+    const data = await logQueryResult({
+      query, sessionId, conversation, conversationId, safetyCheck, retrieval, answer, startTime, timer
+    });
+    data.coalesced = shared;
+
+    requestDuration.observe(timer.elapsed() / 1000, { outcome: 'success' });
+    requestsTotal.inc({ outcome: 'success' });
 
     // Step 5: Return response
     return {
       success: true,
-      data: {
-        answer: aiAnswer,
-        sources: sources,
-        isUnsafe: safetyCheck.isUnsafe,
-        safetyInfo: safetyCheck.isUnsafe ? {
-          warning: safetyCheck.safetyResponse.warning,
-          recommendation: safetyCheck.safetyResponse.recommendation,
-          disclaimer: safetyCheck.safetyResponse.disclaimer,
-          detectedKeywords: safetyCheck.keywords,
-          detectedCategories: safetyCheck.categories
-        } : null,
-        queryId: queryLog._id,
-        responseTime
-      }
+      data
     };
 
   } catch (error) {
+    // Rejected by admission control: no answer was generated or logged, the client retries.
+    // Retrieval is skipped when the queue is already full, but may have run for a
+    // request that was later evicted or timed out in the queue
+    if (error instanceof AdmissionError) {
+      requestsTotal.inc({ outcome: 'rejected' });
+      throw error;
+    }
+
+    // Client disconnected while waiting for a slot: nothing to answer or log
+    if (error instanceof QueueAbortError) {
+      requestsTotal.inc({ outcome: 'aborted' });
+      throw error;
+    }
+
     console.error('Error processing query:', error);
+    requestDuration.observe(timer.elapsed() / 1000, { outcome: 'error' });
+    requestsTotal.inc({ outcome: 'error' });
     
     // Log failed query
-    try {
-      await new QueryLog({
-        userQuery: query,
-        aiAnswer: 'Error processing query',
-        isUnsafe: false,
-        responseTime: Date.now() - startTime,
-        sessionId
-      }).save();
-    } catch (logError) {
-      console.error('Error logging failed query:', logError);
-    }
+    await logFailedQuery(query, sessionId, startTime, conversationId);
 
     throw error;
   }
 };
 
 /**
- * Get query history
- * @param {number} limit - Number of records to return
- * @returns {Promise<Array>} - Array of query logs
+ * Get request coalescing statistics
+ * @returns {Object}
+ */
+const getCoalescingStats = () => queryCoalescer.getStats();
+
+/**
+ * End a conversation, freeing its server-side state
+ * @param {string} sessionId - Session identifier
+ * @param {string} conversationId - Conversation identifier
+ * @returns {boolean} - Whether it was held in memory
  */
-const getQueryHistory = async (limit = 50) => {
-  return await QueryLog.find()
-    .sort({ createdAt: -1 })
-    .limit(limit)
-    .select('-__v');
+const endConversation = (sessionId, conversationId) => conversationStore.delete(sessionId, conversationId);
+
+/**
+ * Run async tasks over items with at most `concurrency` in flight
+ * @param {Array} items - Items to process
+ * @param {number} concurrency - Maximum parallel tasks
+ * @param {Function} task - async (item, index) => void
+ * @param {AbortSignal} signal - Optional signal to stop starting new tasks
+ */
+const runWithConcurrency = async (items, concurrency, task, signal = null) => {
+  let next = 0;
+  const worker = async () => {
+    while (next < items.length && !(signal && signal.aborted)) {
+      const index = next++;
+      await task(items[index], index);
+    }
+  };
+  const workers = Array.from({ length: Math.min(concurrency, items.length) }, worker);
+  await Promise.all(workers);
 };
 
 /**
- * Get safety statistics
- * @returns {Promise<Object>} - Safety statistics
+ * Process a batch of queries with one embedding call and one search pass
+ * Results are reported through onResult as each item completes.
+ * @param {string[]} queries - User questions
+ * @param {Object} options - { sessionId, mode: 'full' | 'retrieval', concurrency, signal }
+ * @param {Function} onResult - Called with { index, success, data | error } per item
+ * @returns {Promise<Object>} - Batch summary
  */
-const getSafetyStats = async () => {
-  const total = await QueryLog.countDocuments();
-  const unsafe = await QueryLog.countDocuments({ isUnsafe: true });
-  
-  const keywordStats = await QueryLog.aggregate([
-    { $match: { isUnsafe: true } },
-    { $unwind: '$safetyKeywordsDetected' },
-    { $group: { _id: '$safetyKeywordsDetected', count: { $sum: 1 } } },
-    { $sort: { count: -1 } },
-    { $limit: 10 }
-  ]);
+const processBatch = async (queries, options = {}, onResult = () => {}) => {
+  const {
+    sessionId = null,
+    mode = 'full',
+    concurrency = config.BATCH.GENERATION_CONCURRENCY,
+    signal = null
+  } = options;
+  const startTime = Date.now();
+  const batchTimer = new StageTimer();
+
+  // Safety checks are cheap and per query
+  const safetyChecks = await batchTimer.time('safety', () => queries.map(q => safetyService.checkQuery(q)));
+
+  // Shared retrieval: one embed call and one pass over the index
+  let retrievals = queries.map(() => EMPTY_RETRIEVAL);
+  try {
+    retrievals = await ragService.retrieveContextBatch(queries, config.RAG.TOP_K_CHUNKS, batchTimer);
+  } catch (ragError) {
+    console.error('RAG batch retrieval error:', ragError);
+  }
+
+  let succeeded = 0;
+  let failed = 0;
+
+  if (mode === 'retrieval') {
+    queries.forEach((query, index) => {
+      succeeded++;
+      onResult({
+        index,
+        success: true,
+        data: {
+          query,
+          sources: retrievals[index].sources,
+          isUnsafe: safetyChecks[index].isUnsafe,
+          safetyInfo: buildSafetyInfo(safetyChecks[index])
+        }
+      });
+    });
+  } else {
+    await runWithConcurrency(queries, concurrency, async (query, index) => {
+      const timer = new StageTimer();
+      const safetyCheck = safetyChecks[index];
+      const retrieval = retrievals[index];
+      try {
+        const answer = await generateAnswer(query, safetyCheck, retrieval.context, timer, 'batch', null, signal);
+        const data = await logQueryResult({ query, sessionId, safetyCheck, retrieval, answer, startTime, timer });
+        succeeded++;
+        requestsTotal.inc({ outcome: 'success' });
+        onResult({ index, success: true, data: { query, ...data } });
+      } catch (error) {
+        failed++;
+        if (error instanceof AdmissionError) {
+          requestsTotal.inc({ outcome: 'rejected' });
+          onResult({ index, success: false, error: error.message, retryAfter: error.retryAfter });
+          return;
+        }
+        if (error instanceof QueueAbortError) {
+          requestsTotal.inc({ outcome: 'aborted' });
+          return;
+        }
+        console.error(`Error processing batch item ${index}:`, error);
+        requestsTotal.inc({ outcome: 'error' });
+        await logFailedQuery(query, sessionId, startTime);
+        onResult({ index, success: false, error: error.message });
+      }
+    }, signal);
+  }
 
   return {
-    totalQueries: total,
-    unsafeQueries: unsafe,
-    safeQueries: total - unsafe,
-    unsafePercentage: total > 0 ? ((unsafe / total) * 100).toFixed(2) : 0,
-    topSafetyKeywords: keywordStats
+    total: queries.length,
+    succeeded,
+    failed,
+    mode,
+    responseTime: Date.now() - startTime,
+    timings: batchTimer.toJSON()
   };
 };
 
+const HISTORY_MAX_LIMIT = 100;
+
+/**
+ * Encode a keyset pagination cursor from the last returned log
+ * @param {Object} log - Query log with createdAt and _id
+ * @returns {string} - Opaque cursor
+ */
+const encodeHistoryCursor = (log) =>
+  Buffer.from(`${log.createdAt.toISOString()}|${log._id}`).toString('base64url');
+
+/**
+ * Decode a history cursor
+ * @param {string} cursor - Cursor from a previous page
+ * @returns {Object} - { createdAt, id }
+ */
+const decodeHistoryCursor = (cursor) => {
+  const [timestamp, id] = Buffer.from(String(cursor), 'base64url').toString('utf8').split('|');
+  const createdAt = new Date(timestamp);
+
+  if (!id || !mongoose.Types.ObjectId.isValid(id) || Number.isNaN(createdAt.getTime())) {
+    const error = new Error('Invalid history cursor');
+    error.statusCode = 400;
+    throw error;
+  }
+  return { createdAt, id: new mongoose.Types.ObjectId(id) };
+};
+
+/**
+ * Get query history, newest first, using keyset (cursor) pagination
+ * Served by the { sessionId, createdAt, _id } / { createdAt, _id } indexes
+ * @param {Object} options - { sessionId, limit, cursor }
+ * @returns {Promise<Object>} - { items, nextCursor } (nextCursor is null on the last page)
+ */
+const getQueryHistory = async ({ sessionId, limit = 50, cursor } = {}) => {
+  // Query strings can carry objects (?sessionId[$ne]=x) that Mongo would read as operators
+  if (sessionId !== undefined && sessionId !== null && typeof sessionId !== 'string') {
+    const error = new Error('sessionId must be a string');
+    error.statusCode = 400;
+    throw error;
+  }
+
+  const pageSize = Math.min(Math.max(parseInt(limit, 10) || 50, 1), HISTORY_MAX_LIMIT);
+  const filter = sessionId ? { sessionId } : {};
+
+  if (cursor) {
+    const { createdAt, id } = decodeHistoryCursor(cursor);
+    filter.$or = [
+      { createdAt: { $lt: createdAt } },
+      { createdAt, _id: { $lt: id } }
+    ];
+  }
+
+  // Fetch one extra row to know whether another page exists
+  const logs = await QueryLog.find(filter)
+    .sort({ createdAt: -1, _id: -1 })
+    .limit(pageSize + 1)
+    .select('-__v')
+    .lean();
+
+  const items = logs.slice(0, pageSize);
+  return {
+    items,
+    nextCursor: logs.length > pageSize ? encodeHistoryCursor(items[items.length - 1]) : null
+  };
+};
+
+/**
+ * Get safety statistics (read from the incrementally maintained counters)
+ * @returns {Promise<Object>} - Safety statistics
+ */
+const getSafetyStats = () => statsService.getSafetyStats();
+
 module.exports = {
   processQuery,
+  processBatch,
+  getCoalescingStats,
+  endConversation,
   getQueryHistory,
   getSafetyStats,
   generateOllamaResponse
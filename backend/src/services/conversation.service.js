@@ -0,0 +1,229 @@
+/**
+ * Conversation Service
+ * Server-side multi-turn state keyed by sessionId + conversationId.
+ *
+ * Each conversation keeps the Ollama `context` returned by the previous
+ * turn, so the next turn sends only the new question and the model continues
+ * from its cached state instead of re-reading the transcript. After
+ * MAX_TURNS turns the context is restarted from a short summary plus the
+ * most recent turns, which keeps per-turn prefill bounded. Idle conversations
+ * are evicted.
+ */
+
+const config = require('../config');
+const { metrics } = require('./metrics.service');
+
+class Conversation {
+  /**
+   * @param {string} key - sessionId:conversationId
+   * @param {string} sessionId - Session identifier
+   * @param {string} conversationId - Conversation identifier
+   */
+  constructor(key, sessionId = null, conversationId = null) {
+    this.key = key;
+    this.sessionId = sessionId;
+    this.conversationId = conversationId;
+    this.turns = [];          // Recent { query, answer } turns, oldest first
+    this.summary = '';        // Summary of turns that left the window
+    this.summarizedTurns = 0; // Turns covered by the summary (the first N)
+    this.context = null;      // Ollama context tokens from the last turn
+    this.contextTurns = 0;    // Turns encoded in this.context
+    this.turnCount = 0;       // Turns since the conversation started
+    this.loggedTurns = 0;     // Answered turns this process knows are in QueryLog
+    this.lastUsedAt = Date.now();
+    this.compacting = false;  // A summary is being generated
+    this.epoch = 0;           // Bumped whenever turns are replaced wholesale
+    this._tail = Promise.resolve();
+  }
+
+  /**
+   * Run fn after every earlier call on this conversation has settled
+   * Turns of one conversation must not interleave: each needs the previous context.
+   * @param {Function} fn - Async function
+   * @returns {Promise<*>}
+   */
+  exclusive(fn) {
+    const run = this._tail.then(fn, fn);
+    this._tail = run.catch(() => {});
+    return run;
+  }
+
+  /**
+   * Record a completed turn and the context the model returned for it
+   * @param {string} query - User's question
+   * @param {string} answer - Model answer (without safety wrapping)
+   * @param {number[]} context - Ollama context after this turn
+   */
+  recordTurn(query, answer, context) {
+    this.turns.push({ query, answer });
+    this.context = context || null;
+    this.contextTurns++;
+    this.turnCount++;
+    this.loggedTurns++;
+    this.lastUsedAt = Date.now();
+  }
+
+  /**
+   * Replace the recent turns with ones restored from QueryLog
+   * The cached context no longer matches them, so the next turn starts a
+   * fresh one from the summary and these turns.
+   * @param {Object[]} turns - Turns after the summary, oldest first
+   * @param {number} loggedTurns - Answered turns in QueryLog
+   * @param {Object} summary - { summary, summarizedTurns } covering the turns before them
+   */
+  restore(turns, loggedTurns, { summary, summarizedTurns }) {
+    this.turns = turns;
+    this.summary = summary;
+    this.summarizedTurns = summarizedTurns;
+    this.turnCount = loggedTurns;
+    this.loggedTurns = loggedTurns;
+    this.context = null;
+    this.contextTurns = 0;
+    this.epoch++;
+  }
+
+  /**
+   * Whether the cached context holds enough turns to be compacted
+   * @param {number} maxTurns - Window size
+   * @returns {boolean}
+   */
+  isWindowFull(maxTurns) {
+    return this.contextTurns >= maxTurns;
+  }
+
+  /**
+   * Replace the oldest turns with a summary and drop the cached context
+   * The next turn starts a fresh context from the summary and remaining turns.
+   * @param {string} summary - Summary of the previous summary and the folded turns
+   * @param {number} foldedTurns - Oldest turns covered by the new summary
+   */
+  compact(summary, foldedTurns) {
+    this.summary = summary;
+    this.turns = this.turns.slice(foldedTurns);
+    this.summarizedTurns = this.turnCount - this.turns.length;
+    this.context = null;
+    this.contextTurns = 0;
+    this.epoch++;
+  }
+
+  /**
+   * Turns that a compaction would fold into the summary
+   * @param {number} recentTurns - Turns kept verbatim
+   * @returns {Object[]}
+   */
+  turnsToSummarize(recentTurns) {
+    return this.turns.slice(0, Math.max(0, this.turns.length - recentTurns));
+  }
+}
+
+class ConversationStore {
+  /**
+   * @param {Object} options - { idleTtlMs, maxConversations }
+   */
+  constructor({ idleTtlMs, maxConversations }) {
+    this.idleTtlMs = idleTtlMs;
+    this.maxConversations = maxConversations;
+    this.conversations = new Map();   // key -> Conversation, least recently used first
+    this.evictions = metrics.counter('rag_conversation_evictions_total', 'Conversations dropped by reason');
+    metrics.gauge('rag_conversations_active', 'Conversations held in memory', () => this.conversations.size);
+    this._sweeper = null;
+  }
+
+  key(sessionId, conversationId) {
+    return `${sessionId || 'anonymous'}:${conversationId}`;
+  }
+
+  /**
+   * Get a conversation, creating it when missing
+   * @param {string} sessionId - Session identifier
+   * @param {string} conversationId - Conversation identifier
+   * @returns {Object} - { conversation, created }
+   */
+  getOrCreate(sessionId, conversationId) {
+    const key = this.key(sessionId, conversationId);
+    let conversation = this.conversations.get(key);
+    const created = !conversation;
+
+    if (created) {
+      conversation = new Conversation(key, sessionId, conversationId);
+      this._evictOverflow();
+    } else {
+      this.conversations.delete(key);   // Re-insert to mark as most recently used
+    }
+    conversation.lastUsedAt = Date.now();
+    this.conversations.set(key, conversation);
+    return { conversation, created };
+  }
+
+  /**
+   * Drop a conversation
+   * @param {string} sessionId - Session identifier
+   * @param {string} conversationId - Conversation identifier
+   * @returns {boolean} - Whether it existed
+   */
+  delete(sessionId, conversationId) {
+    return this.conversations.delete(this.key(sessionId, conversationId));
+  }
+
+  _evictOverflow() {
+    while (this.conversations.size >= this.maxConversations) {
+      const oldest = this.conversations.keys().next().value;
+      this.conversations.delete(oldest);
+      this.evictions.inc({ reason: 'capacity' });
+    }
+  }
+
+  /**
+   * Remove conversations idle for longer than the TTL
+   * @returns {number} - Number evicted
+   */
+  sweep() {
+    const cutoff = Date.now() - this.idleTtlMs;
+    let evicted = 0;
+    for (const [key, conversation] of this.conversations) {
+      if (conversation.lastUsedAt < cutoff) {
+        this.conversations.delete(key);
+        evicted++;
+      }
+    }
+    if (evicted > 0) {
+      this.evictions.inc({ reason: 'idle' }, evicted);
+    }
+    return evicted;
+  }
+
+  /**
+   * Sweep idle conversations periodically (does not keep the process alive)
+   */
+  startSweeper() {
+    if (!this._sweeper) {
+      this._sweeper = setInterval(() => this.sweep(), Math.min(this.idleTtlMs, 60000));
+      this._sweeper.unref();
+    }
+  }
+
+  /**
+   * Get conversation statistics
+   * @returns {Object}
+   */
+  getStats() {
+    return {
+      active: this.conversations.size,
+      maxConversations: this.maxConversations,
+      idleTtlMinutes: this.idleTtlMs / 60000
+    };
+  }
+}
+
+// Export singleton instance
+const conversationStore = new ConversationStore({
+  idleTtlMs: config.CONVERSATION.IDLE_TTL_MINUTES * 60000,
+  maxConversations: config.CONVERSATION.MAX_CONVERSATIONS
+});
+conversationStore.startSweeper();
+
+module.exports = {
+  conversationStore,
+  ConversationStore,
+  Conversation
+};
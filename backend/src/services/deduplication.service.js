@@ -0,0 +1,244 @@
+/**
+ * Deduplication Service
+ * Near-duplicate chunk detection for index builds, using MinHash signatures
+ * over word shingles and LSH banding to find candidate pairs without
+ * comparing every chunk to every other.
+ *
+ * Chunks are compared by the text that is embedded (title and content), and
+ * only chunks with the same title are candidates: a copied article or a
+ * section repeated under one title collapses into the first chunk of its
+ * group, which keeps references to every source article, while shared
+ * boilerplate under different titles stays separate. Each collapsed chunk
+ * is one embedding call and one vector less.
+ */
+
+const DEFAULTS = {
+  threshold: 0.85,    // Minimum Jaccard similarity of shingle sets
+  shingleSize: 3,     // Words per shingle
+  numHashes: 128,     // MinHash signature length
+  bands: 16,          // LSH bands (numHashes / bands rows each)
+  minShingles: 8      // Shorter chunks are too small to judge and are always kept
+};
+
+/**
+ * 32-bit FNV-1a hash of a string
+ * @param {string} text - Text to hash
+ * @returns {number} - Unsigned 32-bit hash
+ */
+const hashString = (text) => {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < text.length; i++) {
+    hash ^= text.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return hash >>> 0;
+};
+
+/**
+ * Murmur3 finalizer: a cheap, well-mixed 32-bit permutation
+ */
+const mix = (x) => {
+  x ^= x >>> 16;
+  x = Math.imul(x, 0x85ebca6b);
+  x ^= x >>> 13;
+  x = Math.imul(x, 0xc2b2ae35);
+  x ^= x >>> 16;
+  return x >>> 0;
+};
+
+/**
+ * Hashed word shingles of a text (case and punctuation insensitive)
+ * @param {string} text - Chunk text
+ * @param {number} shingleSize - Words per shingle
+ * @returns {Set<number>}
+ */
+const shingle = (text, shingleSize = DEFAULTS.shingleSize) => {
+  const words = (text || '').toLowerCase().match(/[\p{L}\p{N}]+/gu) || [];
+  const shingles = new Set();
+  if (words.length === 0) {
+    return shingles;
+  }
+  const last = Math.max(0, words.length - shingleSize);
+  for (let i = 0; i <= last; i++) {
+    shingles.add(hashString(words.slice(i, i + shingleSize).join(' ')));
+  }
+  return shingles;
+};
+
+/**
+ * MinHash signature: per hash function, the minimum over all shingles
+ * @param {Set<number>} shingles - Hashed shingles
+ * @param {Uint32Array} seeds - One seed per hash function
+ * @returns {Uint32Array}
+ */
+const minHash = (shingles, seeds) => {
+  const signature = new Uint32Array(seeds.length).fill(0xffffffff);
+  for (const value of shingles) {
+    for (let h = 0; h < seeds.length; h++) {
+      const hashed = mix(value ^ seeds[h]);
+      if (hashed < signature[h]) {
+        signature[h] = hashed;
+      }
+    }
+  }
+  return signature;
+};
+
+/**
+ * Exact Jaccard similarity of two sets
+ * @returns {number}
+ */
+const jaccard = (a, b) => {
+  if (a.size === 0 || b.size === 0) {
+    return 0;
+  }
+  const [small, large] = a.size <= b.size ? [a, b] : [b, a];
+  let shared = 0;
+  for (const value of small) {
+    if (large.has(value)) {
+      shared++;
+    }
+  }
+  return shared / (a.size + b.size - shared);
+};
+
+/**
+ * Text a chunk is compared by: title and content, as embedded
+ * @param {Object} chunk - Chunk object
+ * @returns {string}
+ */
+const chunkText = (chunk) => `${chunk.title || ''}\n${chunk.content || ''}`;
+
+/**
+ * Case and punctuation insensitive title, part of every LSH band key
+ * (a title adds too few shingles to keep 500-character chunks apart)
+ * @param {Object} chunk - Chunk object
+ * @returns {string}
+ */
+const titleKey = (chunk) => ((chunk.title || '').toLowerCase().match(/[\p{L}\p{N}]+/gu) || []).join(' ');
+
+/**
+ * Source article reference kept on a representative chunk
+ */
+const articleRef = (chunk) => ({
+  articleId: chunk.articleId,
+  title: chunk.title,
+  source: chunk.source,
+  chunkId: chunk.chunkId
+});
+
+/**
+ * Collapse near-duplicate chunks into one representative per group
+ *
+ * Chunks are visited in order; each is compared (exact Jaccard) only with
+ * earlier representatives with the same title that share at least one LSH
+ * band, and joins the most similar one at or above the threshold. Comparing
+ * against representatives rather than any member keeps groups from chaining.
+ * Chunks with fewer than minShingles shingles are neither collapsed nor
+ * used as representatives.
+ *
+ * @param {Object[]} chunks - Chunk objects ({ chunkId, articleId, title, content, ... })
+ * @param {Object} options - { threshold, shingleSize, numHashes, bands, minShingles }
+ * @returns {Object} - { chunks, report }; representatives gain `articles`
+ *   (every source article) and `duplicateChunkIds` when they absorbed others
+ */
+const collapseNearDuplicates = (chunks, options = {}) => {
+  const { threshold, shingleSize, numHashes, bands, minShingles } = { ...DEFAULTS, ...options };
+  const rows = Math.floor(numHashes / bands);
+  if (!(rows >= 1)) {
+    throw new Error(`Cannot split ${numHashes} hashes into ${bands} LSH bands`);
+  }
+  const seeds = Uint32Array.from({ length: bands * rows }, (_, h) => mix(h + 1));
+
+  const buckets = new Map();        // band key -> representative indices
+  const representatives = [];       // { chunk, shingles, members: [chunk] }
+  let comparisons = 0;
+
+  for (const chunk of chunks) {
+    const shingles = shingle(chunkText(chunk), shingleSize);
+    if (shingles.size < minShingles) {
+      representatives.push({ chunk, shingles, members: [chunk] });
+      continue;
+    }
+
+    const signature = minHash(shingles, seeds);
+    const title = titleKey(chunk);
+    const keys = [];
+    for (let b = 0; b < bands; b++) {
+      keys.push(`${title}|${b}:${signature.subarray(b * rows, (b + 1) * rows).join(',')}`);
+    }
+
+    // Best earlier representative among LSH candidates
+    let best = null;
+    let bestSimilarity = threshold;
+    const seen = new Set();
+    for (const key of keys) {
+      for (const index of buckets.get(key) || []) {
+        if (seen.has(index)) {
+          continue;
+        }
+        seen.add(index);
+        comparisons++;
+        const similarity = jaccard(shingles, representatives[index].shingles);
+        if (similarity >= bestSimilarity) {
+          best = index;
+          bestSimilarity = similarity;
+        }
+      }
+    }
+
+    if (best !== null) {
+      representatives[best].members.push(chunk);
+      continue;
+    }
+
+    const index = representatives.length;
+    representatives.push({ chunk, shingles, members: [chunk] });
+    for (const key of keys) {
+      if (!buckets.has(key)) {
+        buckets.set(key, []);
+      }
+      buckets.get(key).push(index);
+    }
+  }
+
+  let groups = 0;
+  const collapsed = representatives.map(({ chunk, members }) => {
+    if (members.length === 1) {
+      return chunk;
+    }
+    groups++;
+    const articles = [];
+    const articleIds = new Set();
+    for (const member of members) {
+      if (!articleIds.has(member.articleId)) {
+        articleIds.add(member.articleId);
+        articles.push(articleRef(member));
+      }
+    }
+    return {
+      ...chunk,
+      tags: [...new Set(members.flatMap(member => member.tags || []))],
+      articles,
+      duplicateChunkIds: members.slice(1).map(member => member.chunkId)
+    };
+  });
+
+  const report = {
+    inputChunks: chunks.length,
+    outputChunks: collapsed.length,
+    collapsedChunks: chunks.length - collapsed.length,
+    groups,
+    threshold,
+    bands,
+    rows,
+    comparisons
+  };
+  return { chunks: collapsed, report };
+};
+
+module.exports = {
+  collapseNearDuplicates,
+  shingle,
+  jaccard
+};
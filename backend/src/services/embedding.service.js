@@ -31,6 +31,29 @@ const generateEmbedding = async (text) => {
   }
 };
 
+/**
+ * Generate embeddings for several texts with a single Ollama call
+ * @param {string[]} texts - Texts to embed
+ * @returns {number[][]} - Embedding vectors in input order
+ */
+const embedMany = async (texts) => {
+  if (texts.length === 0) {
+    return [];
+  }
+
+  try {
+    const response = await ollama.embed({
+      model: EMBEDDING_MODEL,
+      input: texts
+    });
+    
+    return response.embeddings;
+  } catch (error) {
+    console.error('Error generating embeddings:', error.message);
+    throw new Error(`Failed to generate embeddings: ${error.message}`);
+  }
+};
+
 /**
  * Generate embeddings for multiple texts in batch
  * @param {string[]} texts - Array of texts to embed
@@ -98,6 +121,7 @@ const getEmbeddingDimension = async () => {
 module.exports = {
   generateEmbedding,
   generateEmbeddings,
+  embedMany,
   cosineSimilarity,
   getEmbeddingDimension,
   EMBEDDING_MODEL
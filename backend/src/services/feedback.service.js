@@ -1,4 +1,5 @@
 const { Feedback, QueryLog } = require('../models');
+const statsService = require('./stats.service');
 
 /**
  * Submit feedback for a query
@@ -18,9 +19,11 @@ const submitFeedback = async (feedbackData) => {
   const existingFeedback = await Feedback.findOne({ queryLogId: queryId });
   
   if (existingFeedback) {
+    const previousIsHelpful = existingFeedback.isHelpful;
     existingFeedback.isHelpful = isHelpful;
     existingFeedback.comment = comment;
     await existingFeedback.save();
+    await statsService.recordFeedback(isHelpful, previousIsHelpful, new Date());
 
     return {
       feedbackId: existingFeedback._id,
@@ -38,6 +41,7 @@ const submitFeedback = async (feedbackData) => {
   });
 
   await feedback.save();
+  await statsService.recordFeedback(isHelpful, undefined, feedback.createdAt);
 
   return {
     feedbackId: feedback._id,
@@ -47,25 +51,10 @@ const submitFeedback = async (feedbackData) => {
 };
 
 /**
- * Get feedback statistics
+ * Get feedback statistics (read from the incrementally maintained counters)
  * @returns {Object} - Feedback stats
  */
-const getFeedbackStats = async () => {
-  const totalFeedback = await Feedback.countDocuments();
-  const helpfulCount = await Feedback.countDocuments({ isHelpful: true });
-  const notHelpfulCount = await Feedback.countDocuments({ isHelpful: false });
-
-  const helpfulPercentage = totalFeedback > 0 
-    ? ((helpfulCount / totalFeedback) * 100).toFixed(2) 
-    : 0;
-
-  return {
-    totalFeedback,
-    helpful: helpfulCount,
-    notHelpful: notHelpfulCount,
-    helpfulPercentage: `${helpfulPercentage}%`
-  };
-};
+const getFeedbackStats = () => statsService.getFeedbackStats();
 
 module.exports = {
   submitFeedback,
@@ -0,0 +1,254 @@
+/**
+ * Generation Scheduler Service
+ * Admission control for Ollama generation: a concurrency limit, a bounded
+ * priority wait queue (interactive ahead of batch) and 429 rejection with a
+ * Retry-After estimate when the queue is full. A full queue turns away batch
+ * work before interactive requests, and waiters leave the queue when they
+ * time out or their client disconnects.
+ */
+
+const config = require('../config');
+const { metrics } = require('./metrics.service');
+
+// Lower number = served first
+const PRIORITIES = {
+  interactive: 0,
+  batch: 1
+};
+
+/**
+ * Error raised when the generation queue is full (or a waiter was evicted or timed out)
+ */
+class AdmissionError extends Error {
+  constructor(retryAfter, queueDepth) {
+    super('Server is busy generating other answers. Please retry shortly.');
+    this.name = 'AdmissionError';
+    this.statusCode = 429;
+    this.retryAfter = retryAfter;     // seconds
+    this.queueDepth = queueDepth;
+  }
+}
+
+/**
+ * Error raised when a waiter's abort signal fires before it gets a slot
+ */
+class QueueAbortError extends Error {
+  constructor() {
+    super('Request aborted while waiting for a generation slot');
+    this.name = 'AbortError';
+  }
+}
+
+class GenerationScheduler {
+  /**
+   * @param {Object} options - { maxConcurrent, maxQueue, maxWaitMs }
+   */
+  constructor({ maxConcurrent, maxQueue, maxWaitMs = 0 }) {
+    this.maxConcurrent = maxConcurrent;
+    this.maxQueue = maxQueue;
+    this.maxWaitMs = maxWaitMs;   // 0 = wait indefinitely
+    this.active = 0;
+    this.queues = Object.values(PRIORITIES).map(() => []);   // FIFO per priority
+    this.avgDurationMs = 5000;    // EWMA of generation time, seeds Retry-After
+
+    this.rejections = metrics.counter(
+      'rag_generation_rejections_total',
+      'Generation requests turned away with 429, by reason (full, evicted, timeout)'
+    );
+    metrics.gauge('rag_generation_active', 'Ollama generations currently running', () => this.active);
+    metrics.gauge('rag_generation_queue_depth', 'Requests waiting for a generation slot', () =>
+      Object.entries(PRIORITIES).map(([priority, level]) => ({
+        labels: { priority },
+        value: this.queues[level].length
+      }))
+    );
+  }
+
+  /**
+   * Total number of waiting requests
+   * @returns {number}
+   */
+  queueDepth() {
+    return this.queues.reduce((sum, queue) => sum + queue.length, 0);
+  }
+
+  /**
+   * Estimate seconds until a new request would get a slot
+   * @returns {number}
+   */
+  estimateRetryAfter() {
+    const rounds = Math.ceil((this.queueDepth() + 1) / this.maxConcurrent);
+    return Math.max(1, Math.ceil((rounds * this.avgDurationMs) / 1000));
+  }
+
+  /**
+   * Find the newest waiter of a lower priority than level, which a full queue gives up first
+   * @param {number} level - Priority level of the incoming request
+   * @returns {Object|null} - Waiter to evict
+   */
+  _evictionCandidate(level) {
+    for (let lower = this.queues.length - 1; lower > level; lower--) {
+      const queue = this.queues[lower];
+      if (queue.length > 0) {
+        return queue[queue.length - 1];
+      }
+    }
+    return null;
+  }
+
+  /**
+   * Reject early if a request of this priority would be turned away right now
+   * Lets callers skip work (e.g. retrieval) whose answer could not be generated.
+   * @param {string} priority - 'interactive' or 'batch'
+   * @throws {AdmissionError}
+   */
+  checkAdmission(priority = 'interactive') {
+    const level = PRIORITIES[priority] ?? PRIORITIES.interactive;
+    if (this.queueDepth() >= this.maxQueue && !this._evictionCandidate(level)) {
+      this.rejections.inc({ priority, reason: 'full' });
+      throw new AdmissionError(this.estimateRetryAfter(), this.queueDepth());
+    }
+  }
+
+  /**
+   * Wait for a generation slot
+   * @param {string} priority - 'interactive' or 'batch'
+   * @param {AbortSignal} signal - Optional; aborting removes the request from the queue
+   * @returns {Promise<Function>} - Resolves to a release function; rejects with AdmissionError
+   *   (queue full, evicted by a higher priority or waited longer than maxWaitMs) or QueueAbortError
+   */
+  acquire(priority = 'interactive', signal = null) {
+    const level = PRIORITIES[priority] ?? PRIORITIES.interactive;
+
+    if (signal && signal.aborted) {
+      return Promise.reject(new QueueAbortError());
+    }
+
+    if (this.active < this.maxConcurrent && this.queueDepth() === 0) {
+      this.active++;
+      return Promise.resolve(this._releaser());
+    }
+
+    if (this.queueDepth() >= this.maxQueue) {
+      // Only lower-priority waiters make room; interactive requests never lose their place to batch
+      const evicted = this._evictionCandidate(level);
+      if (!evicted) {
+        this.rejections.inc({ priority, reason: 'full' });
+        return Promise.reject(new AdmissionError(this.estimateRetryAfter(), this.queueDepth()));
+      }
+      this._leave(evicted, new AdmissionError(this.estimateRetryAfter(), this.queueDepth()), 'evicted');
+    }
+
+    return new Promise((resolve, reject) => {
+      const waiter = { priority, level, resolve, reject, timer: null, signal, onAbort: null };
+      if (this.maxWaitMs > 0) {
+        waiter.timer = setTimeout(() => {
+          this._leave(waiter, new AdmissionError(this.estimateRetryAfter(), this.queueDepth()), 'timeout');
+        }, this.maxWaitMs);
+      }
+      if (signal) {
+        waiter.onAbort = () => this._leave(waiter, new QueueAbortError());
+        signal.addEventListener('abort', waiter.onAbort, { once: true });
+      }
+      this.queues[level].push(waiter);
+    });
+  }
+
+  /**
+   * Run fn inside a generation slot
+   * @param {Function} fn - Async function to run
+   * @param {string} priority - 'interactive' or 'batch'
+   * @param {AbortSignal} signal - Optional signal that cancels the wait for a slot
+   * @returns {Promise<*>}
+   */
+  async run(fn, priority = 'interactive', signal = null) {
+    const release = await this.acquire(priority, signal);
+    try {
+      return await fn();
+    } finally {
+      release();
+    }
+  }
+
+  _releaser() {
+    const start = Date.now();
+    let released = false;
+    return () => {
+      if (released) {
+        return;
+      }
+      released = true;
+      this.avgDurationMs = 0.8 * this.avgDurationMs + 0.2 * (Date.now() - start);
+      this._next();
+    };
+  }
+
+  _next() {
+    const queue = this.queues.find(q => q.length > 0);
+    if (queue) {
+      // Hand the slot straight to the next waiter
+      const waiter = queue.shift();
+      this._settle(waiter);
+      waiter.resolve(this._releaser());
+    } else {
+      this.active--;
+    }
+  }
+
+  /**
+   * Remove a waiter from its queue and reject it
+   * @param {Object} waiter - Queued waiter
+   * @param {Error} error - Rejection reason
+   * @param {string} reason - Rejection metric label, omitted for aborts
+   */
+  _leave(waiter, error, reason = null) {
+    const queue = this.queues[waiter.level];
+    const index = queue.indexOf(waiter);
+    if (index === -1) {
+      return;
+    }
+    queue.splice(index, 1);
+    this._settle(waiter);
+    if (reason) {
+      this.rejections.inc({ priority: waiter.priority, reason });
+    }
+    waiter.reject(error);
+  }
+
+  _settle(waiter) {
+    clearTimeout(waiter.timer);
+    if (waiter.onAbort) {
+      waiter.signal.removeEventListener('abort', waiter.onAbort);
+    }
+  }
+
+  /**
+   * Get scheduler statistics
+   * @returns {Object}
+   */
+  getStats() {
+    return {
+      active: this.active,
+      maxConcurrent: this.maxConcurrent,
+      queueDepth: this.queueDepth(),
+      maxQueue: this.maxQueue,
+      maxWaitMs: this.maxWaitMs,
+      avgGenerationMs: Math.round(this.avgDurationMs)
+    };
+  }
+}
+
+// Export singleton instance
+const generationScheduler = new GenerationScheduler({
+  maxConcurrent: config.GENERATION.MAX_CONCURRENT,
+  maxQueue: config.GENERATION.MAX_QUEUE,
+  maxWaitMs: config.GENERATION.MAX_WAIT_MS
+});
+
+module.exports = {
+  generationScheduler,
+  GenerationScheduler,
+  AdmissionError,
+  QueueAbortError,
+  PRIORITIES
+};
@@ -1,17 +1,21 @@
 const safetyService = require('./safety.service');
 const askService = require('./ask.service');
 const feedbackService = require('./feedback.service');
+const statsService = require('./stats.service');
 const ragService = require('./rag.service');
 const chunkingService = require('./chunking.service');
 const embeddingService = require('./embedding.service');
 const { vectorStore } = require('./vectorStore.service');
+const { metrics } = require('./metrics.service');
 
 module.exports = {
   safetyService,
   askService,
   feedbackService,
+  statsService,
   ragService,
   chunkingService,
   embeddingService,
-  vectorStore
+  vectorStore,
+  metrics
 };
@@ -0,0 +1,144 @@
+/**
+ * Index Manager Service
+ * Holds the active vector store and swaps in rebuilt ones without downtime.
+ * Requests acquire the store they start with and keep using it; a replaced
+ * store is released once its last in-flight request finishes.
+ */
+
+const { metrics } = require('./metrics.service');
+
+class IndexManager {
+  /**
+   * @param {VectorStore} store - Initially active store
+   */
+  constructor(store) {
+    this.active = this._entry(store);
+    this.generation = 1;          // Swaps since process start
+    this.reloading = null;        // Promise of the running reload
+    this.lastReload = null;       // { reason, status, startedAt, finishedAt, durationMs, error }
+    this.retired = [];            // Replaced entries with requests still in flight
+
+    this.reloads = metrics.counter('rag_index_reloads_total', 'Vector index reloads by outcome');
+    metrics.gauge('rag_index_generation', 'Vector index swaps since process start', () => this.generation);
+    metrics.gauge('rag_index_retired_inflight', 'Requests still running against a replaced index',
+      () => this.retired.reduce((sum, entry) => sum + entry.refs, 0));
+  }
+
+  _entry(store) {
+    return { store, refs: 0, loadedAt: new Date() };
+  }
+
+  /**
+   * Pin the active store for the duration of a request
+   * @returns {Object} - Entry to pass to release(); entry.store is the pinned store
+   */
+  acquire() {
+    const entry = this.active;
+    entry.refs++;
+    return entry;
+  }
+
+  /**
+   * Unpin a store; replaced stores are cleared after their last request
+   * @param {Object} entry - Entry returned by acquire()
+   */
+  release(entry) {
+    entry.refs--;
+    if (entry.refs === 0 && this.retired.includes(entry)) {
+      this._dispose(entry);
+    }
+  }
+
+  /**
+   * Run fn against the active store, keeping it pinned until fn settles
+   * @param {Function} fn - (store) => result
+   * @returns {Promise<*>}
+   */
+  async withStore(fn) {
+    const entry = this.acquire();
+    try {
+      return await fn(entry.store);
+    } finally {
+      this.release(entry);
+    }
+  }
+
+  /**
+   * Atomically make store the active one
+   * @param {VectorStore} store - Fully built or loaded store
+   */
+  swap(store) {
+    const previous = this.active;
+    this.active = this._entry(store);
+    this.generation++;
+
+    if (previous.store !== store) {
+      if (previous.refs === 0) {
+        this._dispose(previous);
+      } else {
+        this.retired.push(previous);
+      }
+    }
+    console.log(`🔁 Vector index swapped (version ${store.sourceVersion || 'unknown'}, ${store.vectors.length} vectors)`);
+  }
+
+  _dispose(entry) {
+    this.retired = this.retired.filter(e => e !== entry);
+    entry.store.clear();
+  }
+
+  /**
+   * Run a reload unless one is already running, in which case join it
+   * @param {string} reason - Why the reload was triggered (for status/logs)
+   * @param {Function} build - Async function returning the new store
+   * @returns {Promise<Object>} - Reload status
+   */
+  reload(reason, build) {
+    if (this.reloading) {
+      return this.reloading;
+    }
+
+    const startedAt = new Date();
+    this.lastReload = { reason, status: 'running', startedAt };
+    console.log(`🔄 Reloading vector index (${reason})...`);
+
+    this.reloading = (async () => {
+      try {
+        const store = await build();
+        this.swap(store);
+        this.lastReload = { ...this.lastReload, status: 'succeeded' };
+        this.reloads.inc({ outcome: 'success' });
+      } catch (error) {
+        console.error('❌ Vector index reload failed, keeping current index:', error.message);
+        this.lastReload = { ...this.lastReload, status: 'failed', error: error.message };
+        this.reloads.inc({ outcome: 'error' });
+      } finally {
+        const finishedAt = new Date();
+        this.lastReload = { ...this.lastReload, finishedAt, durationMs: finishedAt - startedAt };
+        this.reloading = null;
+      }
+      return this.lastReload;
+    })();
+
+    return this.reloading;
+  }
+
+  /**
+   * Get index version and reload state
+   * @returns {Object}
+   */
+  getStatus() {
+    return {
+      version: this.active.store.sourceVersion || null,
+      generation: this.generation,
+      loadedAt: this.active.loadedAt.toISOString(),
+      reloading: Boolean(this.reloading),
+      retiredInFlight: this.retired.reduce((sum, entry) => sum + entry.refs, 0),
+      lastReload: this.lastReload
+    };
+  }
+}
+
+module.exports = {
+  IndexManager
+};
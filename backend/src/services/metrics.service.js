@@ -0,0 +1,240 @@
+/**
+ * Metrics Service
+ * High-resolution stage timers and a small Prometheus-compatible registry
+ * (histograms, counters and gauges) served from GET /metrics
+ */
+
+// Default latency buckets in seconds (5ms .. 60s)
+const DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60];
+
+/**
+ * Format a label set as a Prometheus label string
+ * @param {Object} labels - Label name/value pairs
+ * @returns {string} - e.g. {stage="embed"}
+ */
+const formatLabels = (labels = {}) => {
+  const entries = Object.entries(labels);
+  if (entries.length === 0) {
+    return '';
+  }
+  const body = entries
+    .map(([key, value]) => `${key}="${String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`)
+    .join(',');
+  return `{${body}}`;
+};
+
+class Histogram {
+  constructor(name, help, buckets = DEFAULT_BUCKETS) {
+    this.name = name;
+    this.help = help;
+    this.buckets = buckets;
+    this.series = new Map();   // label string -> { labels, counts, sum, count }
+  }
+
+  /**
+   * Record an observation
+   * @param {number} value - Observed value (seconds for latency histograms)
+   * @param {Object} labels - Label set
+   */
+  observe(value, labels = {}) {
+    const key = formatLabels(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { labels, counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+
+    for (let i = 0; i < this.buckets.length; i++) {
+      if (value <= this.buckets[i]) {
+        series.counts[i]++;
+      }
+    }
+    series.sum += value;
+    series.count++;
+  }
+
+  render() {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const { labels, counts, sum, count } of this.series.values()) {
+      this.buckets.forEach((bucket, i) => {
+        lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: bucket })} ${counts[i]}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: '+Inf' })} ${count}`);
+      lines.push(`${this.name}_sum${formatLabels(labels)} ${sum}`);
+      lines.push(`${this.name}_count${formatLabels(labels)} ${count}`);
+    }
+    return lines.join('\n');
+  }
+}
+
+class Counter {
+  constructor(name, help) {
+    this.name = name;
+    this.help = help;
+    this.values = new Map();   // label string -> { labels, value }
+  }
+
+  /**
+   * Increment the counter
+   * @param {Object} labels - Label set
+   * @param {number} amount - Increment (default 1)
+   */
+  inc(labels = {}, amount = 1) {
+    const key = formatLabels(labels);
+    const entry = this.values.get(key) || { labels, value: 0 };
+    entry.value += amount;
+    this.values.set(key, entry);
+  }
+
+  /**
+   * Current value for a label set
+   * @param {Object} labels - Label set
+   * @returns {number}
+   */
+  get(labels = {}) {
+    const entry = this.values.get(formatLabels(labels));
+    return entry ? entry.value : 0;
+  }
+
+  render() {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const { labels, value } of this.values.values()) {
+      lines.push(`${this.name}${formatLabels(labels)} ${value}`);
+    }
+    return lines.join('\n');
+  }
+}
+
+class Gauge {
+  /**
+   * @param {string} name - Metric name
+   * @param {string} help - Help text
+   * @param {Function} collect - Returns a number, or an array of { labels, value }
+   */
+  constructor(name, help, collect) {
+    this.name = name;
+    this.help = help;
+    this.collect = collect;
+  }
+
+  render() {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} gauge`];
+    let samples;
+    try {
+      const result = this.collect();
+      samples = Array.isArray(result) ? result : [{ labels: {}, value: result }];
+    } catch (error) {
+      samples = [];
+    }
+    for (const { labels, value } of samples) {
+      lines.push(`${this.name}${formatLabels(labels)} ${Number(value) || 0}`);
+    }
+    return lines.join('\n');
+  }
+}
+
+class MetricsRegistry {
+  constructor() {
+    this.metrics = new Map();
+  }
+
+  histogram(name, help, buckets) {
+    if (!this.metrics.has(name)) {
+      this.metrics.set(name, new Histogram(name, help, buckets));
+    }
+    return this.metrics.get(name);
+  }
+
+  counter(name, help) {
+    if (!this.metrics.has(name)) {
+      this.metrics.set(name, new Counter(name, help));
+    }
+    return this.metrics.get(name);
+  }
+
+  gauge(name, help, collect) {
+    const gauge = new Gauge(name, help, collect);
+    this.metrics.set(name, gauge);
+    return gauge;
+  }
+
+  /**
+   * Render all metrics in Prometheus text exposition format
+   * @returns {string}
+   */
+  render() {
+    return [...this.metrics.values()].map(metric => metric.render()).join('\n\n') + '\n';
+  }
+}
+
+// Export singleton registry
+const metrics = new MetricsRegistry();
+
+const stageDuration = metrics.histogram(
+  'rag_stage_duration_seconds',
+  'Duration of each /api/ask pipeline stage in seconds'
+);
+
+/**
+ * Collects per-stage timings for a single request using process.hrtime
+ */
+class StageTimer {
+  constructor() {
+    this.start = process.hrtime.bigint();
+    this.stages = {};
+  }
+
+  /**
+   * Time an async (or sync) function as a named stage
+   * @param {string} stage - Stage name
+   * @param {Function} fn - Function to run
+   * @returns {Promise<*>} - The function's result
+   */
+  async time(stage, fn) {
+    const begin = process.hrtime.bigint();
+    try {
+      return await fn();
+    } finally {
+      this.record(stage, begin);
+    }
+  }
+
+  /**
+   * Record a stage that started at `begin`
+   * @param {string} stage - Stage name
+   * @param {bigint} begin - process.hrtime.bigint() at stage start
+   */
+  record(stage, begin) {
+    const ms = Number(process.hrtime.bigint() - begin) / 1e6;
+    this.stages[stage] = (this.stages[stage] || 0) + ms;
+    stageDuration.observe(ms / 1000, { stage });
+  }
+
+  /**
+   * Milliseconds elapsed since the timer was created
+   * @returns {number}
+   */
+  elapsed() {
+    return Number(process.hrtime.bigint() - this.start) / 1e6;
+  }
+
+  /**
+   * Stage breakdown in milliseconds, rounded to 0.01ms
+   * @returns {Object}
+   */
+  toJSON() {
+    const breakdown = {};
+    for (const [stage, ms] of Object.entries(this.stages)) {
+      breakdown[stage] = Math.round(ms * 100) / 100;
+    }
+    breakdown.total = Math.round(this.elapsed() * 100) / 100;
+    return breakdown;
+  }
+}
+
+module.exports = {
+  metrics,
+  MetricsRegistry,
+  StageTimer,
+  DEFAULT_BUCKETS
+};
@@ -0,0 +1,188 @@
+/**
+ * Quantization Service
+ * Compact embedding encodings for the vector store: float32, float16 and
+ * int8 (with per-vector or per-dimension scales)
+ */
+
+const PRECISIONS = ['float64', 'float32', 'float16', 'int8'];
+
+// Bytes per vector component for each precision
+const BYTES_PER_COMPONENT = {
+  float64: 8,
+  float32: 4,
+  float16: 2,
+  int8: 1
+};
+
+// Typed array used to hold the codes of each precision
+const CODE_ARRAYS = {
+  float32: Float32Array,
+  float16: Uint16Array,
+  int8: Int8Array
+};
+
+const f32 = new Float32Array(1);
+const u32 = new Uint32Array(f32.buffer);
+
+/**
+ * Convert a number to IEEE 754 half-precision bits (round to nearest even)
+ * @param {number} value - Value to encode
+ * @returns {number} - 16-bit pattern
+ */
+const toFloat16Bits = (value) => {
+  f32[0] = value;
+  const x = u32[0];
+  const sign = (x >>> 16) & 0x8000;
+  const exponent = (x >>> 23) & 0xff;
+  let mantissa = x & 0x7fffff;
+
+  // NaN / Infinity
+  if (exponent === 0xff) {
+    return sign | 0x7c00 | (mantissa ? 0x200 : 0);
+  }
+
+  const halfExponent = exponent - 127 + 15;
+  if (halfExponent >= 0x1f) {
+    return sign | 0x7c00;   // Overflow to infinity
+  }
+
+  if (halfExponent <= 0) {
+    // Subnormal half or zero
+    if (halfExponent < -10) {
+      return sign;
+    }
+    mantissa |= 0x800000;
+    const shift = 14 - halfExponent;
+    let half = mantissa >> shift;
+    const remainder = mantissa & ((1 << shift) - 1);
+    const halfway = 1 << (shift - 1);
+    if (remainder > halfway || (remainder === halfway && (half & 1))) {
+      half++;
+    }
+    return sign | half;
+  }
+
+  let half = sign | (halfExponent << 10) | (mantissa >> 13);
+  const remainder = mantissa & 0x1fff;
+  if (remainder > 0x1000 || (remainder === 0x1000 && (half & 1))) {
+    half++;   // May carry into the exponent, which is the correct rounding
+  }
+  return half;
+};
+
+/**
+ * Decode half-precision bits to a number
+ * @param {number} bits - 16-bit pattern
+ * @returns {number}
+ */
+const fromFloat16Bits = (bits) => {
+  const sign = bits & 0x8000 ? -1 : 1;
+  const exponent = (bits >> 10) & 0x1f;
+  const mantissa = bits & 0x3ff;
+
+  if (exponent === 0) {
+    return sign * mantissa * 2 ** -24;
+  }
+  if (exponent === 0x1f) {
+    return mantissa ? NaN : sign * Infinity;
+  }
+  return sign * (1 + mantissa / 1024) * 2 ** (exponent - 15);
+};
+
+// Lookup table: half bits -> float value (256 KB, built once)
+const FLOAT16_TABLE = new Float32Array(65536);
+for (let bits = 0; bits < 65536; bits++) {
+  FLOAT16_TABLE[bits] = fromFloat16Bits(bits);
+}
+
+/**
+ * Quantize a contiguous float32 matrix
+ * @param {Float32Array} full - n * dimension values, row-major
+ * @param {number} count - Number of vectors
+ * @param {number} dimension - Vector dimension
+ * @param {string} precision - 'float32' | 'float16' | 'int8'
+ * @param {string} int8Scale - 'vector' or 'dimension' (int8 only)
+ * @returns {Object} - { codes, scales, dimScales, norms }
+ */
+const quantizeMatrix = (full, count, dimension, precision, int8Scale = 'vector') => {
+  const CodeArray = CODE_ARRAYS[precision];
+  if (!CodeArray) {
+    throw new Error(`Unsupported vector precision: ${precision}`);
+  }
+
+  const codes = precision === 'float32' ? full : new CodeArray(count * dimension);
+  const scales = new Float32Array(count).fill(1);
+  const norms = new Float32Array(count);
+  let dimScales = null;
+
+  if (precision === 'float16') {
+    for (let i = 0; i < full.length; i++) {
+      codes[i] = toFloat16Bits(full[i]);
+    }
+  } else if (precision === 'int8' && int8Scale === 'dimension') {
+    // One scale per dimension: max |value| over all vectors maps to 127
+    dimScales = new Float32Array(dimension);
+    for (let i = 0; i < count; i++) {
+      for (let d = 0; d < dimension; d++) {
+        dimScales[d] = Math.max(dimScales[d], Math.abs(full[i * dimension + d]));
+      }
+    }
+    for (let d = 0; d < dimension; d++) {
+      dimScales[d] = dimScales[d] / 127 || 1;
+    }
+    for (let i = 0; i < count; i++) {
+      for (let d = 0; d < dimension; d++) {
+        codes[i * dimension + d] = Math.round(full[i * dimension + d] / dimScales[d]);
+      }
+    }
+  } else if (precision === 'int8') {
+    // One scale per vector: max |value| of the vector maps to 127
+    for (let i = 0; i < count; i++) {
+      let max = 0;
+      for (let d = 0; d < dimension; d++) {
+        max = Math.max(max, Math.abs(full[i * dimension + d]));
+      }
+      const scale = max / 127 || 1;
+      scales[i] = scale;
+      for (let d = 0; d < dimension; d++) {
+        codes[i * dimension + d] = Math.round(full[i * dimension + d] / scale);
+      }
+    }
+  }
+
+  // Norms of the dequantized vectors, so cosine scores are self-consistent
+  for (let i = 0; i < count; i++) {
+    let norm = 0;
+    for (let d = 0; d < dimension; d++) {
+      const value = dequantize(codes, i * dimension + d, precision, scales[i], dimScales ? dimScales[d] : 1);
+      norm += value * value;
+    }
+    norms[i] = Math.sqrt(norm);
+  }
+
+  return { codes, scales, dimScales, norms };
+};
+
+/**
+ * Decode one quantized component
+ * @returns {number}
+ */
+const dequantize = (codes, offset, precision, scale = 1, dimScale = 1) => {
+  if (precision === 'float16') {
+    return FLOAT16_TABLE[codes[offset]];
+  }
+  if (precision === 'int8') {
+    return codes[offset] * scale * dimScale;
+  }
+  return codes[offset];
+};
+
+module.exports = {
+  PRECISIONS,
+  BYTES_PER_COMPONENT,
+  CODE_ARRAYS,
+  FLOAT16_TABLE,
+  toFloat16Bits,
+  fromFloat16Bits,
+  quantizeMatrix
+};
@@ -3,13 +3,24 @@
  * Main Retrieval-Augmented Generation pipeline
  */
 
+const cluster = require('cluster');
+const crypto = require('crypto');
 const fs = require('fs');
 const path = require('path');
+const readline = require('readline');
 const { chunkAllArticles } = require('./chunking.service');
-const { generateEmbedding, generateEmbeddings, getEmbeddingDimension } = require('./embedding.service');
-const { vectorStore } = require('./vectorStore.service');
+const { collapseNearDuplicates } = require('./deduplication.service');
+const { generateEmbedding, generateEmbeddings, embedMany, getEmbeddingDimension } = require('./embedding.service');
+const { vectorStore, VectorStore } = require('./vectorStore.service');
+const { IndexManager } = require('./indexManager.service');
 const config = require('../config');
 
+// Active index; rebuilt indexes are swapped in without downtime
+const indexManager = new IndexManager(vectorStore);
+
+const WATCH_INTERVAL_MS = 2000;
+const WATCH_DEBOUNCE_MS = 1000;
+
 // Path to knowledge base
 const KNOWLEDGE_BASE_PATH = path.join(__dirname, '../../../rag/knowledge_base/articles.json');
 
@@ -30,38 +41,126 @@ const loadKnowledgeBase = () => {
 };
 
 /**
- * Initialize the RAG pipeline
- * Creates chunks and embeddings for all articles
+ * Load pre-chunked articles from shards written by rag/tools/ingest.py
+ * Shards are JSONL files listed in manifest.json and are read line by line
+ * @param {string} shardsDir - Directory containing manifest.json and shards
+ * @returns {Promise<Object[]>} - Array of chunk objects
  */
-const initializeRAG = async () => {
-  console.log('🚀 Initializing RAG pipeline...');
-  
-  // Check if index already exists
-  if (vectorStore.load()) {
-    console.log('✅ Using existing vector index');
-    return vectorStore.getStats();
+const loadChunkShards = async (shardsDir) => {
+  const manifestPath = path.join(shardsDir, 'manifest.json');
+  const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf-8'));
+  const chunks = [];
+
+  for (const shard of manifest.shards) {
+    const lines = readline.createInterface({
+      input: fs.createReadStream(path.join(shardsDir, shard.file), { encoding: 'utf-8' }),
+      crlfDelay: Infinity
+    });
+
+    for await (const line of lines) {
+      if (line.trim()) {
+        chunks.push(JSON.parse(line));
+      }
+    }
+  }
+
+  console.log(`📦 Loaded ${chunks.length} chunks from ${manifest.shards.length} shard(s)`);
+  return chunks;
+};
+
+/**
+ * Check whether chunk shards are configured and present
+ * @returns {boolean}
+ */
+const chunkShardsAvailable = () => {
+  const shardsDir = config.RAG.CHUNK_SHARDS_DIR;
+  return Boolean(shardsDir) && fs.existsSync(path.join(shardsDir, 'manifest.json'));
+};
+
+/**
+ * Path of the file whose contents define the index (shard manifest or articles.json)
+ * @returns {string}
+ */
+const sourcePath = () => (chunkShardsAvailable()
+  ? path.join(config.RAG.CHUNK_SHARDS_DIR, 'manifest.json')
+  : KNOWLEDGE_BASE_PATH);
+
+/**
+ * Version of the knowledge base: short hash of its source file
+ * @returns {string|null}
+ */
+const computeSourceVersion = () => {
+  try {
+    return crypto.createHash('sha256').update(fs.readFileSync(sourcePath())).digest('hex').slice(0, 12);
+  } catch (error) {
+    return null;
+  }
+};
+
+/**
+ * Load chunks from shards when configured, otherwise chunk the knowledge base
+ * @returns {Promise<Object[]>}
+ */
+const loadChunks = async () => {
+  if (chunkShardsAvailable()) {
+    return loadChunkShards(config.RAG.CHUNK_SHARDS_DIR);
   }
-  
-  // Load knowledge base
   const articles = loadKnowledgeBase();
-  
-  // Chunk articles
-  const chunks = chunkAllArticles(articles, {
+  return chunkAllArticles(articles, {
     chunkSize: 500,
     chunkOverlap: 50
   });
+};
+
+/**
+ * Chunk, embed, quantize and save an index into store
+ * Near-duplicate chunks are collapsed before embedding, and embeddings of
+ * chunks whose text is unchanged are copied from previous.
+ * @param {VectorStore} store - Empty store to build into
+ * @param {VectorStore|null} previous - Store to reuse embeddings from
+ * @returns {Promise<Object>} - Store stats
+ */
+const buildIndex = async (store, previous = null) => {
+  const sourceVersion = computeSourceVersion();
+  let chunks = await loadChunks();
+  
+  // Collapse near-duplicates so each group costs one embedding and one vector
+  let deduplication = null;
+  if (config.RAG.DEDUP) {
+    ({ chunks, report: deduplication } = collapseNearDuplicates(chunks, {
+      threshold: config.RAG.DEDUP_THRESHOLD
+    }));
+  }
   
   // Get embedding dimension
   const dimension = await getEmbeddingDimension();
-  vectorStore.initialize(dimension);
+  store.initialize(dimension);
   
-  // Generate embeddings for all chunks
-  console.log('🔄 Generating embeddings for chunks...');
   const texts = chunks.map(chunk => 
     `${chunk.title}\n${chunk.content}`
   );
   
-  const embeddings = await generateEmbeddings(texts);
+  // Reuse embeddings of unchanged chunks from the previous index
+  const embeddings = new Array(texts.length).fill(null);
+  if (previous && previous.vectors.length > 0 && previous.dimension === dimension) {
+    const previousByText = new Map();
+    previous.vectors.forEach((item, i) => {
+      previousByText.set(`${item.metadata.title}\n${item.metadata.content}`, i);
+    });
+    texts.forEach((text, i) => {
+      const index = previousByText.get(text);
+      const embedding = index === undefined ? null : previous.fullPrecisionEmbedding(index);
+      embeddings[i] = embedding ? Array.from(embedding) : null;
+    });
+  }
+  
+  // Generate embeddings for the remaining chunks
+  const missing = texts.map((_, i) => i).filter(i => embeddings[i] === null);
+  console.log(`🔄 Generating embeddings for ${missing.length} chunks (${texts.length - missing.length} reused)...`);
+  const generated = missing.length > 0 ? await generateEmbeddings(missing.map(i => texts[i])) : [];
+  missing.forEach((chunkIndex, i) => {
+    embeddings[chunkIndex] = generated[i];
+  });
   
   // Add to vector store
   const vectorItems = chunks.map((chunk, index) => ({
@@ -76,76 +175,250 @@ const initializeRAG = async () => {
       tags: chunk.tags,
       source: chunk.source,
       difficulty: chunk.difficulty,
-      safetyNotes: chunk.safetyNotes
+      safetyNotes: chunk.safetyNotes,
+      articles: chunk.articles,
+      duplicateChunkIds: chunk.duplicateChunkIds
     }
   }));
   
-  vectorStore.addVectors(vectorItems);
+  store.addVectors(vectorItems);
+  
+  // Convert to the configured storage precision (no-op for float64)
+  store.quantize();
+  
+  if (deduplication) {
+    const bytesPerVector = store.vectors.length > 0 ? store.embeddingBytes() / store.vectors.length : 0;
+    store.deduplication = {
+      ...deduplication,
+      embeddingsSaved: deduplication.collapsedChunks,
+      vectorsSaved: deduplication.collapsedChunks,
+      vectorBytesSaved: Math.round(deduplication.collapsedChunks * bytesPerVector)
+    };
+    console.log(`🧹 Collapsed ${deduplication.collapsedChunks} near-duplicate chunks into ${deduplication.groups} groups ` +
+      `(${deduplication.collapsedChunks} embeddings and vectors saved, ${(store.deduplication.vectorBytesSaved / 1024).toFixed(1)} KB)`);
+  }
   
   // Save index
-  vectorStore.save();
+  store.sourceVersion = sourceVersion;
+  store.save();
+  
+  // A paged index serves from the block files just written, not the built copy
+  if (store.mapIndex && store.quantized) {
+    store.load();
+  }
+  
+  return store.getStats();
+};
+
+/**
+ * Initialize the RAG pipeline
+ * Loads the saved index, or creates chunks and embeddings for all articles.
+ * A saved index built from an older knowledge base is reported as stale and,
+ * unless rebuildStale is false, keeps serving while a fresh one is rebuilt
+ * in the background.
+ * @param {Object} options - { rebuildStale }
+ * @returns {Promise<Object>} - Store stats plus { stale }
+ */
+const initializeRAG = async ({ rebuildStale = true } = {}) => {
+  console.log('🚀 Initializing RAG pipeline...');
+  const store = getActiveStore();
+  
+  // Check if index already exists
+  if (store.load()) {
+    console.log('✅ Using existing vector index');
+    const currentVersion = computeSourceVersion();
+    const stale = store.sourceVersion !== currentVersion;
+    if (stale) {
+      console.log(`📝 Knowledge base changed since the index was built (${store.sourceVersion || 'unknown'} → ${currentVersion})`);
+      if (rebuildStale && !cluster.isWorker) {
+        reloadIndex('knowledge base changed while stopped');
+      }
+    }
+    return { ...store.getStats(), stale };
+  }
+  
+  await buildIndex(store);
   
   console.log('✅ RAG pipeline initialized successfully');
-  return vectorStore.getStats();
+  return { ...store.getStats(), stale: false };
 };
 
+/**
+ * Get the currently active vector store
+ * @returns {VectorStore}
+ */
+const getActiveStore = () => indexManager.active.store;
+
+/**
+ * Rebuild the index in the background and swap it in when complete
+ * Requests keep using the current index until the swap; concurrent calls
+ * join the running rebuild.
+ * @param {string} reason - Trigger, for logs and status
+ * @returns {Promise<Object>} - Reload status
+ */
+const reloadIndex = (reason = 'manual') => indexManager.reload(reason, async () => {
+  let previous = getActiveStore();
+  if (previous.vectors.length === 0) {
+    // e.g. the cluster primary, which does not keep the index in memory
+    previous = new VectorStore();
+    if (!previous.load()) {
+      previous = null;
+    }
+  }
+
+  const next = new VectorStore();
+  await buildIndex(next, previous);
+  if (previous && previous !== getActiveStore()) {
+    previous.clear();
+  }
+  return next;
+});
+
+/**
+ * Swap in the index saved on disk (cluster workers, after the primary rebuilt it)
+ * @param {string} reason - Trigger, for logs and status
+ * @returns {Promise<Object>} - Reload status
+ */
+const loadSavedIndex = (reason = 'index rebuilt') => indexManager.reload(reason, async () => {
+  const next = new VectorStore();
+  if (!next.load()) {
+    throw new Error('Vector index not found');
+  }
+  return next;
+});
+
+/**
+ * Rebuild whenever the knowledge base (or shard manifest) changes on disk
+ * Polls with fs.watchFile, which also works for editors that replace the file.
+ * @param {Function} onChange - Called instead of reloadIndex when supplied
+ */
+const watchKnowledgeBase = (onChange = () => reloadIndex('knowledge base changed')) => {
+  const watched = sourcePath();
+  let timeout = null;
+
+  fs.watchFile(watched, { interval: WATCH_INTERVAL_MS }, (current, previous) => {
+    if (current.mtimeMs === previous.mtimeMs) {
+      return;
+    }
+    clearTimeout(timeout);
+    timeout = setTimeout(() => {
+      if (computeSourceVersion() !== getActiveStore().sourceVersion) {
+        onChange();
+      }
+    }, WATCH_DEBOUNCE_MS);
+  });
+  console.log(`👀 Watching ${watched} for knowledge base changes`);
+};
+
+/**
+ * Run a function as a timed stage when a StageTimer is supplied
+ * @param {StageTimer|null} timer - Optional per-request timer
+ * @param {string} stage - Stage name
+ * @param {Function} fn - Function to run
+ * @returns {Promise<*>}
+ */
+const timed = (timer, stage, fn) => (timer ? timer.time(stage, fn) : Promise.resolve().then(fn));
+
 /**
  * Retrieve relevant chunks for a query
  * @param {string} query - User query
  * @param {number} topK - Number of chunks to retrieve
+ * @param {StageTimer} timer - Optional timer for the embed / vectorSearch stages
  * @returns {Object[]} - Retrieved chunks with scores
  */
-const retrieveChunks = async (query, topK = 5) => {
+const retrieveChunks = async (query, topK = 5, timer = null) => indexManager.withStore(async (store) => {
   // Ensure vector store is loaded
-  if (vectorStore.vectors.length === 0) {
-    if (!vectorStore.load()) {
+  if (store.vectors.length === 0) {
+    if (!store.load()) {
       throw new Error('Vector index not found. Please initialize the RAG pipeline first.');
     }
   }
   
   // Generate query embedding
-  const queryEmbedding = await generateEmbedding(query);
+  const queryEmbedding = await timed(timer, 'embed', () => generateEmbedding(query));
   
   // Search vector store
-  const results = vectorStore.search(
+  const results = await timed(timer, 'vectorSearch', () => store.searchAsync(
     queryEmbedding, 
     topK, 
     config.RAG.SIMILARITY_THRESHOLD
-  );
+  ));
   
   // Format results
-  return results.map(r => ({
-    chunkId: r.metadata.chunkId,
-    title: r.metadata.title,
-    content: r.metadata.content,
-    source: r.metadata.source,
-    category: r.metadata.category,
-    difficulty: r.metadata.difficulty,
-    safetyNotes: r.metadata.safetyNotes,
-    similarityScore: Math.round(r.score * 100) / 100
-  }));
-};
+  return results.map(formatSearchResult);
+});
+
+/**
+ * Convert a vector store hit into a retrieved chunk
+ * @param {Object} r - Search result { id, score, metadata }
+ * @returns {Object} - Retrieved chunk with similarity score
+ */
+const formatSearchResult = (r) => ({
+  chunkId: r.metadata.chunkId,
+  articleId: r.metadata.articleId,
+  title: r.metadata.title,
+  content: r.metadata.content,
+  source: r.metadata.source,
+  category: r.metadata.category,
+  difficulty: r.metadata.difficulty,
+  safetyNotes: r.metadata.safetyNotes,
+  similarityScore: Math.round(r.score * 100) / 100
+});
 
 /**
  * Retrieve context with formatted sources for user display
  * @param {string} query - User query
  * @param {number} topK - Number of chunks to retrieve
+ * @param {StageTimer} timer - Optional per-request stage timer
  * @returns {Object} - Object containing chunks, context string, and formatted sources array
  */
-const retrieveContext = async (query, topK = 5) => {
+const retrieveContext = async (query, topK = 5, timer = null) => {
   // Retrieve chunks
-  const chunks = await retrieveChunks(query, topK);
+  const chunks = await retrieveChunks(query, topK, timer);
   
+  return timed(timer, 'contextBuild', () => buildRetrievalResult(chunks));
+};
+
+/**
+ * Retrieve context for several queries with one embedding call and one index pass
+ * @param {string[]} queries - User queries
+ * @param {number} topK - Number of chunks to retrieve per query
+ * @param {StageTimer} timer - Optional stage timer
+ * @returns {Object[]} - Per-query { chunks, context, sources }
+ */
+const retrieveContextBatch = async (queries, topK = 5, timer = null) => indexManager.withStore(async (store) => {
+  if (store.vectors.length === 0) {
+    if (!store.load()) {
+      throw new Error('Vector index not found. Please initialize the RAG pipeline first.');
+    }
+  }
+
+  const queryEmbeddings = await timed(timer, 'embed', () => embedMany(queries));
+
+  const results = await timed(timer, 'vectorSearch', () => store.searchBatchAsync(
+    queryEmbeddings,
+    topK,
+    config.RAG.SIMILARITY_THRESHOLD
+  ));
+
+  return timed(timer, 'contextBuild', () =>
+    results.map(hits => buildRetrievalResult(hits.map(formatSearchResult)))
+  );
+});
+
+/**
+ * Build the LLM context string and source references for retrieved chunks
+ * Sources only reference chunks; clients fetch details with getChunkDetail.
+ * @param {Object[]} chunks - Retrieved chunks
+ * @returns {Object} - Object containing chunks, context string, and sources array
+ */
+const buildRetrievalResult = (chunks) => {
   // Build context string for LLM
   const context = buildContext(chunks);
   
-  // Format sources for user display
-  const sources = chunks.map((chunk, index) => ({
-    id: index + 1,
-    title: chunk.title,
+  // Compact source references, in rank order
+  const sources = chunks.map(chunk => ({
     chunkId: chunk.chunkId,
-    category: chunk.category,
-    source: chunk.source,
     relevance: Math.round(chunk.similarityScore * 100)
   }));
   
@@ -218,14 +491,54 @@ Please provide a helpful, accurate, and safe response based on your yoga knowled
   return { systemPrompt, userPrompt };
 };
 
+/**
+ * Get the full detail of an indexed chunk
+ * Ids of near-duplicates collapsed at build time resolve to their representative.
+ * @param {string} chunkId - Chunk identifier
+ * @returns {Object|null} - Chunk detail, or null when it is not in the index
+ */
+const getChunkDetail = (chunkId) => {
+  const store = getActiveStore();
+  if (store.vectors.length === 0 && !store.load()) {
+    return null;
+  }
+
+  const item = store.getById(chunkId);
+  if (!item) {
+    return null;
+  }
+
+  const metadata = item.metadata;
+  return {
+    chunkId: metadata.chunkId,
+    articleId: metadata.articleId,
+    title: metadata.title,
+    content: metadata.content,
+    category: metadata.category,
+    tags: metadata.tags || [],
+    source: metadata.source,
+    difficulty: metadata.difficulty,
+    safetyNotes: metadata.safetyNotes,
+    // Every article the chunk appears in (more than one after near-duplicate collapse)
+    articles: metadata.articles || [{
+      articleId: metadata.articleId,
+      title: metadata.title,
+      source: metadata.source,
+      chunkId: metadata.chunkId
+    }]
+  };
+};
+
 /**
  * Get RAG pipeline status
  * @returns {Object} - Status information
  */
 const getRAGStatus = () => {
+  const store = getActiveStore();
   return {
-    initialized: vectorStore.vectors.length > 0 || vectorStore.indexExists(),
-    ...vectorStore.getStats()
+    initialized: store.vectors.length > 0 || store.indexExists(),
+    ...store.getStats(),
+    index: indexManager.getStatus()
   };
 };
 
@@ -233,8 +546,15 @@ module.exports = {
   initializeRAG,
   retrieveChunks,
   retrieveContext,
+  retrieveContextBatch,
   buildContext,
   buildRAGPrompt,
   getRAGStatus,
-  loadKnowledgeBase
+  getChunkDetail,
+  getActiveStore,
+  reloadIndex,
+  loadSavedIndex,
+  watchKnowledgeBase,
+  loadKnowledgeBase,
+  loadChunkShards
 };
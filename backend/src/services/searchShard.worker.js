@@ -0,0 +1,50 @@
+/**
+ * Search Shard Worker
+ * Scores one contiguous range of vectors held in shared memory and returns
+ * the local top candidates for each query. Scoring matches
+ * VectorStore._score, so merged results equal a single-threaded search.
+ */
+
+const { parentPort, workerData } = require('worker_threads');
+const { FLOAT16_TABLE } = require('./quantization.service');
+const { TopK } = require('./topK.service');
+
+const { codes, norms, scales, precision, dimension, shard, start, end } = workerData;
+
+/**
+ * Cosine similarity of a prepared query against stored vector v
+ */
+const score = (query, queryNorm, v) => {
+  const offset = v * dimension;
+  let dot = 0;
+  if (precision === 'float16') {
+    for (let d = 0; d < dimension; d++) {
+      dot += query[d] * FLOAT16_TABLE[codes[offset + d]];
+    }
+  } else {
+    for (let d = 0; d < dimension; d++) {
+      dot += query[d] * codes[offset + d];
+    }
+  }
+  if (precision === 'int8') {
+    dot *= scales[v];
+  }
+  if (queryNorm === 0 || norms[v] === 0) {
+    return 0;
+  }
+  return dot / (queryNorm * norms[v]);
+};
+
+parentPort.on('message', ({ id, queries, queryNorms, cutoff, limit }) => {
+  const results = queries.map((query, q) => {
+    const top = new TopK(limit);
+    for (let v = start; v < end; v++) {
+      const s = score(query, queryNorms[q], v);
+      if (s >= cutoff) {
+        top.push(v, s);
+      }
+    }
+    return top.sorted();
+  });
+  parentPort.postMessage({ id, shard, results });
+});
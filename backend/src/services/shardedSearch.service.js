@@ -0,0 +1,139 @@
+/**
+ * Sharded Search Service
+ * Exact vector search split across a pool of worker threads. The vectors
+ * live in SharedArrayBuffers that every shard reads without copying; each
+ * shard scores its contiguous range and returns a local top-k, and the main
+ * thread only merges shards * k candidates, so the event loop stays free
+ * while a large index is scanned.
+ */
+
+const path = require('path');
+const { Worker } = require('worker_threads');
+const { metrics } = require('./metrics.service');
+
+const WORKER_PATH = path.join(__dirname, 'searchShard.worker.js');
+
+const shardSearches = metrics.counter('rag_shard_searches_total', 'Query batches scored on worker-thread shards');
+
+class SearchShardPool {
+  /**
+   * @param {Object} shared - Shared vector block from VectorStore.shareMemory()
+   *   { codes, norms, scales, precision, dimension, count }
+   * @param {number} shardCount - Number of worker threads
+   */
+  constructor(shared, shardCount) {
+    const count = shared.count;
+    this.shardCount = Math.max(1, Math.min(shardCount, count));
+    this.pending = new Map();     // id -> { remaining, results (by shard), resolve, reject }
+    this.nextId = 0;
+    this.broken = null;
+
+    const perShard = Math.ceil(count / this.shardCount);
+    this.workers = Array.from({ length: this.shardCount }, (_, shard) => {
+      const worker = new Worker(WORKER_PATH, {
+        workerData: {
+          codes: shared.codes,
+          norms: shared.norms,
+          scales: shared.scales,
+          precision: shared.precision,
+          dimension: shared.dimension,
+          shard,
+          start: shard * perShard,
+          end: Math.min(count, (shard + 1) * perShard)
+        }
+      });
+      worker.on('message', (message) => this._onMessage(message));
+      worker.on('error', (error) => this._fail(error));
+      worker.unref();   // Only pending searches keep the process alive
+      return worker;
+    });
+  }
+
+  _onMessage({ id, shard, results }) {
+    const request = this.pending.get(id);
+    if (!request) {
+      return;
+    }
+    request.results[shard] = results;
+    if (--request.remaining === 0) {
+      this._settle(id);
+      request.resolve(request.results);
+    }
+  }
+
+  _fail(error) {
+    console.error('❌ Search shard failed:', error.message);
+    this.broken = error;
+    for (const [id, request] of this.pending) {
+      this._settle(id);
+      request.reject(error);
+    }
+  }
+
+  _settle(id) {
+    this.pending.delete(id);
+    if (this.pending.size === 0) {
+      this.workers.forEach(worker => worker.unref());
+    }
+  }
+
+  /**
+   * Score prepared queries on every shard and merge the local top candidates
+   * @param {Object[]} queries - Prepared queries { values, norm } (see VectorStore._prepareQuery)
+   * @param {number} cutoff - Minimum score kept by shards
+   * @param {number} limit - Candidates per query
+   * @returns {Promise<Object[][]>} - Per query: [{ v, score }] best first
+   */
+  async search(queries, cutoff, limit) {
+    if (this.broken) {
+      throw this.broken;
+    }
+
+    const id = this.nextId++;
+    const message = {
+      id,
+      queries: queries.map(q => Float64Array.from(q.values)),
+      queryNorms: Float64Array.from(queries, q => q.norm),
+      cutoff,
+      limit
+    };
+
+    const shardResults = await new Promise((resolve, reject) => {
+      if (this.pending.size === 0) {
+        this.workers.forEach(worker => worker.ref());
+      }
+      this.pending.set(id, { remaining: this.workers.length, results: [], resolve, reject });
+      this.workers.forEach(worker => worker.postMessage(message));
+    });
+    shardSearches.inc({ shards: String(this.shardCount) });
+
+    // Merge: every shard list is sorted, and only `limit` survive overall
+    return queries.map((_, q) => {
+      const merged = [];
+      for (const shard of shardResults) {
+        const { indices, scores } = shard[q];
+        for (let i = 0; i < indices.length; i++) {
+          merged.push({ v: indices[i], score: scores[i] });
+        }
+      }
+      return merged.sort((a, b) => b.score - a.score || a.v - b.v).slice(0, limit);
+    });
+  }
+
+  /**
+   * Stop the shard threads
+   */
+  close() {
+    const error = new Error('Search shard pool closed');
+    for (const [id, request] of this.pending) {
+      this._settle(id);
+      request.reject(error);
+    }
+    this.workers.forEach(worker => worker.terminate());
+    this.workers = [];
+  }
+}
+
+module.exports = {
+  SearchShardPool
+};
@@ -0,0 +1,112 @@
+/**
+ * Single-Flight Service
+ * Coalesces concurrent calls that share a key onto one in-flight promise
+ */
+
+const { metrics } = require('./metrics.service');
+
+/**
+ * Abort signal for a shared computation
+ * Fires only once every participant has aborted; a participant without a
+ * signal keeps it alive.
+ */
+class SharedAbort {
+  constructor() {
+    this.controller = new AbortController();
+    this.remaining = 0;
+  }
+
+  get signal() {
+    return this.controller.signal;
+  }
+
+  /**
+   * Add a participant
+   * @param {AbortSignal} signal - Participant's signal, or null
+   */
+  join(signal) {
+    this.remaining++;
+    if (!signal) {
+      return;
+    }
+    const leave = () => {
+      this.remaining--;
+      if (this.remaining === 0) {
+        this.controller.abort();
+      }
+    };
+    if (signal.aborted) {
+      leave();
+    } else {
+      signal.addEventListener('abort', leave, { once: true });
+    }
+  }
+}
+
+class SingleFlight {
+  /**
+   * @param {string} name - Label used for this group's metrics
+   */
+  constructor(name) {
+    this.name = name;
+    this.inflight = new Map();   // key -> { promise, abort }
+    this.leaders = 0;
+    this.followers = 0;
+
+    this.requests = metrics.counter(
+      'rag_coalesce_requests_total',
+      'Requests that started (leader) or joined (follower) a coalesced computation'
+    );
+    metrics.gauge('rag_coalesce_inflight', 'Coalesced computations currently in flight',
+      () => [{ labels: { group: name }, value: this.inflight.size }]);
+    metrics.gauge('rag_coalesce_ratio', 'Share of requests served by joining an in-flight computation',
+      () => [{ labels: { group: name }, value: this.getStats().ratio }]);
+  }
+
+  /**
+   * Run fn for key, or join the computation already running for it
+   * @param {string} key - Coalescing key
+   * @param {Function} fn - Async function producing the shared result; called with
+   *   an AbortSignal that fires once every participant's signal has aborted
+   * @param {AbortSignal} signal - Optional signal of this participant
+   * @returns {Object} - { promise, shared } where shared is true for followers
+   */
+  run(key, fn, signal = null) {
+    const existing = this.inflight.get(key);
+    if (existing) {
+      existing.abort.join(signal);
+      this.followers++;
+      this.requests.inc({ group: this.name, role: 'follower' });
+      return { promise: existing.promise, shared: true };
+    }
+
+    const abort = new SharedAbort();
+    abort.join(signal);
+    const promise = Promise.resolve()
+      .then(() => fn(abort.signal))
+      .finally(() => this.inflight.delete(key));
+
+    this.inflight.set(key, { promise, abort });
+    this.leaders++;
+    this.requests.inc({ group: this.name, role: 'leader' });
+    return { promise, shared: false };
+  }
+
+  /**
+   * Get coalescing statistics
+   * @returns {Object}
+   */
+  getStats() {
+    const total = this.leaders + this.followers;
+    return {
+      inflight: this.inflight.size,
+      leaders: this.leaders,
+      followers: this.followers,
+      ratio: total > 0 ? this.followers / total : 0
+    };
+  }
+}
+
+module.exports = {
+  SingleFlight
+};
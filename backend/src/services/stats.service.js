@@ -0,0 +1,339 @@
+/**
+ * Stats Service
+ * Incrementally maintained safety and feedback counters, so the stats
+ * endpoints read one document instead of scanning QueryLog / Feedback.
+ * Each counter family has a backfill cutoff (backfillCutoff): documents
+ * created before it are counted by the one-time backfill, later ones by live
+ * $inc. backfilledAt is set once the backfill has been applied.
+ */
+
+const { QueryLog, Feedback, StatsCounter } = require('../models');
+const { detectSafetyKeywords } = require('../constants/safetyKeywords');
+
+const SAFETY = 'safety';
+const FEEDBACK = 'feedback';
+const TOP_KEYWORDS = 10;
+
+// A pending backfill claim older than this is taken over by the next process
+const BACKFILL_LEASE_MS = 10 * 60 * 1000;
+// Delay before a failed backfill is retried in the same process
+const BACKFILL_RETRY_MS = 60 * 1000;
+
+// MongoDB field names cannot contain '.' or start with '$'
+const counterKey = (name) => String(name).replace(/\./g, '_').replace(/^\$/, '_');
+
+/**
+ * Apply live $inc updates for a document created (or changed) at `at`
+ * Skipped when `at` is before the backfill cutoff, or before any backfill
+ * was claimed: the backfill snapshot counts those documents, so each one
+ * is counted exactly once. Applies while the backfill is still pending.
+ * @param {string} id - Counter family
+ * @param {Object} inc - Field path -> increment
+ * @param {Date} at - Document creation (or change) time
+ */
+const incrementLive = async (id, inc, at) => {
+  await StatsCounter.updateOne(
+    { _id: id, backfillCutoff: { $lte: at } },
+    { $inc: inc, $set: { updatedAt: new Date() } }
+  );
+};
+
+/**
+ * Build the safety counter increments for one query
+ * @param {Object} safetyCheck - Safety check result (null for failed queries)
+ * @returns {Object}
+ */
+const safetyIncrements = (safetyCheck) => {
+  const inc = { 'counts.total': 1 };
+  if (safetyCheck && safetyCheck.isUnsafe) {
+    inc['counts.unsafe'] = 1;
+    for (const category of safetyCheck.categories || []) {
+      inc[`categories.${counterKey(category)}`] = 1;
+    }
+    for (const keyword of safetyCheck.keywords || []) {
+      inc[`keywords.${counterKey(keyword)}`] = 1;
+    }
+  }
+  return inc;
+};
+
+/**
+ * Record a logged query in the safety counters
+ * Counter failures are logged, never surfaced to the caller
+ * @param {Object} safetyCheck - Safety check result (null for failed queries)
+ * @param {Date} createdAt - createdAt of the query's QueryLog
+ */
+const recordQuery = async (safetyCheck, createdAt) => {
+  try {
+    await incrementLive(SAFETY, safetyIncrements(safetyCheck), createdAt);
+  } catch (error) {
+    console.error('Error updating safety counters:', error.message);
+  }
+};
+
+/**
+ * Record new or changed feedback in the feedback counters
+ * A change is applied when it happens after the backfill cutoff. A change
+ * made while the backfill is reading can be counted twice (the backfill
+ * runs once, for a few seconds).
+ * @param {boolean} isHelpful - New feedback value
+ * @param {boolean} [previousIsHelpful] - Previous value when feedback was updated
+ * @param {Date} at - createdAt of new feedback, or the time of the change
+ */
+const recordFeedback = async (isHelpful, previousIsHelpful, at = new Date()) => {
+  const field = (helpful) => (helpful ? 'counts.helpful' : 'counts.notHelpful');
+  let inc;
+
+  if (previousIsHelpful === undefined) {
+    inc = { 'counts.total': 1, [field(isHelpful)]: 1 };
+  } else if (previousIsHelpful !== isHelpful) {
+    inc = { [field(isHelpful)]: 1, [field(previousIsHelpful)]: -1 };
+  } else {
+    return;
+  }
+
+  try {
+    await incrementLive(FEEDBACK, inc, at);
+  } catch (error) {
+    console.error('Error updating feedback counters:', error.message);
+  }
+};
+
+/**
+ * Claim the one-time backfill of a counter family
+ * The first claim fixes the cutoff. The claim itself is a lease
+ * (backfillClaimedAt): a backfill that failed or whose process died stays
+ * pending, and is taken over with the same cutoff once the lease is older
+ * than BACKFILL_LEASE_MS (or at once after a failure released it).
+ * @param {string} id - Counter family
+ * @param {Date} now - Claim time
+ * @returns {Promise<Date|null>} - Backfill cutoff if this process should backfill
+ */
+const claimBackfill = async (id, now) => {
+  try {
+    await StatsCounter.updateOne(
+      { _id: id, backfillCutoff: { $exists: false } },
+      { $set: { backfillCutoff: now } },
+      { upsert: true }
+    );
+  } catch (error) {
+    // Another process created the document (and its cutoff) first
+    if (error.code !== 11000) {
+      throw error;
+    }
+  }
+
+  const claimed = await StatsCounter.findOneAndUpdate(
+    {
+      _id: id,
+      backfilledAt: { $exists: false },
+      $or: [
+        { backfillClaimedAt: { $exists: false } },
+        { backfillClaimedAt: { $lt: new Date(now.getTime() - BACKFILL_LEASE_MS) } }
+      ]
+    },
+    { $set: { backfillClaimedAt: now } },
+    { returnDocument: 'after' }
+  ).select('backfillCutoff').lean();
+
+  return claimed ? claimed.backfillCutoff : null;
+};
+
+/**
+ * Apply backfilled counts and mark the backfill done in one update
+ * Does nothing if another process took the claim over meanwhile, so the
+ * snapshot is never applied twice.
+ * @param {string} id - Counter family
+ * @param {Date} claimedAt - Time of this process's claim
+ * @param {Object} inc - Field path -> increment
+ * @returns {Promise<boolean>} - True if applied
+ */
+const completeBackfill = async (id, claimedAt, inc) => {
+  const now = new Date();
+  const result = await StatsCounter.updateOne(
+    { _id: id, backfilledAt: { $exists: false }, backfillClaimedAt: claimedAt },
+    { $inc: inc, $set: { backfilledAt: now, updatedAt: now }, $unset: { backfillClaimedAt: 1 } }
+  );
+  return result.modifiedCount === 1;
+};
+
+/**
+ * Release a claim after a failed backfill so it can be retried right away
+ * @param {string} id - Counter family
+ * @param {Date} claimedAt - Time of this process's claim
+ */
+const releaseBackfill = async (id, claimedAt) => {
+  await StatsCounter.updateOne(
+    { _id: id, backfilledAt: { $exists: false }, backfillClaimedAt: claimedAt },
+    { $unset: { backfillClaimedAt: 1 } }
+  );
+};
+
+/**
+ * Count safety counters from existing query logs
+ * @param {Date} cutoff - Only logs created before this are counted
+ * @returns {Promise<Object>} - { inc, count }
+ */
+const backfillSafety = async (cutoff) => {
+  const before = { createdAt: { $lt: cutoff } };
+  const inc = {
+    'counts.total': await QueryLog.countDocuments(before),
+    'counts.unsafe': 0
+  };
+
+  // Categories are not stored on the log, so re-derive them from the query text
+  const cursor = QueryLog.find({ ...before, isUnsafe: true })
+    .select('userQuery safetyKeywordsDetected')
+    .lean()
+    .cursor();
+
+  for await (const log of cursor) {
+    const detection = detectSafetyKeywords(log.userQuery);
+    const delta = safetyIncrements({
+      isUnsafe: true,
+      categories: detection.categories,
+      keywords: log.safetyKeywordsDetected
+    });
+    for (const [field, value] of Object.entries(delta)) {
+      if (field !== 'counts.total') {
+        inc[field] = (inc[field] || 0) + value;
+      }
+    }
+  }
+
+  return { inc, count: inc['counts.total'] };
+};
+
+/**
+ * Count feedback counters from existing feedback
+ * @param {Date} cutoff - Only feedback created before this is counted
+ * @returns {Promise<Object>} - { inc, count }
+ */
+const backfillFeedback = async (cutoff) => {
+  const before = { createdAt: { $lt: cutoff } };
+  const [total, helpful] = await Promise.all([
+    Feedback.countDocuments(before),
+    Feedback.countDocuments({ ...before, isHelpful: true })
+  ]);
+
+  const inc = {
+    'counts.total': total,
+    'counts.helpful': helpful,
+    'counts.notHelpful': total - helpful
+  };
+  return { inc, count: total };
+};
+
+/**
+ * Claim, count and apply the backfill of one counter family
+ * @param {string} id - Counter family
+ * @param {Function} backfill - async (cutoff) => { inc, count }
+ * @param {string} label - Counter family name for log lines
+ * @param {string} source - Name of the counted documents for log lines
+ */
+const runBackfill = async (id, backfill, label, source) => {
+  const claimedAt = new Date();
+  const cutoff = await claimBackfill(id, claimedAt);
+  if (!cutoff) {
+    return;
+  }
+
+  try {
+    const { inc, count } = await backfill(cutoff);
+    if (await completeBackfill(id, claimedAt, inc)) {
+      console.log(`📊 ${label} counters backfilled from ${count} ${source}`);
+    } else {
+      console.warn(`⚠️ ${label} counter backfill was taken over by another process`);
+    }
+  } catch (error) {
+    await releaseBackfill(id, claimedAt).catch(() => {});
+    throw error;
+  }
+};
+
+/**
+ * Make sure the counter documents exist, backfilling them from the
+ * collections the first time (run at startup). A failed backfill stays
+ * pending and is retried every BACKFILL_RETRY_MS until it succeeds.
+ */
+const ensureCounters = async () => {
+  const results = await Promise.allSettled([
+    runBackfill(SAFETY, backfillSafety, 'Safety', 'query logs'),
+    runBackfill(FEEDBACK, backfillFeedback, 'Feedback', 'feedback entries')
+  ]);
+
+  const failed = results.filter(result => result.status === 'rejected');
+  if (failed.length > 0) {
+    console.warn('⚠️ Stats counter backfill warning:', failed.map(result => result.reason.message).join('; '));
+    setTimeout(ensureCounters, BACKFILL_RETRY_MS).unref();
+  }
+};
+
+/**
+ * Load a counter document as plain objects
+ * @param {string} id - Counter family
+ * @returns {Promise<Object>} - { counts, categories, keywords }
+ */
+const readCounters = async (id) => {
+  const doc = await StatsCounter.findById(id).lean();
+  return {
+    counts: (doc && doc.counts) || {},
+    categories: (doc && doc.categories) || {},
+    keywords: (doc && doc.keywords) || {}
+  };
+};
+
+/**
+ * Get safety statistics from the counters
+ * @returns {Promise<Object>}
+ */
+const getSafetyStats = async () => {
+  const { counts, categories, keywords } = await readCounters(SAFETY);
+  const total = counts.total || 0;
+  const unsafe = counts.unsafe || 0;
+
+  const topSafetyKeywords = Object.entries(keywords)
+    .filter(([, count]) => count > 0)
+    .sort((a, b) => b[1] - a[1])
+    .slice(0, TOP_KEYWORDS)
+    .map(([keyword, count]) => ({ _id: keyword, count }));
+
+  return {
+    totalQueries: total,
+    unsafeQueries: unsafe,
+    safeQueries: total - unsafe,
+    unsafePercentage: total > 0 ? ((unsafe / total) * 100).toFixed(2) : 0,
+    topSafetyKeywords,
+    categoryCounts: categories
+  };
+};
+
+/**
+ * Get feedback statistics from the counters
+ * @returns {Promise<Object>}
+ */
+const getFeedbackStats = async () => {
+  const { counts } = await readCounters(FEEDBACK);
+  const totalFeedback = counts.total || 0;
+  const helpfulCount = counts.helpful || 0;
+  const notHelpfulCount = counts.notHelpful || 0;
+
+  const helpfulPercentage = totalFeedback > 0
+    ? ((helpfulCount / totalFeedback) * 100).toFixed(2)
+    : 0;
+
+  return {
+    totalFeedback,
+    helpful: helpfulCount,
+    notHelpful: notHelpfulCount,
+    helpfulPercentage: `${helpfulPercentage}%`
+  };
+};
+
+module.exports = {
+  recordQuery,
+  recordFeedback,
+  ensureCounters,
+  getSafetyStats,
+  getFeedbackStats
+};
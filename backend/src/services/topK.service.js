@@ -0,0 +1,85 @@
+/**
+ * Top-K Service
+ * Bounded selection of the best-scoring vectors, so ranking costs
+ * O(n log k) instead of sorting every candidate. Used by the in-process
+ * search and by the search shard workers.
+ */
+
+/**
+ * Whether (scoreA, indexA) ranks below (scoreB, indexB)
+ */
+const worse = (scoreA, indexA, scoreB, indexB) =>
+  scoreA < scoreB || (scoreA === scoreB && indexA > indexB);
+
+/**
+ * Bounded min-heap keeping the `limit` best (index, score) pairs
+ * Equal scores prefer the lower index, matching a stable sort of the full list.
+ */
+class TopK {
+  constructor(limit) {
+    this.limit = limit;
+    this.indices = new Int32Array(limit);
+    this.scores = new Float64Array(limit);
+    this.size = 0;
+  }
+
+  push(index, score) {
+    if (this.size < this.limit) {
+      this._siftUp(this.size++, index, score);
+    } else if (this.size > 0 && worse(this.scores[0], this.indices[0], score, index)) {
+      this._siftDown(index, score);
+    }
+  }
+
+  _siftUp(position, index, score) {
+    while (position > 0) {
+      const parent = (position - 1) >> 1;
+      if (!worse(score, index, this.scores[parent], this.indices[parent])) {
+        break;
+      }
+      this.indices[position] = this.indices[parent];
+      this.scores[position] = this.scores[parent];
+      position = parent;
+    }
+    this.indices[position] = index;
+    this.scores[position] = score;
+  }
+
+  _siftDown(index, score) {
+    let position = 0;
+    for (;;) {
+      let child = 2 * position + 1;
+      if (child >= this.size) {
+        break;
+      }
+      if (child + 1 < this.size &&
+          worse(this.scores[child + 1], this.indices[child + 1], this.scores[child], this.indices[child])) {
+        child++;
+      }
+      if (!worse(this.scores[child], this.indices[child], score, index)) {
+        break;
+      }
+      this.indices[position] = this.indices[child];
+      this.scores[position] = this.scores[child];
+      position = child;
+    }
+    this.indices[position] = index;
+    this.scores[position] = score;
+  }
+
+  /**
+   * @returns {Object} - { indices, scores } sorted best first
+   */
+  sorted() {
+    const order = Array.from({ length: this.size }, (_, i) => i)
+      .sort((a, b) => this.scores[b] - this.scores[a] || this.indices[a] - this.indices[b]);
+    return {
+      indices: Int32Array.from(order, i => this.indices[i]),
+      scores: Float64Array.from(order, i => this.scores[i])
+    };
+  }
+}
+
+module.exports = {
+  TopK
+};
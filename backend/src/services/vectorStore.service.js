@@ -2,17 +2,144 @@
  * Vector Store Service
  * Simple in-memory vector store with cosine similarity search
  * Can be extended to use FAISS, Pinecone, etc.
+ *
+ * Embeddings can be kept at reduced precision (float32, float16 or int8) to
+ * cut memory; quantized searches can rescore their top candidates against
+ * full-precision vectors kept in a float32 file on disk.
+ *
+ * Quantized indexes can be paged from disk (mapIndex): searches read the
+ * vector block in windows and chunk metadata on access, so several processes
+ * (cluster workers) share one copy through the page cache.
+ *
+ * Exact search can be split across worker-thread shards (searchShards > 1);
+ * the vector block then moves into a SharedArrayBuffer all shards read.
  */
 
 const fs = require('fs');
 const path = require('path');
-const { cosineSimilarity } = require('./embedding.service');
+const config = require('../config');
+const {
+  PRECISIONS,
+  BYTES_PER_COMPONENT,
+  CODE_ARRAYS,
+  FLOAT16_TABLE,
+  quantizeMatrix
+} = require('./quantization.service');
+const { SearchShardPool } = require('./shardedSearch.service');
+const { TopK } = require('./topK.service');
+
+// Bytes of codes a paged search reads per window
+const PAGE_WINDOW_BYTES = 1 << 20;
+
+/**
+ * Copy bytes into a fresh buffer so a typed array view over them is aligned
+ * @param {Buffer} raw - Source bytes
+ * @param {Function} CodeArray - Typed array constructor
+ * @returns {TypedArray}
+ */
+const alignedCopy = (raw, CodeArray) => {
+  const codes = new CodeArray(raw.byteLength / CodeArray.BYTES_PER_ELEMENT);
+  new Uint8Array(codes.buffer).set(raw);
+  return codes;
+};
+
+/**
+ * Write a file via a temporary file and rename, so readers (and existing
+ * mappings) keep seeing the complete previous version until the swap
+ * @param {string} filePath - Destination
+ * @param {string|Buffer} data - Contents
+ */
+const writeFileAtomic = (filePath, data) => {
+  const tmpPath = `${filePath}.${process.pid}.tmp`;
+  fs.writeFileSync(tmpPath, data);
+  fs.renameSync(tmpPath, filePath);
+};
+
+/**
+ * Suffix that makes the block files written by one save unique
+ * @returns {string}
+ */
+const fileVersion = () => `${Date.now().toString(36)}${process.pid.toString(36)}`;
+
+// Saves whose block files are kept: the current one and the one before it,
+// which a process may still be opening after reading the previous JSON
+const BLOCK_GENERATIONS_KEPT = 2;
+
+/**
+ * Read `length` bytes at `position` of an open file into `buffer`
+ * @param {number} fd - File descriptor
+ * @param {Buffer} buffer - Destination
+ * @param {number} length - Bytes to read
+ * @param {number} position - File offset
+ */
+const readAt = (fd, buffer, length, position) => {
+  let offset = 0;
+  while (offset < length) {
+    const read = fs.readSync(fd, buffer, offset, length - offset, position + offset);
+    if (read === 0) {
+      throw new Error(`Vector index file ended after ${position + offset} bytes`);
+    }
+    offset += read;
+  }
+};
+
+/**
+ * Row of a paged index: chunk metadata stays in the metadata block on disk
+ * and is parsed only when a result or lookup reads it
+ */
+class PagedRow {
+  /**
+   * @param {VectorStore} store - Store holding the open metadata block
+   * @param {Object} row - { id, scale, norm, meta: [offset, length], duplicateChunkIds }
+   */
+  constructor(store, row) {
+    this.id = row.id;
+    this.scale = row.scale ?? 1;
+    this.norm = row.norm;
+    this.duplicateChunkIds = row.duplicateChunkIds;
+    this._store = store;
+    this._meta = row.meta;
+  }
+
+  get metadata() {
+    return this._store._readMetadata(this._meta);
+  }
+}
 
 class VectorStore {
-  constructor() {
-    this.vectors = [];      // Array of { id, embedding, metadata }
+  /**
+   * @param {Object} options - { precision, int8Scale, rescoreFactor, indexPath, mapIndex, searchShards }
+   */
+  constructor(options = {}) {
+    this.vectors = [];      // Array of { id, embedding, metadata, norm, scale }
     this.dimension = null;
-    this.indexPath = path.join(__dirname, '../../data/vector_index.json');
+    this.indexPath = options.indexPath || path.join(__dirname, '../../data/vector_index.json');
+
+    this.precision = options.precision || config.RAG.VECTOR_PRECISION;
+    this.int8Scale = options.int8Scale || config.RAG.INT8_SCALE;
+    this.rescoreFactor = options.rescoreFactor ?? config.RAG.RESCORE_FACTOR;
+    this.mapIndex = options.mapIndex ?? config.RAG.MAP_INDEX;
+    this.searchShards = options.searchShards ?? config.RAG.SEARCH_SHARDS;
+    if (!PRECISIONS.includes(this.precision)) {
+      throw new Error(`Unsupported vector precision: ${this.precision}`);
+    }
+
+    this.quantized = false;     // true once embeddings are held as typed-array codes
+    this.dimScales = null;      // Per-dimension int8 scales
+    this.fullPrecision = null;  // Float32Array kept only until the index is saved
+    this.fullPrecisionOnDisk = false;
+    this.fullPrecisionFile = null;  // Path of the on-disk Float32 copy
+    this._fullPrecisionFd = null;
+    this.paged = false;         // true when codes and metadata are read from disk on demand
+    this._codesFd = null;       // Open block files of a paged index
+    this._metadataFd = null;
+    this._window = null;        // Reusable read window of a paged search
+    this.sourceVersion = null;  // Hash of the knowledge base the index was built from
+    this.deduplication = null;  // Near-duplicate collapse report of the build
+    this._shards = null;        // SearchShardPool, created on the first async search
+    this._warnedPagedShards = false;
+    this._ids = null;           // id -> row index, built on the first getById
+    this._idsFor = null;        // vectors array this._ids was built from
   }
 
   /**
@@ -22,6 +149,13 @@ class VectorStore {
   initialize(dimension) {
     this.dimension = dimension;
     this.vectors = [];
+    this.quantized = false;
+    this.dimScales = null;
+    this.fullPrecision = null;
+    this.fullPrecisionOnDisk = false;
+    this.deduplication = null;
+    this._closePaged();
+    this._closeShards();
     console.log(`🗄️ Vector store initialized with dimension ${dimension}`);
   }
 
@@ -35,7 +169,12 @@ class VectorStore {
     if (this.dimension && embedding.length !== this.dimension) {
       throw new Error(`Embedding dimension mismatch: expected ${this.dimension}, got ${embedding.length}`);
     }
-    
+    if (this.quantized) {
+      throw new Error('Cannot add vectors to a quantized index; rebuild it instead');
+    }
+    this._closeShards();
+    this._ids = null;
+
     this.vectors.push({
       id,
       embedding,
@@ -54,6 +193,228 @@ class VectorStore {
     console.log(`📥 Added ${items.length} vectors to store (total: ${this.vectors.length})`);
   }
 
+  /**
+   * Convert full-precision embeddings to the configured precision
+   * No-op for float64 (plain number arrays) or an already quantized store.
+   */
+  quantize() {
+    if (this.precision === 'float64' || this.quantized || this.vectors.length === 0) {
+      return;
+    }
+
+    const count = this.vectors.length;
+    const dimension = this.dimension || this.vectors[0].embedding.length;
+    const full = new Float32Array(count * dimension);
+    this.vectors.forEach((item, i) => full.set(item.embedding, i * dimension));
+
+    const { codes, scales, dimScales, norms } = quantizeMatrix(full, count, dimension, this.precision, this.int8Scale);
+    this._adoptCodes(codes, dimension, (i) => ({ scale: scales[i], norm: norms[i] }));
+    this.dimScales = dimScales;
+    this.fullPrecision = this.precision === 'float32' ? null : full;
+
+    console.log(`🗜️ Quantized ${count} vectors to ${this.precision}${this.precision === 'int8' ? ` (${this.int8Scale} scales)` : ''}`);
+  }
+
+  /**
+   * Point every vector at its row of a contiguous code array
+   * @param {TypedArray} codes - count * dimension codes
+   * @param {number} dimension - Vector dimension
+   * @param {Function} extra - (index) => { scale, norm }
+   */
+  _adoptCodes(codes, dimension, extra) {
+    this._closeShards();
+    this.dimension = dimension;
+    this.vectors = this.vectors.map((item, i) => ({
+      id: item.id,
+      metadata: item.metadata,
+      embedding: codes.subarray(i * dimension, (i + 1) * dimension),
+      ...extra(i)
+    }));
+    this.quantized = true;
+  }
+
+  /**
+   * Prepare a query vector for scoring against stored codes
+   * @param {number[]} queryEmbedding - Query vector
+   * @returns {Object} - { values, norm }
+   */
+  _prepareQuery(queryEmbedding) {
+    let norm = 0;
+    for (let d = 0; d < queryEmbedding.length; d++) {
+      norm += queryEmbedding[d] * queryEmbedding[d];
+    }
+
+    // Per-dimension int8 scales fold into the query so scoring is a plain dot product
+    let values = queryEmbedding;
+    if (this.dimScales) {
+      values = new Float32Array(queryEmbedding.length);
+      for (let d = 0; d < values.length; d++) {
+        values[d] = queryEmbedding[d] * this.dimScales[d];
+      }
+    }
+    return { values, norm: Math.sqrt(norm) };
+  }
+
+  /**
+   * Cosine similarity between a prepared query and a stored vector
+   * @param {Object} query - Result of _prepareQuery
+   * @param {Object} item - Stored vector
+   * @param {TypedArray} embedding - Codes of the vector, when read from a paged block
+   * @returns {number}
+   */
+  _score(query, item, embedding = item.embedding) {
+    const q = query.values;
+    if (embedding.length !== q.length) {
+      throw new Error('Vectors must have the same length');
+    }
+
+    let dot = 0;
+    if (this.quantized && this.precision === 'float16') {
+      for (let d = 0; d < q.length; d++) {
+        dot += q[d] * FLOAT16_TABLE[embedding[d]];
+      }
+    } else {
+      for (let d = 0; d < q.length; d++) {
+        dot += q[d] * embedding[d];
+      }
+    }
+    if (this.quantized && this.precision === 'int8') {
+      dot *= item.scale;
+    }
+
+    if (item.norm === undefined) {
+      let norm = 0;
+      for (let d = 0; d < embedding.length; d++) {
+        norm += embedding[d] * embedding[d];
+      }
+      item.norm = Math.sqrt(norm);
+    }
+
+    if (query.norm === 0 || item.norm === 0) {
+      return 0;
+    }
+    return dot / (query.norm * item.norm);
+  }
+
+  /**
+   * Whether searches should rescore quantized candidates at full precision
+   * @returns {boolean}
+   */
+  _canRescore() {
+    return this.quantized && this.precision !== 'float32' && this.rescoreFactor > 1 &&
+      (this.fullPrecision !== null || this.fullPrecisionOnDisk);
+  }
+
+  /**
+   * Read one full-precision vector (from memory before save, from disk after)
+   * @param {number} index - Vector index
+   * @returns {Float32Array}
+   */
+  _fullPrecisionVector(index) {
+    const dimension = this.dimension;
+    if (this.fullPrecision) {
+      return this.fullPrecision.subarray(index * dimension, (index + 1) * dimension);
+    }
+    if (this._fullPrecisionFd === null) {
+      this._openFullPrecision();
+    }
+    const vector = new Float32Array(dimension);
+    fs.readSync(this._fullPrecisionFd, Buffer.from(vector.buffer), 0, dimension * 4, index * dimension * 4);
+    return vector;
+  }
+
+  /**
+   * Full-precision embedding of a stored vector, when one is still available
+   * Used to reuse embeddings of unchanged chunks when rebuilding the index.
+   * @param {number} index - Vector index
+   * @returns {ArrayLike<number>|null}
+   */
+  fullPrecisionEmbedding(index) {
+    if (!this.quantized || this.precision === 'float32') {
+      return this.paged ? this._readRows(index, 1) : this.vectors[index].embedding;
+    }
+    if (this.fullPrecision || this.fullPrecisionOnDisk) {
+      return this._fullPrecisionVector(index);
+    }
+    return null;
+  }
+
+  /**
+   * How many candidates to keep per query, and above which score
+   * Candidates are gathered below the threshold too when rescoring,
+   * since quantization error can push a true match under it.
+   * @param {number} topK - Number of results
+   * @param {number} threshold - Minimum similarity
+   * @returns {Object} - { cutoff, limit }
+   */
+  _candidatePolicy(topK, threshold) {
+    const rescore = this._canRescore();
+    return {
+      cutoff: rescore ? -Infinity : threshold,
+      limit: rescore ? topK * this.rescoreFactor : topK
+    };
+  }
+
+  /**
+   * Rank scored candidates, rescoring the best at full precision when enabled
+   * @param {number[]} queryEmbedding - Raw query vector
+   * @param {Float64Array} scores - Quantized score per stored vector
+   * @param {number} topK - Number of results
+   * @param {number} threshold - Minimum similarity
+   * @returns {Object[]} - Array of { id, score, metadata }
+   */
+  _rank(queryEmbedding, scores, topK, threshold) {
+    const { cutoff, limit } = this._candidatePolicy(topK, threshold);
+
+    // Bounded selection: only `limit` candidates are kept and sorted, not the whole store
+    const top = new TopK(Math.min(limit, scores.length));
+    for (let v = 0; v < scores.length; v++) {
+      if (scores[v] >= cutoff) {
+        top.push(v, scores[v]);
+      }
+    }
+    const best = top.sorted();
+    const ranked = Array.from(best.indices, (v, i) => ({ v, score: best.scores[i] }));
+
+    return this._finishRanking(queryEmbedding, ranked, topK, threshold);
+  }
+
+  /**
+   * Turn the best candidates (sorted by quantized score) into results,
+   * rescoring them at full precision when enabled
+   * @param {number[]} queryEmbedding - Raw query vector
+   * @param {Object[]} ranked - Candidates { v, score }, best first
+   * @param {number} topK - Number of results
+   * @param {number} threshold - Minimum similarity
+   * @returns {Object[]} - Array of { id, score, metadata }
+   */
+  _finishRanking(queryEmbedding, ranked, topK, threshold) {
+    if (this._canRescore()) {
+      const query = { values: queryEmbedding, norm: this._prepareQuery(queryEmbedding).norm };
+      ranked = ranked
+        .map(({ v }) => {
+          const full = this._fullPrecisionVector(v);
+          let dot = 0;
+          let norm = 0;
+          for (let d = 0; d < full.length; d++) {
+            dot += query.values[d] * full[d];
+            norm += full[d] * full[d];
+          }
+          const denominator = query.norm * Math.sqrt(norm);
+          return { v, score: denominator === 0 ? 0 : dot / denominator };
+        })
+        .filter(r => r.score >= threshold)
+        .sort((a, b) => b.score - a.score)
+        .slice(0, topK);
+    }
+
+    return ranked.map(({ v, score }) => ({
+      id: this.vectors[v].id,
+      score,
+      metadata: this.vectors[v].metadata
+    }));
+  }
+
   /**
    * Search for similar vectors
    * @param {number[]} queryEmbedding - Query vector
@@ -67,50 +428,410 @@ class VectorStore {
     }
 
     // Calculate similarities
-    const results = this.vectors.map(item => ({
-      id: item.id,
-      score: cosineSimilarity(queryEmbedding, item.embedding),
-      metadata: item.metadata
-    }));
+    const query = this._prepareQuery(queryEmbedding);
+    const scores = new Float64Array(this.vectors.length);
+    if (this.paged) {
+      this._scanPaged([query], [scores]);
+    } else {
+      for (let v = 0; v < this.vectors.length; v++) {
+        scores[v] = this._score(query, this.vectors[v]);
+      }
+    }
 
     // Filter by threshold and sort by score
-    return results
-      .filter(r => r.score >= threshold)
-      .sort((a, b) => b.score - a.score)
-      .slice(0, topK);
+    return this._rank(queryEmbedding, scores, topK, threshold);
+  }
+
+  /**
+   * Search for several query vectors in a single pass over the index
+   * Each stored vector is read once and scored against every query.
+   * @param {number[][]} queryEmbeddings - Query vectors
+   * @param {number} topK - Number of results per query
+   * @param {number} threshold - Minimum similarity threshold
+   * @returns {Object[][]} - Per-query arrays of { id, score, metadata }
+   */
+  searchBatch(queryEmbeddings, topK = 5, threshold = 0.5) {
+    if (this.vectors.length === 0 || queryEmbeddings.length === 0) {
+      return queryEmbeddings.map(() => []);
+    }
+
+    const queries = queryEmbeddings.map(q => this._prepareQuery(q));
+
+    // scores[q][v] = cosine similarity of query q and stored vector v
+    const scores = queryEmbeddings.map(() => new Float64Array(this.vectors.length));
+
+    if (this.paged) {
+      this._scanPaged(queries, scores);
+    } else {
+      for (let v = 0; v < this.vectors.length; v++) {
+        const item = this.vectors[v];
+        for (let q = 0; q < queries.length; q++) {
+          scores[q][v] = this._score(queries[q], item);
+        }
+      }
+    }
+
+    return scores.map((row, q) => this._rank(queryEmbeddings[q], row, topK, threshold));
+  }
+
+  /**
+   * Score every vector of a paged index against prepared queries
+   * The block is read window by window into one reusable buffer, so the
+   * process holds PAGE_WINDOW_BYTES of codes instead of the whole block.
+   * @param {Object[]} queries - Results of _prepareQuery
+   * @param {Float64Array[]} scores - Per-query score rows to fill
+   */
+  _scanPaged(queries, scores) {
+    const dimension = this.dimension;
+    const rowsPerWindow = Math.max(1,
+      Math.floor(PAGE_WINDOW_BYTES / (dimension * CODE_ARRAYS[this.precision].BYTES_PER_ELEMENT)));
+
+    for (let start = 0; start < this.vectors.length; start += rowsPerWindow) {
+      const rows = Math.min(rowsPerWindow, this.vectors.length - start);
+      const window = this._readRows(start, rows, true);
+      for (let r = 0; r < rows; r++) {
+        const embedding = window.subarray(r * dimension, (r + 1) * dimension);
+        const item = this.vectors[start + r];
+        for (let q = 0; q < queries.length; q++) {
+          scores[q][start + r] = this._score(queries[q], item, embedding);
+        }
+      }
+    }
+  }
+
+  /**
+   * Read consecutive rows of a paged block
+   * @param {number} start - First row
+   * @param {number} count - Number of rows
+   * @param {boolean} reuse - Read into the shared window (valid until the next read)
+   * @returns {TypedArray} - count * dimension codes
+   */
+  _readRows(start, count, reuse = false) {
+    const CodeArray = CODE_ARRAYS[this.precision];
+    const length = count * this.dimension;
+    let codes;
+    if (reuse) {
+      if (!this._window || this._window.length < length) {
+        this._window = new CodeArray(length);
+      }
+      codes = this._window;
+    } else {
+      codes = new CodeArray(length);
+    }
+    const rowBytes = this.dimension * CodeArray.BYTES_PER_ELEMENT;
+    readAt(this._codesFd, Buffer.from(codes.buffer, codes.byteOffset, count * rowBytes), count * rowBytes, start * rowBytes);
+    return codes.subarray(0, length);
+  }
+
+  /**
+   * Parse one chunk's metadata from the metadata block of a paged index
+   * @param {number[]} meta - [offset, length] in the block
+   * @returns {Object}
+   */
+  _readMetadata([offset, length]) {
+    const buffer = Buffer.alloc(length);
+    readAt(this._metadataFd, buffer, length, offset);
+    return JSON.parse(buffer.toString('utf-8'));
+  }
+
+  _closePaged() {
+    for (const fd of [this._codesFd, this._metadataFd]) {
+      if (fd !== null) {
+        fs.closeSync(fd);
+      }
+    }
+    this._codesFd = null;
+    this._metadataFd = null;
+    this._window = null;
+    this.paged = false;
+  }
+
+  /**
+   * Move the vector block into shared memory so worker-thread shards can read it
+   * Rows are re-pointed at the shared copy, so the block is not held twice.
+   * Not used for paged indexes (see _shardPool).
+   * @returns {Object} - { codes, norms, scales, precision, dimension, count }
+   */
+  shareMemory() {
+    const count = this.vectors.length;
+    const dimension = this.dimension || this.vectors[0].embedding.length;
+    const precision = this.quantized ? this.precision : 'float64';
+    const CodeArray = this.quantized ? CODE_ARRAYS[this.precision] : Float64Array;
+
+    const codes = new CodeArray(new SharedArrayBuffer(count * dimension * CodeArray.BYTES_PER_ELEMENT));
+    const norms = new Float64Array(new SharedArrayBuffer(count * Float64Array.BYTES_PER_ELEMENT));
+    const scales = new Float64Array(new SharedArrayBuffer(count * Float64Array.BYTES_PER_ELEMENT));
+
+    this.vectors = this.vectors.map((item, i) => {
+      codes.set(item.embedding, i * dimension);
+      const embedding = codes.subarray(i * dimension, (i + 1) * dimension);
+      let norm = item.norm;
+      if (norm === undefined) {
+        norm = 0;
+        for (let d = 0; d < dimension; d++) {
+          norm += embedding[d] * embedding[d];
+        }
+        norm = Math.sqrt(norm);
+      }
+      norms[i] = norm;
+      scales[i] = item.scale ?? 1;
+      return { ...item, embedding, norm };
+    });
+    this.dimension = dimension;
+
+    return { codes, norms, scales, precision, dimension, count };
+  }
+
+  /**
+   * Shard pool for async searches, or null when searches stay on this thread
+   * A paged index is not sharded: moving it into shared memory would give
+   * every process its own copy again, undoing RAG_MAP_INDEX.
+   * @returns {SearchShardPool|null}
+   */
+  _shardPool() {
+    if (this.searchShards < 2 || this.vectors.length < 2) {
+      return null;
+    }
+    if (this.paged) {
+      if (!this._warnedPagedShards) {
+        console.warn('⚠️ RAG_SEARCH_SHARDS is ignored for a paged index (RAG_MAP_INDEX); searching on the main thread');
+        this._warnedPagedShards = true;
+      }
+      return null;
+    }
+    if (!this._shards) {
+      this._shards = new SearchShardPool(this.shareMemory(), this.searchShards);
+      console.log(`🧩 Exact search split across ${this._shards.shardCount} worker-thread shards`);
+    }
+    return this._shards;
+  }
+
+  _closeShards() {
+    if (this._shards) {
+      this._shards.close();
+      this._shards = null;
+    }
+  }
+
+  /**
+   * Search without blocking the event loop when shards are enabled
+   * Same results as search(); falls back to it when sharding is off.
+   * @param {number[]} queryEmbedding - Query vector
+   * @param {number} topK - Number of results to return
+   * @param {number} threshold - Minimum similarity threshold
+   * @returns {Promise<Object[]>} - Array of { id, score, metadata }
+   */
+  async searchAsync(queryEmbedding, topK = 5, threshold = 0.5) {
+    const [results] = await this.searchBatchAsync([queryEmbedding], topK, threshold);
+    return results;
+  }
+
+  /**
+   * Batch search on worker-thread shards; each shard returns a local top-k
+   * that is merged here. Same results as searchBatch().
+   * @param {number[][]} queryEmbeddings - Query vectors
+   * @param {number} topK - Number of results per query
+   * @param {number} threshold - Minimum similarity threshold
+   * @returns {Promise<Object[][]>} - Per-query arrays of { id, score, metadata }
+   */
+  async searchBatchAsync(queryEmbeddings, topK = 5, threshold = 0.5) {
+    const pool = queryEmbeddings.length > 0 ? this._shardPool() : null;
+    if (!pool) {
+      return this.searchBatch(queryEmbeddings, topK, threshold);
+    }
+
+    const { cutoff, limit } = this._candidatePolicy(topK, threshold);
+    const queries = queryEmbeddings.map(q => this._prepareQuery(q));
+    let candidates;
+    try {
+      candidates = await pool.search(queries, cutoff, limit);
+    } catch (error) {
+      // A failed pool is replaced on the next search
+      if (this._shards === pool) {
+        this._closeShards();
+      }
+      return this.searchBatch(queryEmbeddings, topK, threshold);
+    }
+
+    // The store may have been cleared or reloaded while shards were scoring
+    if (this._shards !== pool) {
+      return this.searchBatch(queryEmbeddings, topK, threshold);
+    }
+    return candidates.map((ranked, q) => this._finishRanking(queryEmbeddings[q], ranked, topK, threshold));
   }
 
   /**
    * Get vector by ID
+   * Ids of near-duplicate chunks collapsed at build time resolve to their representative.
    * @param {string} id - Vector ID
    * @returns {Object|null} - Vector object or null
    */
   getById(id) {
-    return this.vectors.find(v => v.id === id) || null;
+    if (this._idsFor !== this.vectors) {
+      this._ids = null;
+    }
+    if (!this._ids) {
+      this._ids = new Map();
+      this.vectors.forEach((item, i) => {
+        this._ids.set(item.id, i);
+        // Paged rows carry their aliases so lookups do not read every chunk's metadata
+        const aliases = item instanceof PagedRow ? item.duplicateChunkIds : item.metadata?.duplicateChunkIds;
+        for (const duplicateId of aliases || []) {
+          this._ids.set(duplicateId, i);
+        }
+      });
+      this._idsFor = this.vectors;
+    }
+    const index = this._ids.get(id);
+    return index === undefined ? null : this.vectors[index];
+  }
+
+  /**
+   * Block file paths are versioned; the JSON file names the ones it belongs to
+   * @param {string} kind - Precision of a codes file, 'f32' for the rescoring copy or 'meta' for chunk metadata
+   * @param {string} version - fileVersion() of the save
+   * @returns {string}
+   */
+  _blockPath(kind, version) {
+    return this.indexPath.replace(/\.json$/, `.${kind}.${version}.bin`);
+  }
+
+  /**
+   * Delete block files of older saves, keeping BLOCK_GENERATIONS_KEPT of each
+   * kind (codes, f32, meta) by modification time. Also removes the unversioned
+   * files written by earlier releases once they are no longer needed.
+   */
+  _removeStaleBlocks() {
+    const dir = path.dirname(this.indexPath);
+    const base = path.basename(this.indexPath, '.json').replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+    const pattern = new RegExp(`^${base}\\.(\\w+)(\\.[a-z0-9]+)?\\.bin$`);
+
+    try {
+      const groups = { codes: [], f32: [], meta: [] };
+      for (const name of fs.readdirSync(dir)) {
+        const match = pattern.exec(name);
+        if (match) {
+          const filePath = path.join(dir, name);
+          groups[Object.hasOwn(groups, match[1]) ? match[1] : 'codes'].push({ filePath, mtime: fs.statSync(filePath).mtimeMs });
+        }
+      }
+      for (const files of Object.values(groups)) {
+        files
+          .sort((a, b) => b.mtime - a.mtime)
+          .slice(BLOCK_GENERATIONS_KEPT)
+          .forEach(({ filePath }) => fs.unlinkSync(filePath));
+      }
+    } catch (error) {
+      console.warn('⚠️ Could not remove old vector index files:', error.message);
+    }
+  }
+
+  /**
+   * Open the full-precision file now, so this store keeps reading the
+   * version it was saved or loaded with even after a rebuild replaces it
+   */
+  _openFullPrecision() {
+    this._closeFullPrecision();
+    this._fullPrecisionFd = fs.openSync(this.fullPrecisionFile, 'r');
+  }
+
+  _closeFullPrecision() {
+    if (this._fullPrecisionFd !== null) {
+      fs.closeSync(this._fullPrecisionFd);
+      this._fullPrecisionFd = null;
+    }
   }
 
   /**
    * Save index to disk
+   * Quantized indexes keep ids, norms and scales in the JSON file, codes in a
+   * binary file and chunk metadata in a block of JSON records the JSON file
+   * points into, so a paged load reads metadata only for the chunks it returns.
+   * Binary files get new versioned names and the JSON file, which names them,
+   * is renamed into place last: a reader (or a crash) sees either the old or
+   * the new index, never codes and metadata from different saves.
    */
   save() {
+    if (this.paged) {
+      throw new Error('A paged vector index is read-only; rebuild it to save');
+    }
     const dataDir = path.dirname(this.indexPath);
     if (!fs.existsSync(dataDir)) {
       fs.mkdirSync(dataDir, { recursive: true });
     }
 
+    if (!this.quantized) {
+      const data = {
+        dimension: this.dimension,
+        precision: 'float64',
+        sourceVersion: this.sourceVersion || undefined,
+        deduplication: this.deduplication || undefined,
+        vectors: this.vectors.map(({ id, embedding, metadata }) => ({ id, embedding: Array.from(embedding), metadata })),
+        createdAt: new Date().toISOString(),
+        count: this.vectors.length
+      };
+
+      writeFileAtomic(this.indexPath, JSON.stringify(data));
+      this._removeStaleBlocks();
+      console.log(`💾 Saved vector index with ${this.vectors.length} vectors`);
+      return;
+    }
+
+    const version = fileVersion();
+
+    // All rows share one contiguous buffer (see _adoptCodes)
+    const first = this.vectors[0].embedding;
+    const codes = new first.constructor(first.buffer, first.byteOffset, this.vectors.length * this.dimension);
+    const codesPath = this._blockPath(this.precision, version);
+    writeFileAtomic(codesPath, Buffer.from(codes.buffer, codes.byteOffset, codes.byteLength));
+
+    if (this.fullPrecision) {
+      this._closeFullPrecision();
+      this.fullPrecisionFile = this._blockPath('f32', version);
+      writeFileAtomic(this.fullPrecisionFile, Buffer.from(this.fullPrecision.buffer));
+      this.fullPrecision = null;   // Rescoring reads from disk from now on
+      this.fullPrecisionOnDisk = true;
+      this._openFullPrecision();
+    }
+
+    const records = this.vectors.map(({ metadata }) => Buffer.from(JSON.stringify(metadata ?? {})));
+    const spans = [];
+    let offset = 0;
+    for (const record of records) {
+      spans.push([offset, record.length]);
+      offset += record.length;
+    }
+    const metadataPath = this._blockPath('meta', version);
+    writeFileAtomic(metadataPath, Buffer.concat(records));
+
     const data = {
       dimension: this.dimension,
-      vectors: this.vectors,
+      precision: this.precision,
+      int8Scale: this.precision === 'int8' ? this.int8Scale : undefined,
+      dimScales: this.dimScales ? Array.from(this.dimScales) : undefined,
+      codesFile: path.basename(codesPath),
+      fullPrecisionFile: this.fullPrecisionOnDisk ? path.basename(this.fullPrecisionFile) : undefined,
+      metadataFile: path.basename(metadataPath),
+      sourceVersion: this.sourceVersion || undefined,
+      deduplication: this.deduplication || undefined,
+      vectors: this.vectors.map(({ id, metadata, scale, norm }, i) => ({
+        id, scale, norm, meta: spans[i], duplicateChunkIds: metadata?.duplicateChunkIds
+      })),
       createdAt: new Date().toISOString(),
       count: this.vectors.length
     };
 
-    fs.writeFileSync(this.indexPath, JSON.stringify(data));
-    console.log(`💾 Saved vector index with ${this.vectors.length} vectors`);
+    // Commit point: the new JSON makes the new block files current
+    writeFileAtomic(this.indexPath, JSON.stringify(data));
+    this._removeStaleBlocks();
+    console.log(`💾 Saved ${this.precision} vector index with ${this.vectors.length} vectors`);
   }
 
   /**
    * Load index from disk
+   * A float64 index is quantized on load when a lower precision is configured.
+   * With mapIndex a quantized index is paged: only ids, norms and scales are
+   * held in memory, codes and chunk metadata are read from their block files.
    * @returns {boolean} - Whether load was successful
    */
   load() {
@@ -122,9 +843,76 @@ class VectorStore {
 
       const data = JSON.parse(fs.readFileSync(this.indexPath, 'utf-8'));
       this.dimension = data.dimension;
-      this.vectors = data.vectors;
-      
-      console.log(`📂 Loaded vector index with ${this.vectors.length} vectors`);
+      this.sourceVersion = data.sourceVersion || null;
+      this.deduplication = data.deduplication || null;
+      this.quantized = false;
+      this.dimScales = null;
+      this.fullPrecision = null;
+      this._closePaged();
+      this._closeFullPrecision();
+      this._closeShards();
+
+      const storedPrecision = data.precision || 'float64';
+      if (storedPrecision === 'float64') {
+        this.vectors = data.vectors;
+        if (this.precision !== 'float64') {
+          this.quantize();
+          this.save();
+          if (this.mapIndex) {
+            return this.load();   // Page the block just written
+          }
+        } else if (this.mapIndex) {
+          console.warn('⚠️ RAG_MAP_INDEX needs a quantized index (RAG_VECTOR_PRECISION float32, float16 or int8); ' +
+            'holding float64 vectors in memory');
+        }
+      } else {
+        const dir = path.dirname(this.indexPath);
+        const codesPath = path.join(dir, data.codesFile);
+        const metadataPath = data.metadataFile ? path.join(dir, data.metadataFile) : null;
+
+        if (storedPrecision !== this.precision) {
+          console.warn(`⚠️ Index is stored as ${storedPrecision} but ${this.precision} is configured; rebuild to change precision`);
+        }
+        this.precision = storedPrecision;
+        this.int8Scale = data.int8Scale || this.int8Scale;
+
+        if (this.mapIndex) {
+          // Descriptors are opened now, so this store keeps reading the save
+          // it loaded after a rebuild replaces (and later deletes) the files
+          this._codesFd = fs.openSync(codesPath, 'r');
+          if (metadataPath) {
+            this._metadataFd = fs.openSync(metadataPath, 'r');
+            this.vectors = data.vectors.map(row => new PagedRow(this, row));
+          } else {
+            // Indexes saved by earlier releases keep metadata inside the JSON file
+            this.vectors = data.vectors.map(({ id, metadata, scale, norm }) => ({ id, metadata, scale: scale ?? 1, norm }));
+          }
+          this.quantized = true;
+          this.paged = true;
+        } else {
+          const metadata = metadataPath ? fs.readFileSync(metadataPath) : null;
+          this.vectors = metadata
+            ? data.vectors.map(row => ({
+              id: row.id,
+              metadata: JSON.parse(metadata.toString('utf-8', row.meta[0], row.meta[0] + row.meta[1]))
+            }))
+            : data.vectors;
+          this._adoptCodes(alignedCopy(fs.readFileSync(codesPath), CODE_ARRAYS[storedPrecision]), data.dimension, (i) => ({
+            scale: data.vectors[i].scale ?? 1,
+            norm: data.vectors[i].norm
+          }));
+        }
+        this.dimScales = data.dimScales ? Float32Array.from(data.dimScales) : null;
+        // Indexes saved by earlier releases use one unversioned rescoring file
+        this.fullPrecisionFile = path.join(dir,
+          data.fullPrecisionFile || path.basename(this.indexPath).replace(/\.json$/, '.f32.bin'));
+        this.fullPrecisionOnDisk = fs.existsSync(this.fullPrecisionFile);
+        if (this.fullPrecisionOnDisk) {
+          this._openFullPrecision();
+        }
+      }
+
+      console.log(`📂 Loaded ${this.precision} vector index with ${this.vectors.length} vectors${this.paged ? ' (paged from disk)' : ''}`);
       return true;
     } catch (error) {
       console.error('Error loading vector index:', error.message);
@@ -140,6 +928,18 @@ class VectorStore {
     return fs.existsSync(this.indexPath);
   }
 
+  /**
+   * Bytes used by embedding storage (float64 assumes 8 bytes per component)
+   * @returns {number}
+   */
+  embeddingBytes() {
+    if (!this.dimension) {
+      return 0;
+    }
+    const perVector = this.dimension * BYTES_PER_COMPONENT[this.quantized ? this.precision : 'float64'];
+    return this.vectors.length * perVector;
+  }
+
   /**
    * Get stats about the vector store
    * @returns {Object}
@@ -148,6 +948,11 @@ class VectorStore {
     return {
       vectorCount: this.vectors.length,
       dimension: this.dimension,
+      precision: this.quantized ? this.precision : 'float64',
+      embeddingBytes: this.embeddingBytes(),
+      paged: this.paged,
+      sourceVersion: this.sourceVersion,
+      deduplication: this.deduplication,
       indexPath: this.indexPath,
       indexExists: this.indexExists()
     };
@@ -158,6 +963,12 @@ class VectorStore {
    */
   clear() {
     this.vectors = [];
+    this.quantized = false;
+    this.dimScales = null;
+    this.fullPrecision = null;
+    this._closePaged();
+    this._closeFullPrecision();
+    this._closeShards();
     console.log('🗑️ Vector store cleared');
   }
 }
@@ -0,0 +1,111 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const ollama = require('ollama');
+const config = require('../src/config');
+const { QueryLog, ConversationSummary } = require('../src/models');
+const ragService = require('../src/services/rag.service');
+const statsService = require('../src/services/stats.service');
+const askService = require('../src/services/ask.service');
+const { conversationStore } = require('../src/services/conversation.service');
+
+const settle = () => new Promise(resolve => setImmediate(resolve));
+
+/**
+ * Stub retrieval, logging and Ollama. Answers return at once; summary
+ * requests wait until the returned `finishSummary` is called.
+ */
+const stubBackend = (t, { logged = 0, stored = null } = {}) => {
+  const calls = { generate: [], summaries: [], finds: [] };
+  let finishSummary;
+  const summaryDone = new Promise(resolve => { finishSummary = resolve; });
+
+  t.mock.method(ragService, 'retrieveContext', async () => ({ chunks: [], context: '', sources: [] }));
+  t.mock.method(statsService, 'recordQuery', async () => {});
+  t.mock.method(QueryLog.prototype, 'save', async function save() { return this; });
+  t.mock.method(QueryLog, 'countDocuments', async () => logged);
+  t.mock.method(QueryLog, 'find', (filter) => {
+    const query = {
+      sort: () => query,
+      limit: (n) => { calls.finds.push(n); return query; },
+      select: () => query,
+      lean: async () => Array.from({ length: calls.finds[calls.finds.length - 1] }, (_, i) => ({
+        userQuery: `old question ${logged - i}`,
+        aiAnswer: `old answer ${logged - i}`
+      }))
+    };
+    return query;
+  });
+  t.mock.method(ConversationSummary, 'findOne', () => {
+    const query = { select: () => query, lean: async () => stored };
+    return query;
+  });
+  t.mock.method(ConversationSummary, 'updateOne', async (filter, update) => {
+    calls.summaries.push({ filter, update });
+    return { modifiedCount: 1 };
+  });
+  t.mock.method(ollama.Ollama.prototype, 'generate', async (request) => {
+    if (request.system && request.system.startsWith('You summarize')) {
+      await summaryDone;
+      return { response: 'User is a beginner with tight hamstrings.' };
+    }
+    calls.generate.push(request);
+    return { response: `answer ${calls.generate.length}`, context: [calls.generate.length] };
+  });
+
+  const { MAX_TURNS, RECENT_TURNS } = config.CONVERSATION;
+  Object.assign(config.CONVERSATION, { MAX_TURNS: 3, RECENT_TURNS: 1 });
+  t.after(() => Object.assign(config.CONVERSATION, { MAX_TURNS, RECENT_TURNS }));
+
+  return { calls, finishSummary };
+};
+
+test('a turn asked while the summary is generated does not wait for it', { timeout: 5000 }, async (t) => {
+  const { calls, finishSummary } = stubBackend(t);
+  const ask = (n) => askService.processQuery(`How do I hold pose ${n}?`, 's1', { conversationId: 'compact' });
+
+  for (let n = 1; n <= 3; n++) {
+    await ask(n);
+  }
+  // The third turn filled the window; its summary is still pending
+  const fourth = await ask(4);
+  assert.equal(fourth.data.turn, 4);
+  assert.deepEqual(calls.generate[3].context, [3]);
+
+  finishSummary();
+  await settle();
+  await settle();
+
+  const { conversation } = conversationStore.getOrCreate('s1', 'compact');
+  assert.equal(conversation.summary, 'User is a beginner with tight hamstrings.');
+  assert.deepEqual(conversation.turns.map(turn => turn.answer), ['answer 3', 'answer 4']);
+  assert.equal(conversation.summarizedTurns, 2);
+  assert.equal(conversation.context, null);
+
+  assert.equal(calls.summaries.length, 1);
+  assert.deepEqual(calls.summaries[0].filter, { sessionId: 's1', conversationId: 'compact', summarizedTurns: { $lt: 2 } });
+  assert.equal(calls.summaries[0].update.$set.summarizedTurns, 2);
+
+  // The next turn restarts the context from the summary and the remaining turns
+  await ask(5);
+  const restart = calls.generate[4];
+  assert.equal(restart.context, undefined);
+  assert.match(restart.system, /tight hamstrings/);
+  assert.match(restart.system, /answer 3[\s\S]*answer 4/);
+  assert.doesNotMatch(restart.system, /answer 2/);
+});
+
+test('a restored conversation gets its stored summary and the turns after it', async (t) => {
+  const { calls } = stubBackend(t, {
+    logged: 10,
+    stored: { summary: 'User practices after knee surgery.', summarizedTurns: 8 }
+  });
+
+  const result = await askService.processQuery('And which poses should I avoid?', 's1', { conversationId: 'restored' });
+
+  assert.equal(result.data.turn, 11);
+  assert.deepEqual(calls.finds, [2]);
+  const request = calls.generate[0];
+  assert.equal(request.context, undefined);
+  assert.match(request.system, /knee surgery/);
+  assert.match(request.system, /old answer 9[\s\S]*old answer 10/);
+});
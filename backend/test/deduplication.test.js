@@ -0,0 +1,81 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const { collapseNearDuplicates, shingle, jaccard } = require('../src/services/deduplication.service');
+
+const words = (from, count) => Array.from({ length: count }, (_, i) => `w${from + i}`).join(' ');
+
+const chunk = (chunkId, articleId, title, content) => ({ chunkId, articleId, title, content, tags: [articleId] });
+
+// 60 words; the variant replaces 2 of them (about 0.82 shingle similarity with the title)
+const BASE = words(0, 60);
+const VARIANT = BASE.replace('w20', 'x20').replace('w40', 'x40');
+
+const similarity = (a, b) => jaccard(shingle(`${a.title}\n${a.content}`), shingle(`${b.title}\n${b.content}`));
+
+test('collapses a pair only at or above the threshold', () => {
+  const a = chunk('a_0', 'a', 'Tree pose', BASE);
+  const b = chunk('b_0', 'b', 'Tree pose', VARIANT);
+  const pairSimilarity = similarity(a, b);
+
+  const below = collapseNearDuplicates([a, b], { threshold: pairSimilarity + 0.01 });
+  assert.equal(below.report.collapsedChunks, 0);
+
+  const at = collapseNearDuplicates([a, b], { threshold: pairSimilarity });
+  assert.equal(at.report.collapsedChunks, 1);
+  assert.deepEqual(at.chunks[0].duplicateChunkIds, ['b_0']);
+  assert.deepEqual(at.chunks[0].articles.map(ref => ref.articleId), ['a', 'b']);
+  assert.deepEqual(at.chunks[0].tags, ['a', 'b']);
+});
+
+test('uses numHashes / bands rows per band', () => {
+  const a = chunk('a_0', 'a', 'Tree pose', BASE);
+  const b = chunk('b_0', 'b', 'Tree pose', VARIANT);
+  const threshold = similarity(a, b);
+
+  const banded = collapseNearDuplicates([a, b], { threshold, numHashes: 128, bands: 16 });
+  assert.equal(banded.report.bands, 16);
+  assert.equal(banded.report.rows, 8);
+  assert.equal(banded.report.comparisons, 1);
+
+  // Remainder hashes are unused: 100 / 16 -> 6 rows
+  assert.equal(collapseNearDuplicates([a], { numHashes: 100, bands: 16 }).report.rows, 6);
+
+  // One band of 128 rows only pairs near-identical signatures, so this pair is never compared
+  const single = collapseNearDuplicates([a, b], { threshold, numHashes: 128, bands: 1 });
+  assert.equal(single.report.comparisons, 0);
+  assert.equal(single.report.collapsedChunks, 0);
+
+  assert.throws(() => collapseNearDuplicates([a], { numHashes: 8, bands: 16 }), /Cannot split 8 hashes into 16 LSH bands/);
+});
+
+test('keeps chunks too short to compare', () => {
+  const short = [
+    chunk('a_0', 'a', 'Note', 'Breathe slowly.'),
+    chunk('b_0', 'b', 'Note', 'Breathe slowly.')
+  ];
+  assert.ok(shingle('Note\nBreathe slowly.').size < 8);
+
+  const { chunks, report } = collapseNearDuplicates(short);
+  assert.equal(chunks.length, 2);
+  assert.equal(report.comparisons, 0);
+
+  // With the minimum lifted, the same pair collapses
+  assert.equal(collapseNearDuplicates(short, { minShingles: 1 }).report.collapsedChunks, 1);
+});
+
+test('does not merge shared boilerplate under different titles', () => {
+  const boilerplate = `Consult your doctor before practicing if you are pregnant. ${words(0, 70)}`;
+  const chunks = [
+    chunk('tree_3', 'tree', 'Vrksasana (Tree Pose)', boilerplate),
+    chunk('crow_5', 'crow', 'Bakasana (Crow Pose)', boilerplate),
+    chunk('tree-copy_3', 'tree-copy', 'Vrksasana (Tree Pose)', boilerplate)
+  ];
+  // Close enough to collapse if titles were ignored
+  assert.ok(similarity(chunks[0], chunks[1]) > 0.85);
+
+  const { chunks: collapsed, report } = collapseNearDuplicates(chunks);
+  assert.equal(report.collapsedChunks, 1);
+  assert.deepEqual(collapsed.map(c => c.chunkId), ['tree_3', 'crow_5']);
+  assert.deepEqual(collapsed[0].articles.map(ref => ref.articleId), ['tree', 'tree-copy']);
+  assert.equal(collapsed[1].articles, undefined);
+});
@@ -0,0 +1,125 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const { GenerationScheduler, AdmissionError, QueueAbortError } = require('../src/services/generationScheduler.service');
+const askService = require('../src/services/ask.service');
+const { askQuestion } = require('../src/controllers/ask.controller');
+
+const scheduler = (options = {}) => new GenerationScheduler({ maxConcurrent: 1, maxQueue: 2, ...options });
+
+/**
+ * Queue acquire() calls and record the order in which they get a slot
+ */
+const track = (promise, name, order) => promise.then((release) => {
+  order.push(name);
+  return release;
+});
+
+test('interactive waiters are served before batch waiters', async () => {
+  const s = scheduler({ maxQueue: 4 });
+  const order = [];
+  const release = await s.acquire('batch');
+
+  const batch = track(s.acquire('batch'), 'batch', order);
+  const interactive = track(s.acquire('interactive'), 'interactive', order);
+  assert.equal(s.queueDepth(), 2);
+
+  release();
+  (await interactive)();
+  (await batch)();
+  assert.deepEqual(order, ['interactive', 'batch']);
+  assert.equal(s.getStats().active, 0);
+});
+
+test('a full queue evicts the newest batch waiter for an interactive request', async () => {
+  const s = scheduler();
+  const release = await s.acquire('interactive');
+  const older = s.acquire('batch');
+  const newer = s.acquire('batch');
+
+  const interactive = s.acquire('interactive');
+  await assert.rejects(newer, (error) => error instanceof AdmissionError && error.statusCode === 429);
+  assert.equal(s.queueDepth(), 2);
+
+  release();
+  (await interactive)();
+  (await older)();
+});
+
+test('a full queue rejects batch work and interactive work it cannot evict for', async () => {
+  const s = scheduler();
+  await s.acquire('interactive');
+  s.acquire('interactive').catch(() => {});
+  s.acquire('batch').catch(() => {});
+
+  await assert.rejects(s.acquire('batch'), AdmissionError);
+  assert.doesNotThrow(() => s.checkAdmission('interactive'));
+
+  s.acquire('interactive').catch(() => {});   // Evicts the batch waiter
+  assert.throws(() => s.checkAdmission('interactive'), AdmissionError);
+  await assert.rejects(s.acquire('interactive'), AdmissionError);
+});
+
+test('Retry-After counts the rounds ahead at the average generation time', async () => {
+  const s = scheduler({ maxConcurrent: 2, maxQueue: 4 });
+  s.avgDurationMs = 3000;
+  assert.equal(s.estimateRetryAfter(), 3);
+
+  await s.acquire();
+  await s.acquire();
+  for (let i = 0; i < 4; i++) {
+    s.acquire().catch(() => {});
+  }
+  // 4 waiting + the new request = 3 rounds of 2 slots
+  const error = await s.acquire().catch(e => e);
+  assert.ok(error instanceof AdmissionError);
+  assert.equal(error.retryAfter, 9);
+  assert.equal(error.queueDepth, 4);
+});
+
+test('a waiter that outlives maxWaitMs is rejected with 429', async (t) => {
+  t.mock.timers.enable({ apis: ['setTimeout'] });
+  const s = scheduler({ maxWaitMs: 1000 });
+  await s.acquire();
+  const waiting = s.acquire();
+
+  t.mock.timers.tick(999);
+  assert.equal(s.queueDepth(), 1);
+  t.mock.timers.tick(1);
+  await assert.rejects(waiting, AdmissionError);
+  assert.equal(s.queueDepth(), 0);
+});
+
+test('aborting a waiter removes it from the queue', async () => {
+  const s = scheduler();
+  const release = await s.acquire();
+  const abort = new AbortController();
+  const waiting = s.acquire('interactive', abort.signal);
+
+  abort.abort();
+  await assert.rejects(waiting, QueueAbortError);
+  assert.equal(s.queueDepth(), 0);
+  await assert.rejects(s.acquire('interactive', abort.signal), QueueAbortError);
+
+  release();
+  assert.equal(s.getStats().active, 0);
+});
+
+test('POST /api/ask answers a full queue with 429 and Retry-After', async (t) => {
+  t.mock.method(askService, 'processQuery', async () => {
+    throw new AdmissionError(7, 32);
+  });
+
+  const res = {
+    headers: {},
+    on: () => {},
+    set(name, value) { this.headers[name] = value; return this; },
+    status(code) { this.statusCode = code; return this; },
+    json(body) { this.body = body; return this; }
+  };
+  await askQuestion({ body: { query: 'What is Tadasana?' } }, res, (error) => assert.fail(error));
+
+  assert.equal(res.statusCode, 429);
+  assert.equal(res.headers['Retry-After'], '7');
+  assert.equal(res.body.retryAfter, 7);
+  assert.equal(res.body.queueDepth, 32);
+});
@@ -0,0 +1,87 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const mongoose = require('mongoose');
+const QueryLog = require('../src/models/queryLog.model');
+const askService = require('../src/services/ask.service');
+
+/**
+ * Replace QueryLog.find with a stub that records filters and returns
+ * `rows` sorted newest first, honouring the keyset filter and the limit
+ */
+const stubFind = (t, rows) => {
+  const filters = [];
+  t.mock.method(QueryLog, 'find', (filter) => {
+    filters.push(filter);
+    let limit = Infinity;
+    const matches = (row) => {
+      if (filter.sessionId && row.sessionId !== filter.sessionId) {
+        return false;
+      }
+      if (!filter.$or) {
+        return true;
+      }
+      const [before, sameTime] = filter.$or;
+      return row.createdAt < before.createdAt.$lt ||
+        (row.createdAt.getTime() === sameTime.createdAt.getTime() && String(row._id) < String(sameTime._id.$lt));
+    };
+    const query = {
+      sort: () => query,
+      limit: (n) => { limit = n; return query; },
+      select: () => query,
+      lean: async () => rows
+        .filter(matches)
+        .sort((a, b) => b.createdAt - a.createdAt || String(b._id).localeCompare(String(a._id)))
+        .slice(0, limit)
+    };
+    return query;
+  });
+  return filters;
+};
+
+const makeRows = (count, sessionId = 's1') => Array.from({ length: count }, (_, i) => ({
+  _id: new mongoose.Types.ObjectId(String(i).padStart(24, '0')),
+  // Pairs of rows share a timestamp, so the _id tie-break matters
+  createdAt: new Date(Date.UTC(2026, 0, 1, 0, 0, Math.floor(i / 2))),
+  sessionId,
+  userQuery: `q${i}`
+}));
+
+test('pages through history newest first without gaps or repeats', async (t) => {
+  const rows = makeRows(7);
+  stubFind(t, rows);
+
+  const seen = [];
+  let cursor;
+  do {
+    const page = await askService.getQueryHistory({ sessionId: 's1', limit: 3, cursor });
+    assert.ok(page.items.length <= 3);
+    seen.push(...page.items.map(item => item.userQuery));
+    cursor = page.nextCursor;
+  } while (cursor);
+
+  assert.deepEqual(seen, ['q6', 'q5', 'q4', 'q3', 'q2', 'q1', 'q0']);
+});
+
+test('returns no cursor on the last page', async (t) => {
+  stubFind(t, makeRows(3));
+  const page = await askService.getQueryHistory({ sessionId: 's1', limit: 3 });
+  assert.equal(page.items.length, 3);
+  assert.equal(page.nextCursor, null);
+});
+
+test('rejects an invalid cursor', async (t) => {
+  stubFind(t, []);
+  await assert.rejects(
+    askService.getQueryHistory({ cursor: 'not-a-cursor' }),
+    { statusCode: 400, message: 'Invalid history cursor' }
+  );
+});
+
+test('rejects a non-string sessionId before querying', async (t) => {
+  const filters = stubFind(t, makeRows(2));
+  await assert.rejects(
+    askService.getQueryHistory({ sessionId: { $ne: 'x' } }),
+    { statusCode: 400, message: 'sessionId must be a string' }
+  );
+  assert.equal(filters.length, 0);
+});
@@ -0,0 +1,94 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const { IndexManager } = require('../src/services/indexManager.service');
+
+const fakeStore = (sourceVersion) => ({
+  sourceVersion,
+  vectors: [],
+  cleared: 0,
+  clear() {
+    this.cleared++;
+  }
+});
+
+const quiet = (t) => {
+  t.mock.method(console, 'log', () => {});
+  t.mock.method(console, 'error', () => {});
+};
+
+test('a replaced store is cleared only after its last request releases it', (t) => {
+  quiet(t);
+  const old = fakeStore('v1');
+  const manager = new IndexManager(old);
+  const first = manager.acquire();
+  const second = manager.acquire();
+
+  const next = fakeStore('v2');
+  manager.swap(next);
+  assert.equal(manager.acquire().store, next);
+  assert.equal(first.store, old);
+  assert.equal(manager.getStatus().retiredInFlight, 2);
+
+  manager.release(first);
+  assert.equal(old.cleared, 0);
+  manager.release(second);
+  assert.equal(old.cleared, 1);
+  assert.equal(manager.getStatus().retiredInFlight, 0);
+  assert.equal(next.cleared, 0);
+});
+
+test('a store with no requests in flight is cleared at the swap', (t) => {
+  quiet(t);
+  const old = fakeStore('v1');
+  const manager = new IndexManager(old);
+  manager.release(manager.acquire());
+
+  manager.swap(fakeStore('v2'));
+  assert.equal(old.cleared, 1);
+  assert.equal(manager.generation, 2);
+
+  // Swapping the active store in again is a no-op for its references
+  const active = manager.active.store;
+  manager.swap(active);
+  assert.equal(active.cleared, 0);
+});
+
+test('withStore keeps the store pinned until fn settles, even when it throws', async (t) => {
+  quiet(t);
+  const old = fakeStore('v1');
+  const manager = new IndexManager(old);
+  let resume;
+  const running = manager.withStore((store) => new Promise((resolve, reject) => {
+    resume = () => reject(new Error(`failed on ${store.sourceVersion}`));
+  }));
+
+  manager.swap(fakeStore('v2'));
+  assert.equal(old.cleared, 0);
+  resume();
+  await assert.rejects(running, /failed on v1/);
+  assert.equal(old.cleared, 1);
+});
+
+test('concurrent reloads join, and a failed build keeps the current store', async (t) => {
+  quiet(t);
+  const current = fakeStore('v1');
+  const manager = new IndexManager(current);
+  let builds = 0;
+
+  const failing = async () => {
+    builds++;
+    throw new Error('embedding service down');
+  };
+  const [a, b] = await Promise.all([manager.reload('test', failing), manager.reload('test', failing)]);
+  assert.equal(builds, 1);
+  assert.equal(a, b);
+  assert.equal(a.status, 'failed');
+  assert.equal(a.error, 'embedding service down');
+  assert.equal(manager.active.store, current);
+
+  const next = fakeStore('v2');
+  const status = await manager.reload('retry', async () => next);
+  assert.equal(status.status, 'succeeded');
+  assert.equal(manager.getStatus().version, 'v2');
+  assert.equal(current.cleared, 1);
+});
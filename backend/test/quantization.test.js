@@ -0,0 +1,104 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const { toFloat16Bits, fromFloat16Bits, quantizeMatrix, FLOAT16_TABLE } = require('../src/services/quantization.service');
+const { TopK } = require('../src/services/topK.service');
+
+// Deterministic pseudo-random numbers in [-0.5, 0.5) (mulberry32)
+const makeRandom = (seed) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296 - 0.5;
+};
+
+const roundTrip16 = (value) => fromFloat16Bits(toFloat16Bits(value));
+
+test('float16 keeps representable values exactly', () => {
+  for (const value of [0, 1, -2, 0.5, 0.1015625, 65504, -65504, 2 ** -14, 2 ** -24]) {
+    assert.equal(roundTrip16(value), value);
+  }
+  assert.ok(Object.is(roundTrip16(-0), -0));
+});
+
+test('float16 rounds to nearest, ties to even', () => {
+  const ulp = 2 ** -10;
+  assert.equal(roundTrip16(1 + ulp / 2), 1);                 // Tie, 1 is even
+  assert.equal(roundTrip16(1 + 1.5 * ulp), 1 + 2 * ulp);     // Tie, rounds up to even
+  assert.equal(roundTrip16(1 + 0.6 * ulp), 1 + ulp);
+  assert.equal(roundTrip16(2 ** -25), 0);                    // Half the smallest subnormal
+  assert.equal(roundTrip16(1e6), Infinity);
+  assert.ok(Number.isNaN(roundTrip16(NaN)));
+});
+
+test('float16 round trip stays within half an ulp', () => {
+  const random = makeRandom(3);
+  for (let i = 0; i < 10000; i++) {
+    const value = random() * 4;
+    const error = Math.abs(roundTrip16(value) - value);
+    assert.ok(error <= Math.max(Math.abs(value), 2 ** -14) * 2 ** -11, `${value} -> ${roundTrip16(value)}`);
+  }
+});
+
+test('float16 codes decode through the lookup table', () => {
+  const full = Float32Array.from([0.25, -1.5, 3.140625, 0]);
+  const { codes, norms } = quantizeMatrix(full, 1, 4, 'float16');
+  assert.deepEqual(Array.from(codes, bits => FLOAT16_TABLE[bits]), Array.from(full));
+  assert.ok(Math.abs(norms[0] - Math.hypot(...full)) < 1e-6);
+});
+
+test('int8 with per-vector scales maps the largest component to 127', () => {
+  const random = makeRandom(5);
+  const count = 50;
+  const dimension = 32;
+  const full = Float32Array.from({ length: count * dimension }, random);
+  const { codes, scales, dimScales, norms } = quantizeMatrix(full, count, dimension, 'int8', 'vector');
+
+  assert.equal(dimScales, null);
+  for (let i = 0; i < count; i++) {
+    const row = full.subarray(i * dimension, (i + 1) * dimension);
+    const decoded = Array.from(codes.subarray(i * dimension, (i + 1) * dimension), code => code * scales[i]);
+    assert.equal(Math.max(...Array.from(codes.subarray(i * dimension, (i + 1) * dimension), Math.abs)), 127);
+    decoded.forEach((value, d) => assert.ok(Math.abs(value - row[d]) <= scales[i] / 2 + 1e-7));
+    assert.ok(Math.abs(norms[i] - Math.hypot(...decoded)) < 1e-5);
+  }
+});
+
+test('int8 with per-dimension scales bounds the error by each dimension\'s scale', () => {
+  const random = makeRandom(7);
+  const count = 40;
+  const dimension = 8;
+  // Dimension d spans roughly +/- (d + 1)
+  const full = Float32Array.from({ length: count * dimension }, (_, i) => random() * 2 * (i % dimension + 1));
+  const { codes, scales, dimScales } = quantizeMatrix(full, count, dimension, 'int8', 'dimension');
+
+  assert.deepEqual(Array.from(scales), new Array(count).fill(1));
+  for (let i = 0; i < full.length; i++) {
+    const d = i % dimension;
+    assert.ok(Math.abs(codes[i] * dimScales[d] - full[i]) <= dimScales[d] / 2 + 1e-6);
+  }
+  assert.ok(dimScales[dimension - 1] > dimScales[0]);
+});
+
+test('TopK returns the best scores in the order of a stable full sort', () => {
+  const random = makeRandom(11);
+  // Coarse scores so ties are common
+  const scores = Array.from({ length: 2000 }, () => Math.round(random() * 50) / 50);
+  const expected = scores
+    .map((score, index) => ({ index, score }))
+    .sort((a, b) => b.score - a.score || a.index - b.index);
+
+  for (const limit of [1, 5, 64, 2000, 3000]) {
+    const top = new TopK(Math.min(limit, scores.length));
+    scores.forEach((score, index) => top.push(index, score));
+    const { indices, scores: best } = top.sorted();
+    const want = expected.slice(0, limit);
+    assert.deepEqual(Array.from(indices), want.map(r => r.index));
+    assert.deepEqual(Array.from(best), want.map(r => r.score));
+  }
+});
+
+test('TopK with no room keeps nothing', () => {
+  const top = new TopK(0);
+  top.push(0, 1);
+  assert.equal(top.sorted().indices.length, 0);
+});
@@ -0,0 +1,90 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const { SingleFlight } = require('../src/services/singleFlight.service');
+
+/**
+ * Start a computation that stays in flight until finish() is called
+ * @returns {Object} - { fn, finish, signal() }
+ */
+const pending = () => {
+  let finish;
+  let seen = null;
+  const done = new Promise((resolve) => {
+    finish = resolve;
+  });
+  const fn = (signal) => {
+    seen = signal;
+    return done;
+  };
+  return { fn, finish, signal: () => seen };
+};
+
+test('followers share the leader\'s promise until it settles', async () => {
+  const group = new SingleFlight('test-share');
+  const work = pending();
+
+  const leader = group.run('q', work.fn);
+  const follower = group.run('q', () => assert.fail('followers do not run fn'));
+  assert.equal(leader.shared, false);
+  assert.equal(follower.shared, true);
+  assert.equal(follower.promise, leader.promise);
+
+  work.finish('answer');
+  assert.equal(await follower.promise, 'answer');
+  assert.equal(group.run('q', async () => 'fresh').shared, false);
+  assert.deepEqual(group.getStats(), { inflight: 1, leaders: 2, followers: 1, ratio: 1 / 3 });
+});
+
+test('the shared signal aborts only once every participant has aborted', async () => {
+  const group = new SingleFlight('test-abort');
+  const work = pending();
+  const first = new AbortController();
+  const second = new AbortController();
+
+  const { promise } = group.run('q', work.fn, first.signal);
+  group.run('q', null, second.signal);
+  await Promise.resolve();
+
+  first.abort();
+  assert.equal(work.signal().aborted, false);
+  second.abort();
+  assert.equal(work.signal().aborted, true);
+
+  work.finish();
+  await promise;
+});
+
+test('a participant without a signal keeps the computation alive', async () => {
+  const group = new SingleFlight('test-unsignalled');
+  const work = pending();
+  const first = new AbortController();
+
+  const { promise } = group.run('q', work.fn, first.signal);
+  group.run('q', null);
+  await Promise.resolve();
+
+  first.abort();
+  assert.equal(work.signal().aborted, false);
+
+  work.finish();
+  await promise;
+});
+
+test('a participant that joins already aborted counts as aborted', async () => {
+  const group = new SingleFlight('test-late');
+  const work = pending();
+  const first = new AbortController();
+  const late = new AbortController();
+  late.abort();
+
+  const { promise } = group.run('q', work.fn, first.signal);
+  group.run('q', null, late.signal);
+  await Promise.resolve();
+  assert.equal(work.signal().aborted, false);
+
+  first.abort();
+  assert.equal(work.signal().aborted, true);
+
+  work.finish();
+  await promise;
+});
@@ -0,0 +1,164 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const { QueryLog, Feedback, StatsCounter } = require('../src/models');
+const statsService = require('../src/services/stats.service');
+
+const FEEDBACK_ROWS = [
+  { createdAt: new Date('2026-01-01'), isHelpful: true },
+  { createdAt: new Date('2026-01-02'), isHelpful: false },
+  { createdAt: new Date('2026-01-03'), isHelpful: true }
+];
+
+/**
+ * Does a document match a filter (equality, $exists, $lt, $lte, $or)
+ */
+const matches = (doc, filter) => Object.entries(filter).every(([key, condition]) => {
+  if (key === '$or') {
+    return condition.some(branch => matches(doc, branch));
+  }
+  const value = doc[key];
+  if (condition instanceof Date) {
+    return value instanceof Date && value.getTime() === condition.getTime();
+  }
+  if (condition && typeof condition === 'object') {
+    return Object.entries(condition).every(([op, operand]) => {
+      if (op === '$exists') return (value !== undefined) === operand;
+      if (op === '$lt') return value !== undefined && value < operand;
+      if (op === '$lte') return value !== undefined && value <= operand;
+      throw new Error(`Unsupported operator ${op}`);
+    });
+  }
+  return value === condition;
+});
+
+const applyUpdate = (doc, update) => {
+  for (const [path, value] of Object.entries(update.$set || {})) doc[path] = value;
+  for (const path of Object.keys(update.$unset || {})) delete doc[path];
+  for (const [path, value] of Object.entries(update.$inc || {})) doc[path] = (doc[path] || 0) + value;
+};
+
+/**
+ * In-memory StatsCounter collection plus Feedback / QueryLog reads.
+ * `failCounts` makes the next Feedback count reject.
+ */
+const fakeDatabase = (t) => {
+  const docs = new Map();
+  const db = { docs, failCounts: 0 };
+  t.mock.method(console, 'log', () => {});
+  t.mock.method(console, 'warn', () => {});
+
+  t.mock.method(StatsCounter, 'updateOne', async (filter, update, options = {}) => {
+    const doc = docs.get(filter._id);
+    if (doc) {
+      if (!matches(doc, filter)) {
+        if (options.upsert) {
+          throw Object.assign(new Error('E11000 duplicate key'), { code: 11000 });
+        }
+        return { modifiedCount: 0 };
+      }
+      applyUpdate(doc, update);
+      return { modifiedCount: 1 };
+    }
+    if (!options.upsert) {
+      return { modifiedCount: 0 };
+    }
+    const created = { _id: filter._id };
+    applyUpdate(created, update);
+    docs.set(filter._id, created);
+    return { modifiedCount: 0, upsertedCount: 1 };
+  });
+
+  t.mock.method(StatsCounter, 'findOneAndUpdate', (filter, update) => {
+    const doc = docs.get(filter._id);
+    const found = doc && matches(doc, filter) ? (applyUpdate(doc, update), { ...doc }) : null;
+    const query = { select: () => query, lean: async () => found };
+    return query;
+  });
+
+  t.mock.method(Feedback, 'countDocuments', async (filter) => {
+    if (db.failCounts > 0) {
+      db.failCounts--;
+      throw new Error('connection reset');
+    }
+    return FEEDBACK_ROWS.filter(row => matches(row, filter)).length;
+  });
+
+  t.mock.method(QueryLog, 'countDocuments', async () => 0);
+  t.mock.method(QueryLog, 'find', () => {
+    const query = { select: () => query, lean: () => query, cursor: () => [] };
+    return query;
+  });
+
+  return db;
+};
+
+test('backfills counts before the cutoff and marks the family done', async (t) => {
+  const db = fakeDatabase(t);
+  await statsService.ensureCounters();
+
+  const feedback = db.docs.get('feedback');
+  assert.ok(feedback.backfilledAt);
+  assert.equal(feedback.backfillClaimedAt, undefined);
+  assert.equal(feedback['counts.total'], 3);
+  assert.equal(feedback['counts.helpful'], 2);
+  assert.equal(feedback['counts.notHelpful'], 1);
+
+  // A second start does not count again
+  await statsService.ensureCounters();
+  assert.equal(db.docs.get('feedback')['counts.total'], 3);
+});
+
+test('a failed backfill stays pending and is retried with the same cutoff', async (t) => {
+  t.mock.timers.enable({ apis: ['setTimeout'] });
+  const db = fakeDatabase(t);
+  db.failCounts = 1;
+
+  await statsService.ensureCounters();
+  const pending = db.docs.get('feedback');
+  assert.equal(pending.backfilledAt, undefined);
+  assert.equal(pending.backfillClaimedAt, undefined);
+  assert.equal(pending['counts.total'], undefined);
+  const cutoff = pending.backfillCutoff;
+
+  // Feedback created after the cutoff is counted live while the backfill is pending
+  await statsService.recordFeedback(true, undefined, new Date(cutoff.getTime() + 1));
+  assert.equal(db.docs.get('feedback')['counts.total'], 1);
+
+  // The retry timer runs the backfill again
+  t.mock.timers.tick(60 * 1000);
+  await new Promise(resolve => setImmediate(resolve));
+  await new Promise(resolve => setImmediate(resolve));
+
+  const done = db.docs.get('feedback');
+  assert.ok(done.backfilledAt);
+  assert.equal(done.backfillCutoff, cutoff);
+  assert.equal(done['counts.total'], 4);
+  assert.equal(done['counts.helpful'], 3);
+});
+
+test('a stale claim is taken over with its original cutoff', async (t) => {
+  const db = fakeDatabase(t);
+  const cutoff = new Date('2026-02-01');
+  const staleClaim = new Date(Date.now() - 11 * 60 * 1000);
+  db.docs.set('feedback', { _id: 'feedback', backfillCutoff: cutoff, backfillClaimedAt: staleClaim });
+  db.docs.set('safety', { _id: 'safety', backfillCutoff: cutoff, backfilledAt: cutoff });
+
+  await statsService.ensureCounters();
+
+  const feedback = db.docs.get('feedback');
+  assert.ok(feedback.backfilledAt);
+  assert.equal(feedback['counts.total'], 3);
+  assert.equal(feedback.backfillCutoff, cutoff);
+});
+
+test('a fresh claim held by another process is left alone', async (t) => {
+  const db = fakeDatabase(t);
+  const claimedAt = new Date();
+  db.docs.set('feedback', { _id: 'feedback', backfillCutoff: claimedAt, backfillClaimedAt: claimedAt });
+
+  await statsService.ensureCounters();
+
+  const feedback = db.docs.get('feedback');
+  assert.equal(feedback.backfilledAt, undefined);
+  assert.equal(feedback.backfillClaimedAt, claimedAt);
+});
@@ -0,0 +1,107 @@
+const test = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { VectorStore } = require('../src/services/vectorStore.service');
+
+const DIMENSION = 16;
+
+// Deterministic pseudo-random numbers (mulberry32)
+const makeRandom = (seed) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296 - 0.5;
+};
+
+const quiet = (t) => {
+  t.mock.method(console, 'log', () => {});
+  t.mock.method(console, 'warn', () => {});
+};
+
+const tempIndex = (t) => {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'vector-store-'));
+  t.after(() => fs.rmSync(dir, { recursive: true, force: true }));
+  return path.join(dir, 'vector_index.json');
+};
+
+/**
+ * Save a quantized index of `count` random vectors
+ */
+const saveIndex = (indexPath, count, { precision = 'float32', seed = 1 } = {}) => {
+  const random = makeRandom(seed);
+  const store = new VectorStore({ indexPath, precision, mapIndex: false, searchShards: 0 });
+  store.initialize(DIMENSION);
+  store.addVectors(Array.from({ length: count }, (_, i) => ({
+    id: `c${i}`,
+    embedding: Array.from({ length: DIMENSION }, random),
+    metadata: { chunkId: `c${i}`, title: `Pose ${i}`, content: `text ${i}`, duplicateChunkIds: i === 7 ? ['dup_7'] : undefined }
+  })));
+  store.quantize();
+  store.save();
+  return store;
+};
+
+const loadIndex = (indexPath, mapIndex) => {
+  const store = new VectorStore({ indexPath, mapIndex, searchShards: 0, rescoreFactor: 1 });
+  assert.equal(store.load(), true);
+  return store;
+};
+
+test('a paged index returns the same results as an in-memory one', (t) => {
+  quiet(t);
+  const indexPath = tempIndex(t);
+  // More rows than fit in one 1 MiB read window
+  saveIndex(indexPath, 20000);
+
+  const memory = loadIndex(indexPath, false);
+  const paged = loadIndex(indexPath, true);
+  t.after(() => paged.clear());
+
+  assert.equal(memory.paged, false);
+  assert.equal(paged.paged, true);
+  assert.equal(paged.vectors[0].embedding, undefined);
+
+  const random = makeRandom(99);
+  const queries = Array.from({ length: 3 }, () => Array.from({ length: DIMENSION }, random));
+  for (const query of queries) {
+    assert.deepEqual(paged.search(query, 5, -1), memory.search(query, 5, -1));
+  }
+  assert.deepEqual(paged.searchBatch(queries, 5, -1), memory.searchBatch(queries, 5, -1));
+  assert.deepEqual(Array.from(paged.fullPrecisionEmbedding(19999)), Array.from(memory.fullPrecisionEmbedding(19999)));
+});
+
+test('a paged index reads chunk metadata on access and resolves aliases', (t) => {
+  quiet(t);
+  const indexPath = tempIndex(t);
+  saveIndex(indexPath, 20);
+
+  const saved = JSON.parse(fs.readFileSync(indexPath, 'utf-8'));
+  assert.equal(saved.vectors[0].metadata, undefined);
+  assert.ok(saved.metadataFile);
+
+  const paged = loadIndex(indexPath, true);
+  t.after(() => paged.clear());
+  assert.deepEqual(paged.getById('c3').metadata, { chunkId: 'c3', title: 'Pose 3', content: 'text 3' });
+  assert.equal(paged.getById('dup_7').id, 'c7');
+  assert.throws(() => paged.save(), /read-only/);
+});
+
+test('a paged index keeps serving the save it loaded after a rebuild', (t) => {
+  quiet(t);
+  const indexPath = tempIndex(t);
+  saveIndex(indexPath, 50, { seed: 1 });
+  const paged = loadIndex(indexPath, true);
+  t.after(() => paged.clear());
+
+  const query = Array.from({ length: DIMENSION }, makeRandom(5));
+  const before = paged.search(query, 3, -1);
+
+  // Later saves replace, and then delete, the loaded generation's files
+  for (const seed of [2, 3, 4]) {
+    saveIndex(indexPath, 50, { seed });
+  }
+  assert.deepEqual(paged.search(query, 3, -1), before);
+  assert.notDeepEqual(loadIndex(indexPath, false).search(query, 3, -1), before);
+});
@@ -4,16 +4,45 @@ A ChatGPT-style Streamlit UI for the Yoga RAG Micro-App
 """
 
 import streamlit as st
-import requests
+import os
+import threading
 import time
 import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 
+from profiling import Profiler, state_footprint
+from yoga_client import (
+    BackendBusy,
+    BackendUnavailable,
+    RequestTimeout,
+    YogaClient,
+    YogaClientError,
+)
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
 API_BASE_URL = "http://localhost:3000/api"
 
+# Longest time ask_question keeps retrying while the backend answers 429 (busy)
+MAX_QUEUE_WAIT_SECONDS = 120
+
+# Opt-in profiling panel: run with YOGA_DEBUG_PANEL=1 streamlit run app.py
+DEBUG_PANEL = os.environ.get("YOGA_DEBUG_PANEL", "0") == "1"
+PROFILE_HISTORY_SIZE = 200
+
+# Queries per page when browsing the session's server-side history
+HISTORY_PAGE_SIZE = 20
+
+# Chunk details cached for all sessions (sources are fetched when a panel is opened)
+CHUNK_CACHE_SIZE = 512
+
+# Seconds a cached chunk detail is used without asking the backend; after that
+# it is revalidated with its ETag (an unchanged chunk costs a bodyless 304)
+CHUNK_CACHE_FRESH_SECONDS = 300
+
 # =============================================================================
 # PAGE CONFIG
 # =============================================================================
@@ -24,10 +53,37 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# =============================================================================
+# PROFILING (opt-in debug panel)
+# =============================================================================
+if DEBUG_PANEL and 'profiler' not in st.session_state:
+    st.session_state.profiler = Profiler(PROFILE_HISTORY_SIZE)
+
+def begin_profile_run():
+    """Start timing a script rerun"""
+    if DEBUG_PANEL:
+        st.session_state.profiler.begin_run()
+
+@contextmanager
+def profile_section(name: str):
+    """Time a section of the script for the current rerun"""
+    if not DEBUG_PANEL:
+        yield
+        return
+    with st.session_state.profiler.section(name):
+        yield
+
+def record_http_call(endpoint: str, client_ms: float, server_ms=None, ok: bool = True):
+    """Record backend call latency next to the server-reported responseTime"""
+    if DEBUG_PANEL:
+        st.session_state.profiler.record_call(endpoint, client_ms, server_ms, ok)
+
+begin_profile_run()
+
 # =============================================================================
 # CUSTOM CSS - ChatGPT-Style UI
 # =============================================================================
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     /* Import Google Font */
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
@@ -482,7 +538,10 @@ st.markdown("""
         padding: 8px 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+with profile_section('css'):
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # =============================================================================
 # SESSION STATE INITIALIZATION
@@ -503,6 +562,14 @@ if 'feedback_given' not in st.session_state:
 if 'pending_query' not in st.session_state:
     st.session_state.pending_query = None
 
+if 'index_version' not in st.session_state:
+    # Knowledge base index version last reported by /rag/status
+    st.session_state.index_version = None
+
+if 'server_history' not in st.session_state:
+    # Pages of this session's logged queries, fetched lazily: {items, next_cursor, exhausted}
+    st.session_state.server_history = {'items': [], 'next_cursor': None, 'exhausted': False}
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
@@ -551,7 +618,8 @@ def add_message_to_conversation(role, content, metadata=None):
             conv['title'] = content[:30] + "..." if len(content) > 30 else content
 
 def delete_conversation(conv_id):
-    """Delete a conversation"""
+    """Delete a conversation (and its server-side multi-turn state)"""
+    end_conversation(conv_id)
     st.session_state.conversations = [c for c in st.session_state.conversations if c['id'] != conv_id]
     if st.session_state.current_conversation_id == conv_id:
         st.session_state.current_conversation_id = None
@@ -559,44 +627,138 @@ def delete_conversation(conv_id):
 # =============================================================================
 # API FUNCTIONS
 # =============================================================================
-def ask_question(query: str) -> dict:
-    """Send question to the backend API"""
+@st.cache_resource
+def get_client() -> YogaClient:
+    """API client shared by all sessions, so its keep-alive connections are reused across reruns"""
+    return YogaClient(API_BASE_URL, max_queue_wait=MAX_QUEUE_WAIT_SECONDS)
+
+def ask_question(query: str, conversation_id: str = None) -> dict:
+    """
+    Send question to the backend API, waiting in line if the server is busy (HTTP 429).
+    With a conversation_id the backend answers it as a follow-up in that conversation.
+    On success, result['data'] is an AskResult.
+    """
+    start_time = time.perf_counter()
+    notice = st.empty()
+    
+    def show_place_in_line(seconds_left: int, position: int):
+        place = f"you're about #{position} in line" if position else "you're in line"
+        notice.info(f"⏳ The assistant is busy — {place}. Retrying in {seconds_left}s...")
+    
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/ask",
-            json={"query": query, "sessionId": st.session_state.session_id},
-            timeout=60
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.ConnectionError:
+        answer = get_client().ask(query, st.session_state.session_id, conversation_id,
+                                  on_busy=show_place_in_line)
+        record_http_call('POST /ask', (time.perf_counter() - start_time) * 1000, answer.response_time)
+        # New log at the head of the history: restart paging from the top
+        st.session_state.server_history = {'items': [], 'next_cursor': None, 'exhausted': False}
+        return {"success": True, "data": answer}
+    except BackendBusy:
+        return {"success": False, "error": "The assistant is very busy right now. Please try again in a minute."}
+    except BackendUnavailable:
         return {"success": False, "error": "Cannot connect to backend. Please ensure the server is running on port 3000."}
-    except requests.exceptions.Timeout:
+    except RequestTimeout:
         return {"success": False, "error": "Request timed out. The server might be processing a complex query."}
     except Exception as e:
         return {"success": False, "error": str(e)}
+    finally:
+        notice.empty()
+
+def end_conversation(conversation_id: str):
+    """Free the backend's state for a conversation (best effort)"""
+    try:
+        get_client().end_conversation(st.session_state.session_id, conversation_id)
+    except YogaClientError:
+        pass
 
 def submit_feedback(query_id: str, is_helpful: bool, comment: str = "") -> dict:
     """Submit feedback for a response"""
+    start_time = time.perf_counter()
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/feedback",
-            json={"queryId": query_id, "isHelpful": is_helpful, "comment": comment},
-            timeout=10
-        )
-        response.raise_for_status()
-        return response.json()
+        data = get_client().submit_feedback(query_id, is_helpful, comment)
+        record_http_call('POST /feedback', (time.perf_counter() - start_time) * 1000)
+        return {"success": True, "data": data}
+    except Exception as e:
+        record_http_call('POST /feedback', (time.perf_counter() - start_time) * 1000, ok=False)
+        return {"success": False, "error": str(e)}
+
+def get_history(cursor: str = None, limit: int = HISTORY_PAGE_SIZE) -> dict:
+    """Fetch one page of this session's query history (newest first)"""
+    start_time = time.perf_counter()
+    try:
+        page = get_client().get_history(st.session_state.session_id, cursor, limit)
+        record_http_call('GET /ask/history', (time.perf_counter() - start_time) * 1000)
+        return {"success": True, "data": page.items, "nextCursor": page.next_cursor}
     except Exception as e:
+        record_http_call('GET /ask/history', (time.perf_counter() - start_time) * 1000, ok=False)
         return {"success": False, "error": str(e)}
 
+def load_more_history():
+    """Append the next history page to session state"""
+    history = st.session_state.server_history
+    result = get_history(cursor=history['next_cursor'])
+    if result.get('success'):
+        history['items'].extend(result.get('data', []))
+        history['next_cursor'] = result.get('nextCursor')
+        history['exhausted'] = not history['next_cursor']
+    return result
+
+def sync_index_version(version: str):
+    """
+    Remember the backend index version.
+    Index-derived cached functions take it as an argument, so a new version
+    misses their cache without clearing other sessions' or unrelated caches.
+    """
+    if version:
+        st.session_state.index_version = version
+
+@st.cache_resource
+def get_chunk_cache() -> dict:
+    """Chunk details shared by all sessions: (chunk_id, index_version) -> (fetched_at, detail), oldest first"""
+    return {'lock': threading.Lock(), 'entries': OrderedDict()}
+
+def fetch_chunk_detail(chunk_id: str, index_version: str):
+    """
+    Full detail of a source chunk, cached for all sessions.
+    index_version is part of the cache key, so a rebuilt index never serves stale text.
+    A cached detail older than CHUNK_CACHE_FRESH_SECONDS is revalidated with its ETag.
+    Returns None when the chunk is no longer in the index; errors are not cached.
+    """
+    cache = get_chunk_cache()
+    key = (chunk_id, index_version)
+    with cache['lock']:
+        entry = cache['entries'].get(key)
+        if entry:
+            cache['entries'].move_to_end(key)
+    if entry and time.monotonic() - entry[0] < CHUNK_CACHE_FRESH_SECONDS:
+        record_http_call('GET /rag/chunks (cached)', 0.0)
+        return entry[1]
+
+    cached = entry[1] if entry else None
+    start_time = time.perf_counter()
+    try:
+        detail = get_client().get_chunk(chunk_id, cached=cached)
+    except YogaClientError:
+        record_http_call('GET /rag/chunks', (time.perf_counter() - start_time) * 1000, ok=False)
+        raise
+    endpoint = 'GET /rag/chunks (304)' if cached is not None and detail is cached else 'GET /rag/chunks'
+    record_http_call(endpoint, (time.perf_counter() - start_time) * 1000)
+
+    with cache['lock']:
+        cache['entries'][key] = (time.monotonic(), detail)
+        cache['entries'].move_to_end(key)
+        while len(cache['entries']) > CHUNK_CACHE_SIZE:
+            cache['entries'].popitem(last=False)
+    return detail
+
 def get_system_status() -> dict:
     """Get RAG system status"""
+    start_time = time.perf_counter()
     try:
-        response = requests.get(f"{API_BASE_URL}/rag/status", timeout=5)
-        if response.ok:
-            return response.json()
-        return {"success": False}
-    except:
+        data = get_client().get_status()
+        record_http_call('GET /rag/status', (time.perf_counter() - start_time) * 1000)
+        return {"success": True, "data": data}
+    except Exception:
+        record_http_call('GET /rag/status', (time.perf_counter() - start_time) * 1000, ok=False)
         return {"success": False}
 
 # =============================================================================
@@ -646,27 +808,38 @@ def render_safety_warning(safety_info: dict, keywords: list = None):
     </div>
     """, unsafe_allow_html=True)
 
-def render_sources(sources: list):
-    """Render sources used in the response"""
+def render_sources(sources: list, message_key: str):
+    """Render sources used in the response; details are fetched only once the panel is opened"""
     if not sources:
         return
     
+    show = st.toggle(f"📚 Sources Used ({len(sources)})", key=f"sources_{message_key}")
+    if not show:
+        return
+    
     st.markdown('<div class="sources-card">', unsafe_allow_html=True)
-    st.markdown('<p class="sources-header">📚 Sources Used</p>', unsafe_allow_html=True)
     
-    for source in sources:
-        source_id = source.get('id', 1)
-        title = source.get('title', 'Unknown Source')
-        category = source.get('category', 'General')
+    for position, source in enumerate(sources, start=1):
         chunk_id = source.get('chunkId', '')
         relevance = source.get('relevance', 0)
+        try:
+            detail = fetch_chunk_detail(chunk_id, st.session_state.index_version)
+        except YogaClientError:
+            detail = None
+        
+        if detail:
+            title, category = detail.title, detail.category or 'General'
+            # Articles sharing a near-duplicate of this chunk (collapsed at index time)
+            also_in = f' &nbsp;|&nbsp; Also in: {", ".join(detail.also_in)}' if detail.also_in else ''
+        else:
+            title, category, also_in = source.get('title', chunk_id or 'Unknown Source'), source.get('category', 'General'), ''
         
         st.markdown(f"""
         <div class="source-item">
-            <span class="source-title">Source {source_id}: {title}</span>
+            <span class="source-title">Source {position}: {title}</span>
             <div class="source-meta">
                 Category: {category} &nbsp;|&nbsp; 
-                <span class="relevance-badge">{relevance}% relevant</span>
+                <span class="relevance-badge">{relevance}% relevant</span>{also_in}
             </div>
         </div>
         """, unsafe_allow_html=True)
@@ -684,7 +857,7 @@ def render_user_message(content: str):
     </div>
     """, unsafe_allow_html=True)
 
-def render_assistant_message(content: str, metadata: dict):
+def render_assistant_message(content: str, metadata: dict, message_key: str):
     """Render assistant message with sources and safety warnings"""
     is_unsafe = metadata.get('isUnsafe', False)
     safety_info = metadata.get('safetyInfo', {})
@@ -707,7 +880,7 @@ def render_assistant_message(content: str, metadata: dict):
     
     # Sources section - display prominently
     if sources:
-        render_sources(sources)
+        render_sources(sources, message_key)
     
     # Response time
     if response_time:
@@ -811,7 +984,7 @@ def render_welcome_screen():
 # =============================================================================
 # SIDEBAR - Chat History
 # =============================================================================
-with st.sidebar:
+with profile_section('sidebar'), st.sidebar:
     # New Chat Button
     st.markdown("### 🧘 Yoga Assistant")
     
@@ -872,6 +1045,25 @@ with st.sidebar:
     
     st.markdown("---")
     
+    # Server-side history for this session, paged lazily with a cursor
+    with st.expander("🕘 Session History"):
+        history = st.session_state.server_history
+        for item in history['items']:
+            icon = "⚠️" if item.get('isUnsafe') else "💬"
+            st.caption(f"{icon} {item.get('userQuery', '')[:60]}")
+        if not history['exhausted']:
+            label = "Load more" if history['items'] else "Load history"
+            if st.button(label, key="history_load_more", use_container_width=True):
+                result = load_more_history()
+                if not result.get('success'):
+                    st.caption(f"❌ {result.get('error', 'Could not load history')}")
+                else:
+                    st.rerun()
+        elif not history['items']:
+            st.caption("No logged queries for this session yet.")
+    
+    st.markdown("---")
+    
     # Safety Demo Section
     st.markdown("### ⚠️ Safety Demo")
     st.markdown('<p style="color: #8e8ea0; font-size: 0.8rem;">Try these to see safety warnings:</p>', unsafe_allow_html=True)
@@ -902,7 +1094,14 @@ with st.sidebar:
         with col1:
             st.metric("Articles", data.get('totalArticles', 34))
         with col2:
-            st.metric("Vectors", data.get('totalChunks', 66))
+            st.metric("Vectors", data.get('totalChunks', data.get('vectorCount', 66)))
+        
+        # The backend hot-swaps its index; index-derived caches are keyed by its version
+        index_info = data.get('index') or {}
+        sync_index_version(index_info.get('version'))
+        if index_info.get('version'):
+            reloading = " · rebuilding…" if index_info.get('reloading') else ""
+            st.caption(f"Index version {index_info['version']}{reloading}")
     else:
         st.markdown('<p class="status-offline">❌ Backend Offline</p>', unsafe_allow_html=True)
         st.caption("Start the backend server first")
@@ -913,6 +1112,8 @@ with st.sidebar:
     # Clear All Chats
     if st.session_state.conversations:
         if st.button("🗑️ Clear All Chats", use_container_width=True):
+            for conv in st.session_state.conversations:
+                end_conversation(conv['id'])
             st.session_state.conversations = []
             st.session_state.current_conversation_id = None
             st.session_state.feedback_given = set()
@@ -937,46 +1138,47 @@ if st.session_state.pending_query:
     # Get response
     with st.spinner("🧘 Thinking..."):
         start_time = time.time()
-        result = ask_question(query)
+        result = ask_question(query, st.session_state.current_conversation_id)
         elapsed = int((time.time() - start_time) * 1000)
     
     if result.get('success'):
-        data = result.get('data', {})
+        answer = result['data']
         metadata = {
-            'isUnsafe': data.get('isUnsafe', False),
-            'safetyInfo': data.get('safetyInfo', {}),
-            'sources': data.get('sources', []),
-            'responseTime': data.get('responseTime', elapsed),
-            'queryId': data.get('queryId')
+            'isUnsafe': answer.is_unsafe,
+            'safetyInfo': answer.safety_info.to_dict() if answer.safety_info else {},
+            'sources': [source.to_dict() for source in answer.sources],
+            'responseTime': answer.response_time or elapsed,
+            'queryId': answer.query_id
         }
-        add_message_to_conversation('assistant', data.get('answer', 'No response received.'), metadata)
+        add_message_to_conversation('assistant', answer.answer or 'No response received.', metadata)
     else:
         add_message_to_conversation('assistant', f"❌ Error: {result.get('error', 'Unknown error')}", {})
     
     st.rerun()
 
 # Display conversation or welcome screen
-conv = get_current_conversation()
+with profile_section('conversation'):
+    conv = get_current_conversation()
 
-if not conv or not conv['messages']:
-    render_welcome_screen()
-else:
-    # Render messages
-    st.markdown('<div class="main-container">', unsafe_allow_html=True)
-    
-    for i, msg in enumerate(conv['messages']):
-        if msg['role'] == 'user':
-            render_user_message(msg['content'])
-        else:
-            render_assistant_message(msg['content'], msg.get('metadata', {}))
-            
-            # Feedback for the last assistant message
-            if i == len(conv['messages']) - 1 and msg['role'] == 'assistant':
-                query_id = msg.get('metadata', {}).get('queryId')
-                if query_id:
-                    render_feedback_section(query_id, i)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
+    if not conv or not conv['messages']:
+        render_welcome_screen()
+    else:
+        # Render messages
+        st.markdown('<div class="main-container">', unsafe_allow_html=True)
+        
+        for i, msg in enumerate(conv['messages']):
+            if msg['role'] == 'user':
+                render_user_message(msg['content'])
+            else:
+                render_assistant_message(msg['content'], msg.get('metadata', {}), f"{conv['id']}_{i}")
+                
+                # Feedback for the last assistant message
+                if i == len(conv['messages']) - 1 and msg['role'] == 'assistant':
+                    query_id = msg.get('metadata', {}).get('queryId')
+                    if query_id:
+                        render_feedback_section(query_id, i)
+        
+        st.markdown('</div>', unsafe_allow_html=True)
 
 # =============================================================================
 # INPUT SECTION (Always at bottom)
@@ -984,7 +1186,7 @@ else:
 st.markdown("---")
 
 # Input container
-with st.container():
+with profile_section('input'), st.container():
     col1, col2 = st.columns([6, 1])
     
     with col1:
@@ -1012,19 +1214,19 @@ if submit and query.strip():
     # Get response
     with st.spinner("🧘 Consulting the yoga knowledge base..."):
         start_time = time.time()
-        result = ask_question(query)
+        result = ask_question(query, st.session_state.current_conversation_id)
         elapsed = int((time.time() - start_time) * 1000)
     
     if result.get('success'):
-        data = result.get('data', {})
+        answer = result['data']
         metadata = {
-            'isUnsafe': data.get('isUnsafe', False),
-            'safetyInfo': data.get('safetyInfo', {}),
-            'sources': data.get('sources', []),
-            'responseTime': data.get('responseTime', elapsed),
-            'queryId': data.get('queryId')
+            'isUnsafe': answer.is_unsafe,
+            'safetyInfo': answer.safety_info.to_dict() if answer.safety_info else {},
+            'sources': [source.to_dict() for source in answer.sources],
+            'responseTime': answer.response_time or elapsed,
+            'queryId': answer.query_id
         }
-        add_message_to_conversation('assistant', data.get('answer', 'No response received.'), metadata)
+        add_message_to_conversation('assistant', answer.answer or 'No response received.', metadata)
     else:
         add_message_to_conversation('assistant', f"❌ Error: {result.get('error', 'Unknown error')}", {})
     
@@ -1036,3 +1238,55 @@ st.markdown("""
     Built with ❤️ using RAG Pipeline • Ollama • MongoDB • Streamlit
 </div>
 """, unsafe_allow_html=True)
+
+# =============================================================================
+# DEBUG PROFILING PANEL (YOGA_DEBUG_PANEL=1)
+# =============================================================================
+def render_profiling_panel():
+    """Show rerun cost by section, backend call latency and session footprint"""
+    profiler = st.session_state.profiler
+    runs = list(profiler.runs)
+    calls = list(profiler.calls)
+    
+    with st.sidebar.expander("🛠️ Profiling", expanded=False):
+        # Rerun cost by section (reruns cut short by st.rerun() only have their early sections)
+        if runs:
+            last = runs[-1]
+            st.markdown(f"**This rerun:** {last['totalMs']:.1f} ms")
+            st.table([{'section': name, 'ms': round(ms, 2)} for name, ms in last['sections'].items()])
+            
+            st.markdown(f"**Average over {len(runs)} reruns**")
+            st.table([
+                {'section': name, 'avg ms': round(ms, 2)}
+                for name, ms in profiler.section_averages().items()
+            ])
+        
+        # Backend calls: client wall time vs server-reported responseTime
+        if calls:
+            st.markdown("**Backend calls (latest 10)**")
+            st.table([
+                {k: v for k, v in call.items() if k != 'timestamp'}
+                for call in calls[-10:]
+            ])
+        
+        # Session state footprint
+        sizes = state_footprint(st.session_state)
+        st.markdown(f"**Session state:** {sum(sizes.values()) / 1024:.1f} KB")
+        st.table([
+            {'key': key, 'KB': round(size / 1024, 2)}
+            for key, size in sorted(sizes.items(), key=lambda item: -item[1])
+        ])
+        
+        # Export rolling history for offline analysis
+        st.download_button(
+            "⬇️ Export profile (JSON)",
+            data=profiler.export(st.session_state.session_id, sizes),
+            file_name=f"profile_{st.session_state.session_id}.json",
+            mime="application/json",
+            use_container_width=True
+        )
+        if st.button("Reset profile", use_container_width=True):
+            profiler.reset()
+
+if DEBUG_PANEL:
+    render_profiling_panel()
@@ -0,0 +1,91 @@
+"""
+Rerun profiler behind the opt-in debug panel (YOGA_DEBUG_PANEL=1)
+Kept free of Streamlit so the bookkeeping can be tested on its own.
+"""
+
+import json
+import pickle
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+HISTORY_SIZE = 200
+
+
+class Profiler:
+    """Rolling history of rerun section timings and backend calls for one session"""
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self.runs = deque(maxlen=history_size)
+        self.calls = deque(maxlen=history_size)
+        self.current = None
+
+    def begin_run(self):
+        """Start timing a script rerun; the record is stored up front so st.rerun() can't drop it"""
+        self.current = {
+            'timestamp': datetime.now().isoformat(),
+            'started': time.perf_counter(),
+            'sections': {},
+            'totalMs': 0.0
+        }
+        self.runs.append(self.current)
+
+    @contextmanager
+    def section(self, name: str):
+        """Time a section of the current rerun; repeated sections add up"""
+        run = self.current
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            if run is not None:
+                run['sections'][name] = run['sections'].get(name, 0.0) + (end - start) * 1000
+                run['totalMs'] = (end - run['started']) * 1000
+
+    def record_call(self, endpoint: str, client_ms: float, server_ms=None, ok: bool = True):
+        """Record backend call latency next to the server-reported responseTime"""
+        self.calls.append({
+            'timestamp': datetime.now().isoformat(),
+            'endpoint': endpoint,
+            'clientMs': round(client_ms, 1),
+            'serverMs': server_ms,
+            'overheadMs': round(client_ms - server_ms, 1) if server_ms is not None else None,
+            'ok': ok
+        })
+
+    def section_averages(self) -> dict:
+        """Average milliseconds per section over the kept reruns (absent sections count as 0)"""
+        runs = list(self.runs)
+        names = sorted({name for run in runs for name in run['sections']})
+        return {
+            name: sum(run['sections'].get(name, 0.0) for run in runs) / len(runs)
+            for name in names
+        }
+
+    def export(self, session_id: str, state_sizes: dict) -> str:
+        """Rolling history as JSON, for offline analysis"""
+        return json.dumps({
+            'sessionId': session_id,
+            'runs': [{k: v for k, v in run.items() if k != 'started'} for run in self.runs],
+            'calls': list(self.calls),
+            'sessionStateBytes': state_sizes
+        }, indent=2)
+
+    def reset(self):
+        self.runs.clear()
+        self.calls.clear()
+
+
+def state_footprint(state, exclude=('profiler',)) -> dict:
+    """Approximate pickled size in bytes of each session state key"""
+    sizes = {}
+    for key in state:
+        if key in exclude:
+            continue
+        try:
+            sizes[key] = len(pickle.dumps(state[key]))
+        except Exception:
+            sizes[key] = len(json.dumps(state[key], default=str))
+    return sizes
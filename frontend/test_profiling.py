@@ -0,0 +1,101 @@
+"""
+Tests for the debug panel's profiler (no Streamlit needed)
+Run with: python -m pytest frontend
+"""
+
+import json
+import threading
+
+import pytest
+
+import profiling
+from profiling import Profiler, state_footprint
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace perf_counter with a clock the test advances by hand"""
+    now = [100.0]
+    monkeypatch.setattr(profiling.time, 'perf_counter', lambda: now[0])
+    return now
+
+
+def test_sections_add_up_within_a_rerun(clock):
+    profiler = Profiler()
+    profiler.begin_run()
+    with profiler.section('css'):
+        clock[0] += 0.002
+    with profiler.section('conversation'):
+        clock[0] += 0.010
+    with profiler.section('css'):
+        clock[0] += 0.001
+
+    run = profiler.runs[-1]
+    assert run['sections'] == pytest.approx({'css': 3.0, 'conversation': 10.0})
+    assert run['totalMs'] == pytest.approx(13.0)
+
+
+def test_a_section_that_raises_is_still_timed(clock):
+    profiler = Profiler()
+    profiler.begin_run()
+    with pytest.raises(RuntimeError):
+        with profiler.section('input'):
+            clock[0] += 0.004
+            raise RuntimeError('st.rerun')
+    assert profiler.runs[-1]['sections']['input'] == pytest.approx(4.0)
+
+
+def test_averages_count_missing_sections_as_zero(clock):
+    profiler = Profiler()
+    for sidebar_ms in (4, 8):
+        profiler.begin_run()
+        with profiler.section('sidebar'):
+            clock[0] += sidebar_ms / 1000
+    with profiler.section('input'):
+        clock[0] += 0.006
+
+    assert profiler.section_averages() == pytest.approx({'input': 3.0, 'sidebar': 6.0})
+
+
+def test_history_is_bounded():
+    profiler = Profiler(history_size=3)
+    for i in range(5):
+        profiler.begin_run()
+        profiler.record_call('GET /rag/status', float(i))
+    assert len(profiler.runs) == 3
+    assert [call['clientMs'] for call in profiler.calls] == [2.0, 3.0, 4.0]
+
+
+def test_calls_report_overhead_over_server_time():
+    profiler = Profiler()
+    profiler.record_call('POST /ask', 152.34, 120)
+    profiler.record_call('POST /feedback', 20.0, ok=False)
+
+    ask, feedback = profiler.calls
+    assert ask['overheadMs'] == pytest.approx(32.3)
+    assert feedback['serverMs'] is None and feedback['overheadMs'] is None
+    assert feedback['ok'] is False
+
+
+def test_export_and_reset():
+    profiler = Profiler()
+    profiler.begin_run()
+    profiler.record_call('POST /ask', 10.0, 8)
+
+    exported = json.loads(profiler.export('s1', {'conversations': 42}))
+    assert exported['sessionId'] == 's1'
+    assert 'started' not in exported['runs'][0]
+    assert exported['calls'][0]['endpoint'] == 'POST /ask'
+    assert exported['sessionStateBytes'] == {'conversations': 42}
+
+    profiler.reset()
+    assert not profiler.runs and not profiler.calls
+
+
+def test_footprint_skips_the_profiler_and_survives_unpicklable_values():
+    state = {'profiler': Profiler(), 'messages': ['hi'] * 100, 'lock': threading.Lock()}
+    sizes = state_footprint(state)
+
+    assert set(sizes) == {'messages', 'lock'}
+    assert sizes['messages'] > 100
+    assert sizes['lock'] > 0
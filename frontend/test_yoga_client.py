@@ -0,0 +1,124 @@
+"""
+Tests for yoga_client against httpx.MockTransport (no backend needed)
+Run with: python -m pytest frontend
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from yoga_client import client as client_module
+from yoga_client import APIError, AskResult, AsyncYogaClient, BackendBusy
+
+ANSWER = {
+    'answer': 'Stand tall.',
+    'sources': [{'chunkId': 'tadasana_0', 'relevance': 87}],
+    'isUnsafe': False,
+    'safetyInfo': None,
+    'queryId': 'q1',
+    'responseTime': 120,
+    'timings': {'search': 3.5},
+    'query': 'What is Tadasana?',
+    'conversationId': None,
+    'turn': None,
+    'coalesced': False
+}
+
+
+def run(handler, call, **options):
+    """Run `call(client)` on a client whose requests go to `handler`"""
+    async def main():
+        async with AsyncYogaClient('http://test/api', transport=httpx.MockTransport(handler), **options) as client:
+            return await call(client)
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record waits instead of sleeping"""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(client_module.asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+def test_ask_retries_after_busy(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={'Retry-After': '3'},
+                                  json={'success': False, 'error': 'Server is busy', 'queueDepth': 4})
+        return httpx.Response(200, json={'success': True, 'data': ANSWER})
+
+    busy = []
+    result = run(handler, lambda c: c.ask('What is Tadasana?', on_busy=lambda *args: busy.append(args)))
+
+    assert result == AskResult.from_dict(ANSWER)
+    assert len(calls) == 2
+    assert sleeps == [1, 1, 1]
+    assert busy == [(3, 5), (2, 5), (1, 5)]
+
+
+def test_ask_gives_up_after_max_queue_wait(sleeps):
+    def handler(request):
+        return httpx.Response(429, headers={'Retry-After': '5'}, json={'success': False, 'error': 'Server is busy'})
+
+    with pytest.raises(BackendBusy) as info:
+        run(handler, lambda c: c.ask('q'), max_queue_wait=2)
+
+    assert info.value.status == 429
+    assert info.value.retry_after == 5
+    assert info.value.queue_depth is None
+    assert sleeps == [1, 1]
+
+
+def test_busy_with_invalid_retry_after(sleeps):
+    def handler(request):
+        return httpx.Response(429, headers={'Retry-After': 'soon'}, text='busy')
+
+    with pytest.raises(BackendBusy) as info:
+        run(handler, lambda c: c.ask('q', max_queue_wait=0))
+
+    assert info.value.retry_after == 2
+    assert sleeps == []
+
+
+@pytest.mark.parametrize('response, status, message', [
+    (httpx.Response(500, json={'success': False, 'error': 'Failed to process query'}), 500, 'Failed to process query'),
+    (httpx.Response(502, text='<html>Bad Gateway</html>'), 502, 'Bad Gateway'),
+    (httpx.Response(200, json={'success': False, 'error': 'Query is required'}), 200, 'Query is required'),
+])
+def test_error_mapping(response, status, message):
+    with pytest.raises(APIError) as info:
+        run(lambda request: response, lambda c: c.ask('q'))
+
+    assert not isinstance(info.value, BackendBusy)
+    assert info.value.status == status
+    assert info.value.message == message
+
+
+def test_end_conversation_quotes_id():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={'success': True, 'data': {'removed': True}})
+
+    assert run(handler, lambda c: c.end_conversation('s1', 'a/b c?d'))
+    assert seen[0].method == 'DELETE'
+    assert seen[0].url.raw_path == b'/api/ask/conversations/a%2Fb%20c%3Fd?sessionId=s1'
+
+
+def test_ask_result_round_trip():
+    data = dict(ANSWER, safetyInfo={
+        'warning': 'w', 'recommendation': 'r', 'disclaimer': 'd',
+        'detectedKeywords': ['pregnant'], 'detectedCategories': ['pregnancy']
+    })
+    assert AskResult.from_dict(data).to_dict() == data
+    assert AskResult.from_dict(ANSWER).to_dict() == ANSWER
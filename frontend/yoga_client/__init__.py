@@ -0,0 +1,28 @@
+"""
+Yoga RAG API client
+AsyncYogaClient is the asyncio client; YogaClient wraps it for blocking code.
+"""
+
+from .client import DEFAULT_BASE_URL, AsyncYogaClient, Timeouts
+from .errors import APIError, BackendBusy, BackendUnavailable, RequestTimeout, YogaClientError
+from .models import AskResult, BatchItem, BatchSummary, ChunkDetail, HistoryPage, SafetyInfo, Source
+from .sync import YogaClient
+
+__all__ = [
+    "DEFAULT_BASE_URL",
+    "AsyncYogaClient",
+    "YogaClient",
+    "Timeouts",
+    "AskResult",
+    "BatchItem",
+    "BatchSummary",
+    "ChunkDetail",
+    "HistoryPage",
+    "SafetyInfo",
+    "Source",
+    "YogaClientError",
+    "APIError",
+    "BackendBusy",
+    "BackendUnavailable",
+    "RequestTimeout",
+]
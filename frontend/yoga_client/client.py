@@ -0,0 +1,248 @@
+"""
+Asyncio client for the Yoga RAG API
+One AsyncYogaClient holds a pool of HTTP/1.1 keep-alive connections, so
+repeated calls skip the TCP handshake. Every operation has its own timeout
+covering the whole call, and busy (429) answers are retried after the
+server's Retry-After for up to max_queue_wait seconds.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Union
+from urllib.parse import quote
+
+import httpx
+
+from .errors import APIError, BackendBusy, BackendUnavailable, RequestTimeout
+from .models import AskResult, BatchItem, BatchSummary, ChunkDetail, HistoryPage
+
+DEFAULT_BASE_URL = "http://localhost:3000/api"
+
+
+@dataclass(frozen=True)
+class Timeouts:
+    """Seconds allowed per operation (connect applies to each new connection)"""
+    connect: float = 5.0
+    ask: float = 60.0
+    batch: float = 600.0
+    feedback: float = 10.0
+    history: float = 10.0
+    status: float = 5.0
+    chunk: float = 5.0
+    conversation: float = 5.0
+
+
+class AsyncYogaClient:
+    """
+    Client for the backend's /api routes.
+    Use as `async with AsyncYogaClient() as client:` or call aclose() when done.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, *, max_connections: int = 10,
+                 timeouts: Timeouts = None, max_queue_wait: float = 120,
+                 keepalive_expiry: float = 30.0, transport: httpx.AsyncBaseTransport = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeouts = timeouts or Timeouts()
+        self.max_queue_wait = max_queue_wait
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            # Operation deadlines are enforced per call; only connecting has its own limit
+            timeout=httpx.Timeout(None, connect=self.timeouts.connect),
+            # Alternative transport, e.g. httpx.MockTransport in tests
+            transport=transport
+        )
+
+    async def __aenter__(self) -> "AsyncYogaClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close pooled connections"""
+        await self._http.aclose()
+
+    # =========================================================================
+    # TRANSPORT
+    # =========================================================================
+    async def _send(self, request: httpx.Request, timeout: float, stream: bool = False) -> httpx.Response:
+        try:
+            return await asyncio.wait_for(self._http.send(request, stream=stream), timeout)
+        except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+            raise RequestTimeout(f"{request.method} {request.url.path} timed out after {timeout}s") from e
+        except httpx.TransportError as e:
+            raise BackendUnavailable(f"Cannot connect to backend at {self.base_url}: {e}") from e
+
+    async def _call(self, method: str, path: str, timeout: float, **kwargs) -> Dict[str, Any]:
+        """Send a request and return its JSON body, raising for error statuses"""
+        response = await self._send(self._http.build_request(method, path, **kwargs), timeout)
+        return self._parse(response)
+
+    @staticmethod
+    def _parse(response: httpx.Response) -> Dict[str, Any]:
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.status_code == 429:
+            try:
+                retry_after = max(1, int(response.headers.get('Retry-After', 2)))
+            except ValueError:
+                retry_after = 2
+            raise BackendBusy(body.get('error', 'Server is busy'), retry_after, body.get('queueDepth'))
+        if response.is_error or body.get('success') is False:
+            raise APIError(response.status_code, body.get('error') or response.reason_phrase)
+        return body
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+    async def ask(self, query: str, session_id: str = None, conversation_id: str = None, *,
+                  timeout: float = None, max_queue_wait: float = None,
+                  on_busy: Callable[[int, Optional[int]], Any] = None) -> AskResult:
+        """
+        Ask one question. While the backend is busy (429) the call waits and
+        retries for up to max_queue_wait seconds; on_busy(seconds_left, position)
+        is called once a second while waiting. The timeout applies per attempt.
+        """
+        payload = {"query": query}
+        if session_id:
+            payload["sessionId"] = session_id
+        if conversation_id:
+            payload["conversationId"] = conversation_id
+        timeout = timeout or self.timeouts.ask
+        max_wait = self.max_queue_wait if max_queue_wait is None else max_queue_wait
+        waited = 0
+
+        while True:
+            try:
+                body = await self._call('POST', '/ask', timeout, json=payload)
+                return AskResult.from_dict(body.get('data') or {})
+            except BackendBusy as busy:
+                if waited >= max_wait:
+                    raise
+                delay = min(busy.retry_after, max_wait - waited)
+                position = busy.queue_depth + 1 if busy.queue_depth is not None else None
+                for remaining in range(int(delay), 0, -1):
+                    if on_busy:
+                        on_busy(remaining, position)
+                    await asyncio.sleep(1)
+                waited += delay
+
+    async def ask_many(self, queries: Sequence[str], session_id: str = None, *,
+                       concurrency: int = 4, timeout: float = None,
+                       return_exceptions: bool = True) -> List[Union[AskResult, Exception]]:
+        """
+        Ask several questions over the shared pool with at most `concurrency`
+        in flight. Results come back in input order; failed items are the
+        raised exception when return_exceptions is true.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def ask_one(query: str) -> AskResult:
+            async with semaphore:
+                return await self.ask(query, session_id, timeout=timeout)
+
+        return await asyncio.gather(*(ask_one(q) for q in queries), return_exceptions=return_exceptions)
+
+    async def stream_batch(self, queries: Sequence[str], session_id: str = None, *,
+                           mode: str = "full", concurrency: int = None,
+                           timeout: float = None) -> AsyncIterator[Union[BatchItem, BatchSummary]]:
+        """
+        Run POST /ask/batch and yield each result as its NDJSON line arrives
+        (completion order), then the BatchSummary. The timeout covers the whole stream.
+        """
+        payload = {"queries": list(queries), "mode": mode}
+        if session_id:
+            payload["sessionId"] = session_id
+        if concurrency:
+            payload["concurrency"] = concurrency
+
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeouts.batch
+        deadline = loop.time() + timeout
+        request = self._http.build_request('POST', '/ask/batch', json=payload)
+        response = await self._send(request, timeout, stream=True)
+        try:
+            if response.is_error:
+                await response.aread()
+                self._parse(response)
+
+            lines = response.aiter_lines()
+            while True:
+                try:
+                    line = await asyncio.wait_for(lines.__anext__(), max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    break
+                except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+                    raise RequestTimeout(f"POST /ask/batch timed out after {timeout}s") from e
+                except httpx.TransportError as e:
+                    raise BackendUnavailable(f"Batch stream interrupted: {e}") from e
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                kind = item.get('type')
+                if kind == 'summary':
+                    yield BatchSummary.from_dict(item)
+                elif kind == 'error':
+                    raise APIError(response.status_code, item.get('error', 'Batch failed'))
+                else:
+                    yield BatchItem.from_dict(item)
+        finally:
+            await response.aclose()
+
+    # =========================================================================
+    # SESSION DATA
+    # =========================================================================
+    async def submit_feedback(self, query_id: str, is_helpful: bool, comment: str = "", *,
+                              timeout: float = None) -> Dict[str, Any]:
+        """Rate an answer; returns the stored feedback"""
+        body = await self._call('POST', '/feedback', timeout or self.timeouts.feedback,
+                                json={"queryId": query_id, "isHelpful": is_helpful, "comment": comment})
+        return body.get('data') or {}
+
+    async def get_history(self, session_id: str = None, cursor: str = None, limit: int = 20, *,
+                          timeout: float = None) -> HistoryPage:
+        """Fetch one page of query history, newest first"""
+        params = {"limit": limit}
+        if session_id:
+            params["sessionId"] = session_id
+        if cursor:
+            params["cursor"] = cursor
+        body = await self._call('GET', '/ask/history', timeout or self.timeouts.history, params=params)
+        return HistoryPage.from_dict(body)
+
+    async def end_conversation(self, session_id: str, conversation_id: str, *,
+                               timeout: float = None) -> bool:
+        """Free the backend's state for a conversation; returns whether it existed"""
+        body = await self._call('DELETE', f'/ask/conversations/{quote(conversation_id, safe="")}',
+                                timeout or self.timeouts.conversation, params={"sessionId": session_id})
+        return bool((body.get('data') or {}).get('removed'))
+
+    async def get_chunk(self, chunk_id: str, cached: ChunkDetail = None, *,
+                        timeout: float = None) -> Optional[ChunkDetail]:
+        """
+        Full detail of a source chunk, or None when it is no longer in the index.
+        Pass a previously fetched `cached` detail to revalidate it with its ETag;
+        it is returned as-is when the server answers 304 Not Modified.
+        """
+        headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+        request = self._http.build_request('GET', f'/rag/chunks/{quote(chunk_id, safe="")}', headers=headers)
+        response = await self._send(request, timeout or self.timeouts.chunk)
+        if response.status_code == 304 and cached:
+            return cached
+        if response.status_code == 404:
+            return None
+        body = self._parse(response)
+        return ChunkDetail.from_dict(body.get('data') or {}, etag=response.headers.get('ETag'))
+
+    async def get_status(self, *, timeout: float = None) -> Dict[str, Any]:
+        """RAG index status (GET /rag/status `data`)"""
+        body = await self._call('GET', '/rag/status', timeout or self.timeouts.status)
+        return body.get('data') or {}
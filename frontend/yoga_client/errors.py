@@ -0,0 +1,35 @@
+"""
+Exceptions raised by the RAG API client
+"""
+
+from typing import Optional
+
+
+class YogaClientError(Exception):
+    """Base class for client errors"""
+
+
+class BackendUnavailable(YogaClientError):
+    """The backend could not be reached"""
+
+
+class RequestTimeout(YogaClientError):
+    """The operation did not finish within its timeout"""
+
+
+class APIError(YogaClientError):
+    """The backend answered with an error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class BackendBusy(APIError):
+    """Generation queue is full (HTTP 429); retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int, queue_depth: Optional[int] = None):
+        super().__init__(429, message)
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
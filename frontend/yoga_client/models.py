@@ -0,0 +1,191 @@
+"""
+Typed models for the RAG API payloads
+Each model is built from the camelCase JSON the backend returns with
+from_dict() and converts back with to_dict(), so callers can keep plain
+dicts (e.g. in Streamlit session state) when they need to.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class Source:
+    """Reference to a knowledge base chunk used to answer a query (see ChunkDetail)"""
+    chunk_id: str
+    relevance: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Source":
+        return cls(chunk_id=data.get('chunkId', ''), relevance=data.get('relevance', 0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'chunkId': self.chunk_id, 'relevance': self.relevance}
+
+
+@dataclass(frozen=True)
+class ChunkDetail:
+    """GET /api/rag/chunks/:chunkId; etag is the response ETag for revalidation"""
+    chunk_id: str
+    title: str = ''
+    content: str = ''
+    article_id: Optional[str] = None
+    category: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    source: Optional[str] = None
+    difficulty: Optional[str] = None
+    safety_notes: str = ''
+    articles: List[Dict[str, Any]] = field(default_factory=list)
+    etag: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], etag: str = None) -> "ChunkDetail":
+        return cls(
+            chunk_id=data.get('chunkId', ''),
+            title=data.get('title', ''),
+            content=data.get('content', ''),
+            article_id=data.get('articleId'),
+            category=data.get('category'),
+            tags=list(data.get('tags') or []),
+            source=data.get('source'),
+            difficulty=data.get('difficulty'),
+            safety_notes=data.get('safetyNotes') or '',
+            articles=list(data.get('articles') or []),
+            etag=etag
+        )
+
+    @property
+    def also_in(self) -> List[str]:
+        """Titles of other articles holding a near-duplicate of this chunk"""
+        return [a.get('title', '') for a in self.articles if a.get('articleId') != self.article_id]
+
+
+@dataclass(frozen=True)
+class SafetyInfo:
+    """Safety warning attached to a flagged query"""
+    warning: str = ''
+    recommendation: str = ''
+    disclaimer: str = ''
+    detected_keywords: List[str] = field(default_factory=list)
+    detected_categories: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["SafetyInfo"]:
+        if not data:
+            return None
+        return cls(
+            warning=data.get('warning', ''),
+            recommendation=data.get('recommendation', ''),
+            disclaimer=data.get('disclaimer', ''),
+            detected_keywords=list(data.get('detectedKeywords') or []),
+            detected_categories=list(data.get('detectedCategories') or [])
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'warning': self.warning,
+            'recommendation': self.recommendation,
+            'disclaimer': self.disclaimer,
+            'detectedKeywords': list(self.detected_keywords),
+            'detectedCategories': list(self.detected_categories)
+        }
+
+
+@dataclass(frozen=True)
+class AskResult:
+    """The `data` payload of POST /api/ask (and of successful batch items)"""
+    answer: str
+    sources: List[Source]
+    is_unsafe: bool = False
+    safety_info: Optional[SafetyInfo] = None
+    query_id: Optional[str] = None
+    response_time: Optional[int] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    query: Optional[str] = None
+    conversation_id: Optional[str] = None
+    turn: Optional[int] = None
+    coalesced: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AskResult":
+        return cls(
+            answer=data.get('answer', ''),
+            sources=[Source.from_dict(s) for s in data.get('sources') or []],
+            is_unsafe=bool(data.get('isUnsafe', False)),
+            safety_info=SafetyInfo.from_dict(data.get('safetyInfo')),
+            query_id=data.get('queryId'),
+            response_time=data.get('responseTime'),
+            timings=dict(data.get('timings') or {}),
+            query=data.get('query'),
+            conversation_id=data.get('conversationId'),
+            turn=data.get('turn'),
+            coalesced=bool(data.get('coalesced', False))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'answer': self.answer,
+            'sources': [s.to_dict() for s in self.sources],
+            'isUnsafe': self.is_unsafe,
+            'safetyInfo': self.safety_info.to_dict() if self.safety_info else None,
+            'queryId': self.query_id,
+            'responseTime': self.response_time,
+            'timings': dict(self.timings),
+            'query': self.query,
+            'conversationId': self.conversation_id,
+            'turn': self.turn,
+            'coalesced': self.coalesced
+        }
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One streamed result line of POST /api/ask/batch"""
+    index: int
+    success: bool
+    result: Optional[AskResult] = None
+    error: Optional[str] = None
+    retry_after: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BatchItem":
+        return cls(
+            index=data.get('index', -1),
+            success=bool(data.get('success')),
+            result=AskResult.from_dict(data['data']) if data.get('data') else None,
+            error=data.get('error'),
+            retry_after=data.get('retryAfter')
+        )
+
+
+@dataclass(frozen=True)
+class BatchSummary:
+    """Final line of POST /api/ask/batch"""
+    total: int
+    succeeded: int
+    failed: int
+    mode: str = 'full'
+    response_time: Optional[int] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BatchSummary":
+        return cls(
+            total=data.get('total', 0),
+            succeeded=data.get('succeeded', 0),
+            failed=data.get('failed', 0),
+            mode=data.get('mode', 'full'),
+            response_time=data.get('responseTime'),
+            timings=dict(data.get('timings') or {})
+        )
+
+
+@dataclass(frozen=True)
+class HistoryPage:
+    """One page of GET /api/ask/history (newest first)"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HistoryPage":
+        return cls(items=list(data.get('data') or []), next_cursor=data.get('nextCursor'))
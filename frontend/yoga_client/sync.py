@@ -0,0 +1,108 @@
+"""
+Blocking wrapper around AsyncYogaClient
+The async client runs on a private event loop in a daemon thread, so its
+connection pool survives between calls. One YogaClient can be shared by
+many threads (e.g. cached with st.cache_resource across Streamlit sessions).
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from .client import DEFAULT_BASE_URL, AsyncYogaClient
+from .models import AskResult, BatchItem, BatchSummary, ChunkDetail, HistoryPage
+
+
+class YogaClient:
+    """Synchronous facade with the same operations as AsyncYogaClient"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, **options):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="yoga-client", daemon=True)
+        self._thread.start()
+        self._client = self._run(self._create(base_url, options))
+
+    @staticmethod
+    async def _create(base_url: str, options: Dict[str, Any]) -> AsyncYogaClient:
+        # Built on the loop thread that will use it
+        return AsyncYogaClient(base_url, **options)
+
+    def _run(self, coro, callbacks: "queue.Queue" = None):
+        """Run a coroutine on the client loop and wait for it, relaying callbacks to this thread"""
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        if callbacks is None:
+            return future.result()
+        while True:
+            try:
+                fn, args = callbacks.get(timeout=0.1)
+            except queue.Empty:
+                if future.done():
+                    return future.result()
+                continue
+            fn(*args)
+
+    def __enter__(self) -> "YogaClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close pooled connections and stop the loop thread"""
+        if self._loop.is_closed():
+            return
+        self._run(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    @property
+    def timeouts(self):
+        return self._client.timeouts
+
+    def ask(self, query: str, session_id: str = None, conversation_id: str = None, *,
+            timeout: float = None, max_queue_wait: float = None,
+            on_busy: Callable[[int, Optional[int]], Any] = None) -> AskResult:
+        """Ask one question; on_busy runs on the calling thread (safe for UI updates)"""
+        callbacks = queue.Queue() if on_busy else None
+        relay = (lambda *args: callbacks.put((on_busy, args))) if on_busy else None
+        return self._run(self._client.ask(query, session_id, conversation_id, timeout=timeout,
+                                          max_queue_wait=max_queue_wait, on_busy=relay), callbacks)
+
+    def ask_many(self, queries: Sequence[str], session_id: str = None, *, concurrency: int = 4,
+                 timeout: float = None, return_exceptions: bool = True) -> List[Union[AskResult, Exception]]:
+        return self._run(self._client.ask_many(queries, session_id, concurrency=concurrency, timeout=timeout,
+                                               return_exceptions=return_exceptions))
+
+    def stream_batch(self, queries: Sequence[str], session_id: str = None, *, mode: str = "full",
+                     concurrency: int = None, timeout: float = None) -> Iterator[Union[BatchItem, BatchSummary]]:
+        """Yield batch results as they arrive; closing the generator early closes the stream"""
+        stream = self._client.stream_batch(queries, session_id, mode=mode,
+                                           concurrency=concurrency, timeout=timeout)
+        try:
+            while True:
+                try:
+                    yield self._run(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(stream.aclose())
+
+    def submit_feedback(self, query_id: str, is_helpful: bool, comment: str = "", *,
+                        timeout: float = None) -> Dict[str, Any]:
+        return self._run(self._client.submit_feedback(query_id, is_helpful, comment, timeout=timeout))
+
+    def get_history(self, session_id: str = None, cursor: str = None, limit: int = 20, *,
+                    timeout: float = None) -> HistoryPage:
+        return self._run(self._client.get_history(session_id, cursor, limit, timeout=timeout))
+
+    def end_conversation(self, session_id: str, conversation_id: str, *, timeout: float = None) -> bool:
+        return self._run(self._client.end_conversation(session_id, conversation_id, timeout=timeout))
+
+    def get_chunk(self, chunk_id: str, cached: ChunkDetail = None, *,
+                  timeout: float = None) -> Optional[ChunkDetail]:
+        return self._run(self._client.get_chunk(chunk_id, cached, timeout=timeout))
+
+    def get_status(self, *, timeout: float = None) -> Dict[str, Any]:
+        return self._run(self._client.get_status(timeout=timeout))
@@ -0,0 +1,123 @@
+"""
+Chunking helpers for the Python RAG tooling
+Mirrors backend/src/services/chunking.service.js so that chunks produced
+offline are identical to the ones the backend builds itself.
+"""
+
+import hashlib
+
+# =============================================================================
+# ARTICLE SCHEMA (see backend/src/models/knowledgeBase.model.js)
+# =============================================================================
+REQUIRED_FIELDS = ('articleId', 'title', 'content', 'category')
+
+CATEGORIES = {'asanas', 'pranayama', 'benefits', 'contraindications', 'beginner', 'advanced', 'general'}
+
+DIFFICULTIES = {'beginner', 'intermediate', 'advanced', 'all-levels'}
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_CHUNK_OVERLAP = 50
+
+
+def validate_article(article) -> list:
+    """Validate an article record against the knowledge base schema, returning a list of errors"""
+    if not isinstance(article, dict):
+        return ['record is not an object']
+
+    errors = []
+    for field in REQUIRED_FIELDS:
+        value = article.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors.append(f"'{field}' is required and must be a non-empty string")
+
+    category = article.get('category')
+    if isinstance(category, str) and category and category not in CATEGORIES:
+        errors.append(f"'category' must be one of {sorted(CATEGORIES)}, got '{category}'")
+
+    difficulty = article.get('difficulty')
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        errors.append(f"'difficulty' must be one of {sorted(DIFFICULTIES)}, got '{difficulty}'")
+
+    tags = article.get('tags')
+    if tags is not None and (not isinstance(tags, list) or not all(isinstance(t, str) for t in tags)):
+        errors.append("'tags' must be a list of strings")
+
+    for field in ('source', 'safetyNotes'):
+        value = article.get(field)
+        if value is not None and not isinstance(value, str):
+            errors.append(f"'{field}' must be a string")
+
+    return errors
+
+
+# =============================================================================
+# CHUNKING (same rules as chunkText / chunkArticle)
+# =============================================================================
+def chunk_text(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               chunk_overlap: int = DEFAULT_CHUNK_OVERLAP, separator: str = '\n') -> list:
+    """Chunk text into smaller pieces with overlap"""
+    if not text or len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start_index = 0
+
+    while start_index < len(text):
+        end_index = start_index + chunk_size
+
+        # If we're not at the end, try to find a good break point
+        if end_index < len(text):
+            # String.lastIndexOf(sep, end) matches separators starting at or before `end`
+            last_separator = text.rfind(separator, 0, end_index + len(separator))
+
+            if last_separator > start_index + chunk_size / 2:
+                end_index = last_separator + 1
+            else:
+                last_period = text.rfind('. ', 0, end_index + 2)
+                if last_period > start_index + chunk_size / 2:
+                    end_index = last_period + 2
+
+        chunk = text[start_index:end_index].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        # Move start index forward, accounting for overlap
+        start_index = end_index - chunk_overlap
+
+    return chunks
+
+
+def chunk_article(article: dict, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  chunk_overlap: int = DEFAULT_CHUNK_OVERLAP) -> list:
+    """Chunk an article into chunk objects with metadata"""
+    chunks = chunk_text(article['content'], chunk_size, chunk_overlap)
+
+    return [{
+        'chunkId': f"{article['articleId']}-chunk-{index}",
+        'articleId': article['articleId'],
+        'title': article['title'],
+        'content': content,
+        'category': article['category'],
+        'tags': article.get('tags') or [],
+        'source': article.get('source') or 'Self-written',
+        'difficulty': article.get('difficulty') or 'all-levels',
+        'safetyNotes': article.get('safetyNotes') or '',
+        'chunkIndex': index,
+        'totalChunks': len(chunks)
+    } for index, content in enumerate(chunks)]
+
+
+def chunk_batch(articles: list, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                chunk_overlap: int = DEFAULT_CHUNK_OVERLAP) -> list:
+    """Chunk a batch of articles (process pool entry point)"""
+    chunks = []
+    for article in articles:
+        chunks.extend(chunk_article(article, chunk_size, chunk_overlap))
+    return chunks
+
+
+def chunk_digest(chunk: dict) -> bytes:
+    """Fixed-size digest of the embedded text of a chunk, used for exact de-duplication"""
+    # The backend embeds `${title}\n${content}`, so that is what identifies a duplicate
+    text = f"{chunk['title']}\n{chunk['content']}"
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
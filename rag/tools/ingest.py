@@ -0,0 +1,446 @@
+"""
+Knowledge Base Ingestion CLI
+Streams articles from JSONL or large JSON array files, validates them,
+chunks them in a process pool and writes de-duplicated chunk shards that
+the backend indexer consumes (see RAG_CHUNK_SHARDS_DIR).
+
+Usage:
+    python rag/tools/ingest.py rag/knowledge_base/articles.json --out rag/shards
+    python rag/tools/ingest.py dump-*.jsonl --out rag/shards --workers 8
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+
+from chunking import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    chunk_batch,
+    chunk_digest,
+    validate_article,
+)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+READ_BLOCK_SIZE = 1 << 20          # 1 MiB reads from the input file
+MAX_RECORD_SIZE = 16 << 20         # Largest single record accepted from a JSON array (characters)
+ARRAY_KEY = 'articles'             # Key holding the array in {"articles": [...]} files
+ARTICLES_PER_TASK = 64             # Articles sent to a worker per task
+MAX_PENDING_PER_WORKER = 2         # In-flight tasks per worker (bounds memory)
+DEFAULT_SHARD_SIZE = 10000         # Chunks per output shard
+DIGEST_CACHE_KB = 8192             # SQLite page cache of the de-duplication store
+MANIFEST_NAME = 'manifest.json'
+
+
+# =============================================================================
+# STREAMING READERS
+# =============================================================================
+DECODER = json.JSONDecoder()
+STRUCTURE = re.compile(r'[\[\]{}"]')
+STRING_SPECIAL = re.compile(r'["\\]')
+STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+SCALAR_END = re.compile(r'[,\]}\s]')
+
+
+def iter_jsonl(path: str):
+    """Yield (line number, record) pairs from a JSON Lines file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, ValueError(f"invalid JSON: {e.msg}")
+
+
+class JsonArrayScanner:
+    """
+    Reads JSON values from a file block by block.
+    A value is decoded straight from the buffer when it fits; otherwise its
+    extent is found by tracking nesting depth, strings and escapes across
+    reads, and it is decoded once complete. Memory is bounded by the
+    largest single value.
+    """
+
+    def __init__(self, f, path: str, max_value_size: int):
+        self.f = f
+        self.path = path
+        self.max_value_size = max_value_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> int:
+        """Read the next block, dropping the consumed prefix; returns how far indices shifted"""
+        block = self.f.read(READ_BLOCK_SIZE)
+        if not block:
+            self.eof = True
+        shift = self.pos
+        self.buffer = self.buffer[shift:] + block
+        self.pos = 0
+        return shift
+
+    def _peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._fill()
+
+    def _value_end(self) -> int:
+        """Index just past the value starting at pos, reading more blocks as needed"""
+        scalar = self.buffer[self.pos] not in '[{"'
+        depth = 0
+        in_string = False
+        i = self.pos
+
+        while True:
+            pattern = STRING_SPECIAL if in_string else SCALAR_END if scalar else STRUCTURE
+            match = pattern.search(self.buffer, i)
+            # An escape is only complete once the character after it has been read
+            partial = match is None or (match.group() == '\\' and match.end() == len(self.buffer))
+            if partial and not self.eof:
+                if len(self.buffer) - self.pos > self.max_value_size:
+                    raise ValueError(f"{self.path}: value larger than {self.max_value_size} characters")
+                i = match.start() if match else len(self.buffer)
+                i -= self._fill()
+                continue
+            if match is None:
+                if scalar:
+                    return len(self.buffer)
+                raise ValueError(f"{self.path}: unexpected end of file inside a value")
+
+            i = match.start()
+            char = match.group()
+            if in_string:
+                if char == '\\':
+                    i += 2
+                    continue
+                in_string = False
+                if depth == 0:
+                    return i + 1
+            elif scalar:
+                return i
+            elif char == '"':
+                # Skip a string already complete in the buffer in one step
+                closed = STRING_TAIL.match(self.buffer, i + 1)
+                if closed:
+                    if depth == 0:
+                        return closed.end()
+                    i = closed.end()
+                    continue
+                in_string = True
+            elif char in '[{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+
+    def take(self) -> str:
+        """Consume the value at the current position and return its text"""
+        if not self._peek():
+            raise ValueError(f"{self.path}: unexpected end of file")
+        end = self._value_end()
+        text = self.buffer[self.pos:end]
+        self.pos = end
+        return text
+
+    def decode(self):
+        """Consume the value at the current position; returns a ValueError if it is not valid JSON"""
+        if not self._peek():
+            raise ValueError(f"{self.path}: unexpected end of file")
+        try:
+            value, end = DECODER.raw_decode(self.buffer, self.pos)
+            # A number that runs up to the end of the buffer may continue in the next block
+            if end < len(self.buffer) or self.eof:
+                self.pos = end
+                return value
+        except json.JSONDecodeError:
+            pass
+
+        text = self.take()
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            return ValueError(f"invalid JSON: {e.msg}")
+
+    def seek_array(self, key: str):
+        """Consume up to the '[' of a top-level array or of the array stored under `key`"""
+        first = self._peek()
+        if first == '{':
+            self.pos += 1
+            while True:
+                if self._peek() != '"':
+                    raise ValueError(f"{self.path}: no \"{key}\" array found")
+                name = self.decode()
+                if not isinstance(name, str):
+                    raise ValueError(f"{self.path}: invalid object key")
+                if self._peek() != ':':
+                    raise ValueError(f"{self.path}: expected ':' after \"{name}\"")
+                self.pos += 1
+                if name == key:
+                    break
+                self.take()
+                if self._peek() != ',':
+                    raise ValueError(f"{self.path}: no \"{key}\" array found")
+                self.pos += 1
+            first = self._peek()
+
+        if first != '[':
+            raise ValueError(f"{self.path}: expected a JSON array or an object with an \"{key}\" array")
+        self.pos += 1
+
+    def iter_items(self):
+        """Yield each element of the array whose '[' was just consumed (see decode)"""
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            if not self._peek():
+                raise ValueError(f"{self.path}: unexpected end of file inside article array")
+            yield self.decode()
+
+            separator = self._peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"{self.path}: expected ',' or ']' between articles")
+
+
+def iter_json_array(path: str, key: str = ARRAY_KEY, max_record_size: int = MAX_RECORD_SIZE):
+    """
+    Yield (index, record) pairs from a JSON array without loading the whole file.
+    Accepts a top-level array or an object holding the array under `key`
+    (the knowledge base layout {"articles": [...]}); other keys are skipped.
+    A record that is complete but not valid JSON is yielded as a ValueError;
+    a record larger than max_record_size characters aborts the read.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        scanner = JsonArrayScanner(f, path, max_record_size)
+        scanner.seek_array(key)
+        yield from enumerate(scanner.iter_items())
+
+
+def iter_records(path: str):
+    """Pick a streaming reader based on the file extension"""
+    if path.endswith(('.jsonl', '.ndjson')):
+        return iter_jsonl(path)
+    return iter_json_array(path)
+
+
+def iter_valid_articles(paths: list, stats: dict):
+    """Yield schema-valid articles from all inputs, reporting rejected records"""
+    for path in paths:
+        for position, record in iter_records(path):
+            stats['articlesRead'] += 1
+
+            errors = [str(record)] if isinstance(record, Exception) else validate_article(record)
+            if errors:
+                stats['articlesRejected'] += 1
+                print(f"⚠️ {path}:{position}: {'; '.join(errors)}", file=sys.stderr)
+                continue
+
+            yield record
+
+
+def iter_batches(iterable, size: int):
+    """Group an iterable into lists of at most `size` items"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# =============================================================================
+# SHARD WRITER
+# =============================================================================
+class ShardWriter:
+    """Writes chunks to numbered JSONL shards and a manifest describing them"""
+
+    def __init__(self, out_dir: str, shard_size: int):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.shards = []
+        self._file = None
+        self._count = 0
+        os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, chunk: dict):
+        if self._file is None or self._count >= self.shard_size:
+            self._rotate()
+        self._file.write(json.dumps(chunk, ensure_ascii=False))
+        self._file.write('\n')
+        self._count += 1
+        self.shards[-1]['count'] = self._count
+
+    def _rotate(self):
+        self._close_current()
+        name = f"chunks-{len(self.shards):05d}.jsonl"
+        # Write to a temp name so a crashed run never leaves a half shard behind
+        self._file = open(os.path.join(self.out_dir, name + '.tmp'), 'w', encoding='utf-8')
+        self._count = 0
+        self.shards.append({'file': name, 'count': 0})
+
+    def _close_current(self):
+        if self._file is not None:
+            self._file.close()
+            name = self.shards[-1]['file']
+            os.replace(os.path.join(self.out_dir, name + '.tmp'), os.path.join(self.out_dir, name))
+            self._file = None
+
+    def close(self, manifest: dict):
+        self._close_current()
+        manifest = {**manifest, 'shards': self.shards}
+        with open(os.path.join(self.out_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+
+# =============================================================================
+# DE-DUPLICATION
+# =============================================================================
+class DigestStore:
+    """
+    Digests of the chunks written so far, kept in a temporary SQLite file
+    next to the shards. Only the page cache (DIGEST_CACHE_KB) stays in
+    memory, so the store does not grow the process with the input.
+    """
+
+    def __init__(self, directory: str):
+        fd, self.path = tempfile.mkstemp(prefix='.digests-', suffix='.sqlite', dir=directory)
+        os.close(fd)
+        self.db = sqlite3.connect(self.path)
+        # Scratch data: no journal or fsync, a crashed run just starts over
+        self.db.execute('PRAGMA journal_mode = OFF')
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.db.execute(f'PRAGMA cache_size = -{DIGEST_CACHE_KB}')
+        self.db.execute('CREATE TABLE digests (digest BLOB PRIMARY KEY) WITHOUT ROWID')
+        self.count = 0
+
+    def add(self, digest: bytes) -> bool:
+        """Record a digest; returns False when it was already seen"""
+        added = self.db.execute('INSERT OR IGNORE INTO digests VALUES (?)', (digest,)).rowcount == 1
+        self.count += added
+        return added
+
+    def close(self):
+        self.db.close()
+        os.remove(self.path)
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+def iter_chunk_batches(articles, workers: int, chunk_size: int, chunk_overlap: int):
+    """
+    Chunk articles in a process pool, yielding chunk lists in input order.
+    Only workers * MAX_PENDING_PER_WORKER batches are in flight at any time,
+    so memory does not grow with the size of the input.
+    """
+    worker_fn = partial(chunk_batch, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    if workers <= 1:
+        for batch in iter_batches(articles, ARTICLES_PER_TASK):
+            yield worker_fn(batch)
+        return
+
+    max_pending = workers * MAX_PENDING_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for batch in iter_batches(articles, ARTICLES_PER_TASK):
+            pending.append(pool.submit(worker_fn, batch))
+            if len(pending) >= max_pending:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def ingest(paths: list, out_dir: str, workers: int, chunk_size: int,
+           chunk_overlap: int, shard_size: int) -> dict:
+    """Run the ingestion pipeline and return summary statistics"""
+    start_time = time.time()
+    stats = {
+        'articlesRead': 0,
+        'articlesRejected': 0,
+        'chunksCreated': 0,
+        'duplicateChunks': 0,
+        'chunksWritten': 0
+    }
+
+    writer = ShardWriter(out_dir, shard_size)
+    seen = DigestStore(out_dir)
+    articles = iter_valid_articles(paths, stats)
+
+    try:
+        for chunks in iter_chunk_batches(articles, workers, chunk_size, chunk_overlap):
+            for chunk in chunks:
+                stats['chunksCreated'] += 1
+                if not seen.add(chunk_digest(chunk)):
+                    stats['duplicateChunks'] += 1
+                    continue
+                writer.write(chunk)
+                stats['chunksWritten'] += 1
+    finally:
+        seen.close()
+
+    writer.close({
+        'createdAt': datetime.now(timezone.utc).isoformat(),
+        'inputs': [os.path.abspath(p) for p in paths],
+        'chunkSize': chunk_size,
+        'chunkOverlap': chunk_overlap,
+        'count': stats['chunksWritten']
+    })
+
+    stats['shards'] = len(writer.shards)
+    stats['elapsedSeconds'] = round(time.time() - start_time, 2)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stream, validate and chunk knowledge base articles into shards')
+    parser.add_argument('inputs', nargs='+', help='JSONL (.jsonl/.ndjson) or JSON array files')
+    parser.add_argument('--out', required=True, help='Output directory for chunk shards')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Chunking processes')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--chunk-overlap', type=int, default=DEFAULT_CHUNK_OVERLAP)
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='Chunks per shard')
+    args = parser.parse_args(argv)
+
+    if args.chunk_overlap >= args.chunk_size:
+        parser.error('--chunk-overlap must be smaller than --chunk-size')
+
+    print(f"🚀 Ingesting {len(args.inputs)} file(s) with {args.workers} worker(s)...")
+    stats = ingest(args.inputs, args.out, args.workers, args.chunk_size,
+                   args.chunk_overlap, args.shard_size)
+
+    print(f"📚 Articles read: {stats['articlesRead']} (rejected: {stats['articlesRejected']})")
+    print(f"✂️ Chunks created: {stats['chunksCreated']} (duplicates dropped: {stats['duplicateChunks']})")
+    print(f"💾 Wrote {stats['chunksWritten']} chunks to {stats['shards']} shard(s) in {args.out}")
+    print(f"✅ Done in {stats['elapsedSeconds']}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
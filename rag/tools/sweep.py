@@ -0,0 +1,279 @@
+"""
+Retrieval Parameter Sweep
+Builds vector indexes for a grid of chunking settings, runs a labelled query
+set against them for a grid of similarity thresholds and top-k values, and
+reports recall@k, MRR, index size, build time and query latency.
+
+Index size and query latency are a Python proxy: an uncompressed float64
+JSON index and a brute-force scan in this process. They compare settings
+with each other; they are not the backend VectorStore's numbers (no
+de-duplication, quantization, TopK heap or shards). Use the backend
+benchmarks (npm run bench:quantization / bench:sharded) for those.
+
+Embeddings come from Ollama (same model as the backend) and are cached in a
+SQLite file keyed by model + text, so re-running a sweep only embeds chunks
+that have not been seen before.
+
+Usage:
+    python rag/tools/sweep.py --chunk-sizes 300,500,800 --overlaps 0,50,100 \
+        --thresholds 0.2,0.3,0.4 --top-k 3,5,10 --output sweep.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import statistics
+import sys
+import time
+import urllib.request
+from array import array
+
+from chunking import chunk_batch
+from ingest import iter_valid_articles
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTICLES = os.path.join(TOOLS_DIR, '..', 'knowledge_base', 'articles.json')
+DEFAULT_QUERIES = os.path.join(TOOLS_DIR, '..', 'eval', 'queries.json')
+DEFAULT_CACHE = os.path.join(TOOLS_DIR, '..', '.cache', 'embeddings.sqlite')
+
+OLLAMA_HOST = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
+EMBEDDING_MODEL = os.environ.get('OLLAMA_EMBEDDING_MODEL', 'nomic-embed-text')
+EMBED_BATCH_SIZE = 64
+
+
+# =============================================================================
+# EMBEDDINGS (Ollama + SQLite cache)
+# =============================================================================
+class EmbeddingCache:
+    """Persistent float32 embedding cache keyed by sha256(model, text)"""
+
+    def __init__(self, path: str, model: str, host: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)')
+        self.model = model
+        self.host = host.rstrip('/')
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode('utf-8')).hexdigest()
+
+    def _embed_remote(self, texts: list) -> list:
+        request = urllib.request.Request(
+            f"{self.host}/api/embed",
+            data=json.dumps({'model': self.model, 'input': texts}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=300) as response:
+            return json.load(response)['embeddings']
+
+    def embed(self, texts: list) -> list:
+        """Return embeddings for texts, calling Ollama only for cache misses"""
+        keys = [self._key(t) for t in texts]
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            for key, blob in self.db.execute(
+                    f'SELECT key, vector FROM embeddings WHERE key IN ({placeholders})', batch):
+                found[key] = array('f', blob)
+
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        for start in range(0, len(missing), EMBED_BATCH_SIZE):
+            indices = missing[start:start + EMBED_BATCH_SIZE]
+            vectors = self._embed_remote([texts[i] for i in indices])
+            rows = []
+            for i, vector in zip(indices, vectors):
+                packed = array('f', vector)
+                found[keys[i]] = packed
+                rows.append((keys[i], packed.tobytes()))
+            self.db.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?)', rows)
+            self.db.commit()
+
+        return [found[key] for key in keys]
+
+
+def normalize(vector) -> list:
+    """Scale a vector to unit length so cosine similarity is a dot product"""
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+# =============================================================================
+# INDEX BUILD + SEARCH
+# =============================================================================
+def build_index(articles: list, chunk_size: int, chunk_overlap: int, cache: EmbeddingCache) -> dict:
+    """Chunk and embed articles the same way initializeRAG does"""
+    start = time.perf_counter()
+    chunks = chunk_batch(articles, chunk_size, chunk_overlap)
+    chunk_seconds = time.perf_counter() - start
+
+    misses_before = cache.misses
+    start = time.perf_counter()
+    embeddings = cache.embed([f"{c['title']}\n{c['content']}" for c in chunks])
+    embed_seconds = time.perf_counter() - start
+
+    # Proxy size: an uncompressed float64 vector_index.json (no quantization or de-duplication)
+    index_json = json.dumps({
+        'dimension': len(embeddings[0]) if embeddings else 0,
+        'vectors': [{'id': c['chunkId'], 'embedding': list(e), 'metadata': c} for c, e in zip(chunks, embeddings)]
+    })
+
+    return {
+        'chunks': chunks,
+        'vectors': [normalize(e) for e in embeddings],
+        'dimension': len(embeddings[0]) if embeddings else 0,
+        'indexBytes': len(index_json.encode('utf-8')),
+        'chunkSeconds': chunk_seconds,
+        'embedSeconds': embed_seconds,
+        'newEmbeddings': cache.misses - misses_before
+    }
+
+
+def search(index: dict, query_vector: list, top_k: int, threshold: float) -> list:
+    """Exact cosine scan returning (score, chunk) pairs in VectorStore.search order (latency proxy only)"""
+    scored = []
+    for chunk, vector in zip(index['chunks'], index['vectors']):
+        score = sum(q * v for q, v in zip(query_vector, vector))
+        if score >= threshold:
+            scored.append((score, chunk))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return scored[:top_k]
+
+
+def evaluate(index: dict, queries: list, query_vectors: list, top_k: int, threshold: float) -> dict:
+    """Compute recall@k, MRR and search latency for one configuration"""
+    recalls = []
+    reciprocal_ranks = []
+    latencies = []
+
+    for item, query_vector in zip(queries, query_vectors):
+        start = time.perf_counter()
+        hits = search(index, query_vector, top_k, threshold)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        expected = set(item['expected'])
+        retrieved = [chunk['articleId'] for _, chunk in hits]
+        recalls.append(len(expected & set(retrieved)) / len(expected))
+
+        rank = next((i + 1 for i, article_id in enumerate(retrieved) if article_id in expected), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+    latencies.sort()
+    return {
+        'recall': statistics.mean(recalls),
+        'mrr': statistics.mean(reciprocal_ranks),
+        'latencyMeanMs': statistics.mean(latencies),
+        'latencyP95Ms': latencies[min(len(latencies) - 1, int(math.ceil(0.95 * len(latencies))) - 1)]
+    }
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+def parse_list(value: str, cast):
+    return [cast(v) for v in value.split(',') if v.strip()]
+
+
+def load_queries(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    queries = data['queries'] if isinstance(data, dict) else data
+    for item in queries:
+        if not item.get('query') or not item.get('expected'):
+            raise ValueError(f"{path}: every query needs 'query' and a non-empty 'expected' list")
+    return queries
+
+
+def write_results(path: str, rows: list):
+    if path.endswith('.json'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+        return
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep chunking / threshold / top-k settings for retrieval quality vs. speed')
+    parser.add_argument('--articles', default=DEFAULT_ARTICLES, help='Knowledge base (JSON array, {"articles": [...]} or JSONL)')
+    parser.add_argument('--queries', default=DEFAULT_QUERIES, help='Labelled queries: [{"query", "expected": [articleId]}]')
+    parser.add_argument('--chunk-sizes', default='300,500,800')
+    parser.add_argument('--overlaps', default='0,50,100')
+    parser.add_argument('--thresholds', default='0.2,0.3,0.4')
+    parser.add_argument('--top-k', default='3,5,10')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help='SQLite embedding cache')
+    parser.add_argument('--output', help='Write results to .csv or .json')
+    args = parser.parse_args(argv)
+
+    stats = {'articlesRead': 0, 'articlesRejected': 0}
+    articles = list(iter_valid_articles([args.articles], stats))
+    queries = load_queries(args.queries)
+    cache = EmbeddingCache(args.cache, EMBEDDING_MODEL, OLLAMA_HOST)
+
+    print(f"📚 {len(articles)} articles, {len(queries)} labelled queries, model {EMBEDDING_MODEL}")
+    query_vectors = [normalize(v) for v in cache.embed([q['query'] for q in queries])]
+
+    rows = []
+    for chunk_size in parse_list(args.chunk_sizes, int):
+        for overlap in parse_list(args.overlaps, int):
+            if overlap >= chunk_size:
+                continue
+
+            index = build_index(articles, chunk_size, overlap, cache)
+            print(f"🔄 size={chunk_size} overlap={overlap}: {len(index['chunks'])} chunks, "
+                  f"{index['newEmbeddings']} new embeddings")
+
+            for threshold in parse_list(args.thresholds, float):
+                for top_k in parse_list(args.top_k, int):
+                    result = evaluate(index, queries, query_vectors, top_k, threshold)
+                    rows.append({
+                        'chunkSize': chunk_size,
+                        'chunkOverlap': overlap,
+                        'threshold': threshold,
+                        'topK': top_k,
+                        'recallAtK': round(result['recall'], 4),
+                        'mrr': round(result['mrr'], 4),
+                        'chunks': len(index['chunks']),
+                        'proxyIndexMB': round(index['indexBytes'] / (1024 * 1024), 3),
+                        'buildSeconds': round(index['chunkSeconds'] + index['embedSeconds'], 3),
+                        'newEmbeddings': index['newEmbeddings'],
+                        'proxyQueryMeanMs': round(result['latencyMeanMs'], 3),
+                        'proxyQueryP95Ms': round(result['latencyP95Ms'], 3)
+                    })
+
+    if not rows:
+        print('No valid configurations (overlap must be smaller than chunk size)', file=sys.stderr)
+        return 1
+
+    header = list(rows[0].keys())
+    widths = [max(len(h), *(len(str(r[h])) for r in rows)) for h in header]
+    print()
+    print('  '.join(h.rjust(w) for h, w in zip(header, widths)))
+    for row in sorted(rows, key=lambda r: (-r['recallAtK'], -r['mrr'], r['chunks'])):
+        print('  '.join(str(row[h]).rjust(w) for h, w in zip(header, widths)))
+
+    print("\nℹ️ proxy* columns come from a float64 JSON index and a pure-Python scan, not the backend "
+          "VectorStore; use npm run bench:quantization / bench:sharded in backend/ for production figures")
+    print(f"💾 Embedding cache: {cache.hits} hits, {cache.misses} misses ({args.cache})")
+    if args.output:
+        write_results(args.output, rows)
+        print(f"📝 Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
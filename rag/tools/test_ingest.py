@@ -0,0 +1,96 @@
+"""
+Tests for the streaming JSON array reader and the pipeline in ingest.py
+Run with: python -m pytest rag/tools
+"""
+
+import json
+import os
+import tracemalloc
+
+import pytest
+
+import ingest
+
+
+def read_all(tmp_path, text: str, **kwargs):
+    path = tmp_path / 'input.json'
+    path.write_text(text, encoding='utf-8')
+    return list(ingest.iter_json_array(str(path), **kwargs))
+
+
+def test_top_level_array(tmp_path):
+    assert read_all(tmp_path, '[{"a": 1}, {"b": [2, 3]}]') == [(0, {'a': 1}), (1, {'b': [2, 3]})]
+
+
+def test_wrapper_object_skips_other_keys(tmp_path):
+    text = '{"version": [1, 2], "meta": {"articles": [9]}, "note": "[x]", "articles": [{"id": "a"}, {"id": "b"}]}'
+    assert [record for _, record in read_all(tmp_path, text)] == [{'id': 'a'}, {'id': 'b'}]
+
+
+def test_wrapper_object_without_key(tmp_path):
+    with pytest.raises(ValueError, match='no "articles" array'):
+        read_all(tmp_path, '{"version": [1, 2]}')
+
+
+@pytest.mark.parametrize('block_size', [1, 2, 3, 5, 7])
+def test_values_split_across_blocks(tmp_path, monkeypatch, block_size):
+    monkeypatch.setattr(ingest, 'READ_BLOCK_SIZE', block_size)
+    records = [12345, -6.5e3, 'a\\"b]', {'text': 'x \\\\ "y" }', 'n': [1, {"z": None}]}, True, None]
+    text = '{"articles": ' + json.dumps(records) + '}'
+    assert [record for _, record in read_all(tmp_path, text)] == records
+
+
+def test_malformed_record_is_reported_and_skipped(tmp_path):
+    records = read_all(tmp_path, '[{"a": 1 "b": 2}, {"c": 3}]')
+    assert isinstance(records[0][1], ValueError)
+    assert records[1] == (1, {'c': 3})
+
+
+def test_oversized_record_stops_reading(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, 'READ_BLOCK_SIZE', 16)
+    with pytest.raises(ValueError, match='larger than 64'):
+        read_all(tmp_path, '[{"text": "' + 'x' * 1000 + '"}]', max_record_size=64)
+
+
+def test_truncated_file(tmp_path):
+    with pytest.raises(ValueError, match='end of file'):
+        read_all(tmp_path, '{"articles": [{"a": 1}, {"b": ')
+
+
+def write_articles(path, count: int, duplicate_every: int = 4):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            # Every duplicate_every-th article repeats the text of article 0
+            n = 0 if i % duplicate_every == 0 else i
+            f.write(json.dumps({'articleId': f'a{i}', 'category': 'asanas', 'title': f'Pose {n}', 'content': f'Breathe in and hold pose {n}. ' * 4}))
+            f.write('\n')
+
+
+def test_duplicate_chunks_are_dropped(tmp_path):
+    path = tmp_path / 'input.jsonl'
+    write_articles(path, 40)
+    stats = ingest.ingest([str(path)], str(tmp_path / 'out'), workers=1, chunk_size=500,
+                          chunk_overlap=50, shard_size=1000)
+
+    assert stats['chunksCreated'] == 40
+    assert stats['duplicateChunks'] == 9
+    assert stats['chunksWritten'] == 31
+    # The digest store is a scratch file removed at the end of the run
+    assert sorted(os.listdir(tmp_path / 'out')) == ['chunks-00000.jsonl', ingest.MANIFEST_NAME]
+
+
+def test_digests_are_not_held_in_memory(tmp_path):
+    # tracemalloc sees the Python heap; SQLite's own pages are capped by DIGEST_CACHE_KB
+    peaks = {}
+    for count in (2000, 16000):
+        path = tmp_path / f'input-{count}.jsonl'
+        write_articles(path, count)
+        tracemalloc.start()
+        stats = ingest.ingest([str(path)], str(tmp_path / f'out-{count}'), workers=1, chunk_size=500,
+                              chunk_overlap=50, shard_size=100000)
+        peaks[count] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert stats['chunksWritten'] == count - count // 4 + 1
+
+    # An in-memory set of the 10,500 extra digests adds about 900 KiB
+    assert peaks[16000] - peaks[2000] < 256 << 10